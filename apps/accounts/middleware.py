@@ -4,8 +4,41 @@ Middleware to set PostgreSQL session variables for RLS and audit logging.
 Sets app.current_user_id and app.current_user_role at the start of each request
 so that Row-Level Security policies and audit triggers can identify the acting user.
 Uses SET LOCAL so values are transaction-scoped and do not leak across requests.
+Under ASGI, requests for ordinary views take the same path in a worker thread.
+Only the async views in ASYNC_VIEWS stay on the event loop. They cannot hold a
+transaction across awaits, so the variables are set session-scoped for them (as
+the Celery task_prerun hook does) and reset when the response is ready.
 """
+from asgiref.sync import async_to_sync, iscoroutinefunction, markcoroutinefunction, sync_to_async
 from django.db import connection, transaction
+from django.urls import Resolver404, resolve
+
+# URL names of views that run natively async under ASGI
+ASYNC_VIEWS = {'submit_response_async'}
+
+
+def _is_async_view(request):
+    try:
+        return resolve(request.path_info, getattr(request, 'urlconf', None)).url_name in ASYNC_VIEWS
+    except Resolver404:
+        return False
+
+
+def _reset_session_context():
+    with connection.cursor() as cursor:
+        cursor.execute("RESET app.current_user_id")
+        cursor.execute("RESET app.current_user_role")
+
+
+def _set_session_context(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        user_id, role = str(user.id), user.role
+    else:
+        user_id, role = '', 'anonymous'
+    with connection.cursor() as cursor:
+        cursor.execute("SET app.current_user_id = %s", [user_id])
+        cursor.execute("SET app.current_user_role = %s", [role])
 
 
 class RLSUserContextMiddleware:
@@ -19,10 +52,20 @@ class RLSUserContextMiddleware:
     Wraps the request in a transaction so SET LOCAL persists for all view queries.
     """
 
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self._call_atomic(request, self.get_response)
+
+    def _call_atomic(self, request, get_response):
         try:
             with transaction.atomic():
                 with connection.cursor() as cursor:
@@ -44,6 +87,24 @@ class RLSUserContextMiddleware:
                             "SET LOCAL app.current_user_role = %s",
                             ['anonymous'],
                         )
-                return self.get_response(request)
+                return get_response(request)
+        except Exception:
+            return get_response(request)
+
+    async def __acall__(self, request):
+        if not _is_async_view(request):
+            # One thread for the rest of the stack, so the transaction and SET LOCAL cover the view
+            return await sync_to_async(self._call_atomic)(request, async_to_sync(self.get_response))
+        if connection.vendor != 'postgresql':
+            return await self.get_response(request)
+        try:
+            await sync_to_async(_set_session_context)(request)
         except Exception:
-            return self.get_response(request)
+            pass
+        try:
+            return await self.get_response(request)
+        finally:
+            try:
+                await sync_to_async(_reset_session_context)()
+            except Exception:
+                pass
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.9 on 2026-10-19 15:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_add_citi_certificate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='eligibility_indexed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
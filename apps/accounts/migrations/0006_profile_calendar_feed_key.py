@@ -0,0 +1,38 @@
+# Generated by Django 5.0.9 on 2026-10-19 20:10
+
+import secrets
+
+from django.db import migrations, models
+
+import apps.accounts.models
+
+
+def assign_feed_keys(apps, schema_editor):
+    """A distinct key per existing profile (AddField would give every row the same default)."""
+    Profile = apps.get_model('accounts', 'Profile')
+    profiles = list(Profile.objects.only('pk'))
+    for profile in profiles:
+        profile.calendar_feed_key = secrets.token_urlsafe(24)
+    Profile.objects.bulk_update(profiles, ['calendar_feed_key'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_profile_eligibility_indexed_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='calendar_feed_key',
+            field=models.CharField(default='', editable=False, max_length=64),
+            preserve_default=False,
+        ),
+        migrations.RunPython(assign_feed_keys, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='profile',
+            name='calendar_feed_key',
+            field=models.CharField(default=apps.accounts.models.new_calendar_feed_key, editable=False, max_length=64),
+        ),
+    ]
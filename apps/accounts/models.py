@@ -1,6 +1,7 @@
 """
 User and authentication models.
 """
+import secrets
 import uuid
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.db import models
@@ -103,6 +104,10 @@ class User(AbstractBaseUser, PermissionsMixin):
         return self.email_verified_at is not None
 
 
+def new_calendar_feed_key():
+    return secrets.token_urlsafe(24)
+
+
 class Profile(models.Model):
     """Extended user profile information."""
     
@@ -119,6 +124,10 @@ class Profile(models.Model):
     
     # Participant-specific
     no_show_count = models.IntegerField(default=0)
+    # Last time the participant's eligible-study index was rebuilt (null: never indexed)
+    eligibility_indexed_at = models.DateTimeField(null=True, blank=True, editable=False)
+    # Signed into the calendar feed URL; replacing it invalidates previously shared URLs
+    calendar_feed_key = models.CharField(max_length=64, default=new_calendar_feed_key, editable=False)
     is_banned = models.BooleanField(default=False)
     ban_reason = models.TextField(blank=True)
     
@@ -1,9 +1,33 @@
+import uuid
+from unittest import skipUnless
+
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.core import mail
-from django.test import TestCase, override_settings
-from django.urls import reverse
+from django.db import connection
+from django.http import JsonResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import path, reverse
 
+from apps.accounts.middleware import _is_async_view
 from apps.accounts.models import User
+from config.urls import urlpatterns as site_urlpatterns
+
+
+def _session_context():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT current_setting('app.current_user_id', true), current_setting('app.current_user_role', true)"
+        )
+        return cursor.fetchone()
+
+
+def rls_context(request):
+    user_id, role = _session_context()
+    return JsonResponse({'user_id': user_id, 'role': role, 'atomic': connection.in_atomic_block})
+
+
+urlpatterns = [path('rls-context/', rls_context)] + site_urlpatterns
 
 
 @override_settings(
@@ -102,3 +126,32 @@ class PasswordChangeFlowTests(TestCase):
         response = self.client.get(reverse("accounts:password_change"))
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, "accounts/password_change.html")
+
+
+class RLSMiddlewareRoutingTests(SimpleTestCase):
+    def test_only_async_views_skip_the_transaction(self):
+        factory = RequestFactory()
+        submit = reverse('submit_response_async', kwargs={'study_id': uuid.uuid4()})
+        self.assertTrue(_is_async_view(factory.post(submit)))
+        self.assertFalse(_is_async_view(factory.get(reverse('accounts:password_reset'))))
+        self.assertFalse(_is_async_view(factory.get('/no-such-page/')))
+
+
+@skipUnless(connection.vendor == 'postgresql', 'RLS session variables are PostgreSQL-only')
+@override_settings(ROOT_URLCONF='apps.accounts.tests')
+class RLSContextAsyncTests(TransactionTestCase):
+    """Requests through the ASGI handler; the test shares the connection the request used."""
+
+    async def test_context_is_request_scoped(self):
+        user = await sync_to_async(User.objects.create_user)(
+            email='rls@example.com', password='password123', role='participant',
+        )
+        await self.async_client.aforce_login(user)
+        response = await self.async_client.get('/rls-context/')
+        self.assertEqual(response.json(), {'user_id': str(user.id), 'role': 'participant', 'atomic': True})
+        self.assertFalse(any(await sync_to_async(_session_context)()))
+
+        # The async view sets the variables session-scoped; they must not outlive the request
+        submit = reverse('submit_response_async', kwargs={'study_id': uuid.uuid4()})
+        await self.async_client.post(submit, '{}', content_type='application/json')
+        self.assertFalse(any(await sync_to_async(_session_context)()))
@@ -53,23 +53,18 @@ def log_compliance_decision(
     request=None,
     actor_note: str = '',
     extra: Optional[Dict[str, Any]] = None,
+    strict: bool = False,
 ):
     """
-    Write an AuditLog row for a compliance-evaluated decision.
+    Record an AuditLog row for a compliance-evaluated decision.
 
-    Failures are swallowed at the call site if needed; this function raises
-    so callers can choose. Prefer try/except in views to avoid blocking UX
-    when audit DB write fails unexpectedly.
+    The row is buffered and written after the request commits
+    (apps.credits.audit). Pass ``strict=True`` for decisions that must be on
+    record before the response goes out (e.g. a FERPA export proceeding);
+    the row is then inserted immediately and a failed write raises, so
+    callers can choose whether to swallow it.
     """
-    from apps.credits.models import AuditLog
-
-    ip = None
-    ua = ''
-    if request is not None:
-        ip = request.META.get('REMOTE_ADDR')
-        if ip and len(str(ip)) >= 45:
-            ip = None
-        ua = (request.META.get('HTTP_USER_AGENT') or '')[:500]
+    from apps.credits import audit
 
     metadata = build_decision_trace(
         report,
@@ -77,14 +72,14 @@ def log_compliance_decision(
         actor_note=actor_note,
         extra=extra,
     )
-    return AuditLog.objects.create(
+    return audit.record(
         actor=actor,
         action=action,
         entity=entity,
         entity_id=entity_id,
-        ip_address=ip,
-        user_agent=ua,
+        request=request,
         metadata=metadata,
+        strict=strict,
     )
 
 
@@ -7,7 +7,7 @@ from .models import Course, Enrollment
 
 @admin.register(Course)
 class CourseAdmin(admin.ModelAdmin):
-    list_display = ['code', 'name', 'term', 'section', 'instructor', 'credits_required', 'is_active']
+    list_display = ['code', 'name', 'term', 'term_starts', 'term_ends', 'section', 'instructor', 'credits_required', 'is_active']
     list_filter = ['term', 'is_active', 'created_at']
     search_fields = ['code', 'name', 'instructor__email']
     raw_id_fields = ['instructor']
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.9 on 2026-10-19 22:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0002_alter_enrollment_options'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='term_ends',
+            field=models.DateField(blank=True, help_text='Last day of the term', null=True),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='term_starts',
+            field=models.DateField(blank=True, help_text='First day of the term (bounds term reports)', null=True),
+        ),
+    ]
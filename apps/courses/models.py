@@ -2,7 +2,10 @@
 Course and enrollment models.
 """
 import uuid
+from decimal import Decimal
+
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.conf import settings
 from django.core.validators import MinValueValidator
 
@@ -16,6 +19,8 @@ class Course(models.Model):
     name = models.CharField(max_length=300)
     term = models.CharField(max_length=50, help_text="e.g., 2025-Fall", db_index=True)
     section = models.CharField(max_length=20, blank=True)
+    term_starts = models.DateField(null=True, blank=True, help_text="First day of the term (bounds term reports)")
+    term_ends = models.DateField(null=True, blank=True, help_text="Last day of the term")
     
     instructor = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -51,6 +56,21 @@ class Course(models.Model):
         return f"{self.code}{section_str} ({self.term})"
 
 
+class EnrollmentQuerySet(models.QuerySet):
+    def with_credits(self):
+        """Annotate ``credits_total`` from CreditBalance (read by credits_earned)."""
+        from apps.credits.models import CreditBalance
+        earned = CreditBalance.objects.filter(
+            participant=models.OuterRef('participant'),
+            course=models.OuterRef('course'),
+        ).values('earned')[:1]
+        return self.annotate(credits_total=Coalesce(
+            models.Subquery(earned),
+            models.Value(Decimal('0.00')),
+            output_field=models.DecimalField(max_digits=8, decimal_places=2),
+        ))
+
+
 class Enrollment(models.Model):
     """Student enrollment in a course."""
     
@@ -66,6 +86,8 @@ class Enrollment(models.Model):
     
     enrolled_at = models.DateTimeField(auto_now_add=True)
     
+    objects = EnrollmentQuerySet.as_manager()
+    
     class Meta:
         db_table = 'course_enrollments'
         verbose_name = 'Course Enrollment'
@@ -80,13 +102,14 @@ class Enrollment(models.Model):
         return f"{self.participant.get_full_name()} in {self.course.code}"
     
     def credits_earned(self):
-        """Calculate total credits earned for this course."""
-        from apps.credits.models import CreditTransaction
-        return CreditTransaction.objects.filter(
-            participant=self.participant,
-            course=self.course,
-            amount__gt=0
-        ).aggregate(total=models.Sum('amount'))['total'] or 0
+        """Total credits earned for this course (from CreditBalance, looked up once)."""
+        if not hasattr(self, 'credits_total'):
+            from apps.credits.models import CreditBalance
+            self.credits_total = CreditBalance.objects.filter(
+                participant_id=self.participant_id,
+                course_id=self.course_id,
+            ).values_list('earned', flat=True).first() or 0
+        return self.credits_total
     
     def credits_remaining(self):
         """Calculate credits still needed."""
@@ -2,7 +2,7 @@
 Admin configuration for credits app.
 """
 from django.contrib import admin
-from .models import CreditTransaction, AuditLog
+from .models import AuditCheckpoint, AuditLog, CreditBalance, CreditTransaction
 
 
 @admin.register(CreditTransaction)
@@ -11,17 +11,29 @@ class CreditTransactionAdmin(admin.ModelAdmin):
     list_filter = ['created_at', 'amount']
     search_fields = ['participant__email', 'participant__first_name', 'participant__last_name', 
                      'study__title', 'course__code']
-    raw_id_fields = ['participant', 'study', 'course', 'created_by']
+    raw_id_fields = ['participant', 'study', 'course', 'signup', 'created_by']
     readonly_fields = ['created_at']
 
 
+@admin.register(CreditBalance)
+class CreditBalanceAdmin(admin.ModelAdmin):
+    """Read-only: balances are derived from credit transactions."""
+    list_display = ['participant', 'course', 'earned', 'balance', 'updated_at']
+    search_fields = ['participant__email', 'participant__first_name', 'participant__last_name', 'course__code']
+    raw_id_fields = ['participant', 'course']
+    readonly_fields = ['participant', 'course', 'earned', 'balance', 'updated_at']
+    
+    def has_add_permission(self, request):
+        return False
+
+
 @admin.register(AuditLog)
 class AuditLogAdmin(admin.ModelAdmin):
-    list_display = ['created_at', 'actor', 'action', 'entity', 'entity_id', 'ip_address']
+    list_display = ['seq', 'created_at', 'actor', 'action', 'entity', 'entity_id', 'ip_address']
     list_filter = ['action', 'entity', 'created_at']
     search_fields = ['actor__email', 'actor__first_name', 'actor__last_name', 'action', 'entity']
     raw_id_fields = ['actor']
-    readonly_fields = ['created_at', 'formatted_metadata']
+    readonly_fields = ['seq', 'created_at', 'actor_ref', 'formatted_metadata', 'prev_hash', 'row_hash']
     date_hierarchy = 'created_at'
     
     fieldsets = (
@@ -35,6 +47,10 @@ class AuditLogAdmin(admin.ModelAdmin):
             'fields': ('ip_address', 'user_agent'),
             'classes': ('collapse',)
         }),
+        ('Hash Chain', {
+            'fields': ('seq', 'actor_ref', 'prev_hash', 'row_hash'),
+            'classes': ('collapse',)
+        }),
     )
     
     def formatted_metadata(self, obj):
@@ -60,7 +76,23 @@ class AuditLogAdmin(admin.ModelAdmin):
     def has_delete_permission(self, request, obj=None):
         """Don't allow deletion of audit logs."""
         return False
+    
+    def has_change_permission(self, request, obj=None):
+        """Audit logs are hash-chained; any edit would fail verification."""
+        return False
 
 
-
-
+@admin.register(AuditCheckpoint)
+class AuditCheckpointAdmin(admin.ModelAdmin):
+    """Read-only: checkpoints are signed by the checkpoint_audit_chain task."""
+    list_display = ['seq', 'created_at', 'rows_verified', 'row_hash']
+    readonly_fields = ['seq', 'row_hash', 'signature', 'rows_verified', 'created_at']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,164 @@
+"""
+Buffered audit log writer.
+
+record() queues an AuditLog row for after the current transaction commits;
+it does not INSERT on the spot. Inside batch() the committed rows collect
+in memory, and the whole batch is written with one bulk_create when the
+block exits. AuditBufferMiddleware wraps every request in batch(), so a
+request's audit events cost at most one INSERT, after the response has
+been produced. Outside batch(), for example in tasks or the shell, a
+committed row is written immediately. Rows recorded in a transaction (or
+savepoint) that rolls back are discarded together with the changes they
+describe.
+
+Rows are inserted through apps.credits.chain.append(), which links them
+into the audit hash chain.
+
+If a flush fails, its rows are appended to AUDIT_LOG_SPOOL_PATH (JSON
+lines) and logged. replay_spool(), run by the replay_audit_spool beat
+task, inserts them later.
+
+record(..., strict=True) writes the row synchronously inside the current
+transaction and raises on failure. Use it for events that must be stored
+before the response, such as FERPA exports. Setting AUDIT_LOG_BUFFERED to
+False makes every record() strict.
+"""
+import contextvars
+import json
+import logging
+import os
+import uuid
+from contextlib import contextmanager
+from functools import partial
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+
+from . import chain
+from .models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+_batch = contextvars.ContextVar('audit_batch', default=None)
+
+SPOOL_FIELDS = ('id', 'actor_id', 'action', 'entity', 'entity_id', 'metadata', 'ip_address', 'user_agent')
+
+
+def request_meta(request):
+    """(ip_address, user_agent) for an AuditLog row, from ``request`` (or None)."""
+    if request is None:
+        return None, ''
+    ip = request.META.get('REMOTE_ADDR')
+    return (ip if ip and len(str(ip)) < 45 else None), (request.META.get('HTTP_USER_AGENT') or '')[:500]
+
+
+def record(action, entity, entity_id=None, actor=None, metadata=None, request=None, strict=False, **fields):
+    """
+    Audit ``action`` on ``entity``. Returns the AuditLog; it is saved already
+    when ``strict`` (or AUDIT_LOG_BUFFERED is off), otherwise after commit.
+    """
+    ip_address, user_agent = request_meta(request)
+    fields.setdefault('ip_address', ip_address)
+    fields.setdefault('user_agent', user_agent)
+    entry = AuditLog(
+        actor=actor, action=action, entity=entity, entity_id=entity_id, metadata=metadata or {}, **fields,
+    )
+    if strict or not settings.AUDIT_LOG_BUFFERED:
+        chain.append([entry])
+        return entry
+    transaction.on_commit(partial(_committed, entry))
+    return entry
+
+
+def _committed(entry):
+    pending = _batch.get()
+    if pending is None:
+        flush([entry])
+    else:
+        pending.append(entry)
+
+
+def start_batch():
+    """Start collecting committed rows in this context; pass the result to finish_batch."""
+    pending = []
+    return pending, _batch.set(pending)
+
+
+def finish_batch(state):
+    """Stop collecting and return the rows collected since start_batch (not yet written)."""
+    pending, token = state
+    _batch.reset(token)
+    return pending
+
+
+@contextmanager
+def batch():
+    """Collect committed audit rows and write them with one INSERT on exit."""
+    state = start_batch()
+    try:
+        yield state[0]
+    finally:
+        flush(finish_batch(state))
+
+
+def flush(entries):
+    """bulk_create ``entries``; on failure spool them to disk instead of raising."""
+    if not entries:
+        return
+    try:
+        chain.append(entries)
+    except Exception:
+        logger.exception('Audit log flush failed; spooling %d row(s)', len(entries))
+        _spool(entries)
+
+
+def _spool(entries):
+    path = settings.AUDIT_LOG_SPOOL_PATH
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as spool:
+            for entry in entries:
+                row = {field: getattr(entry, field) for field in SPOOL_FIELDS}
+                row['created_at'] = entry.created_at
+                spool.write(json.dumps(row, cls=DjangoJSONEncoder) + '\n')
+    except OSError:
+        logger.critical('Audit spool %s not writable; %d audit row(s) lost: %r', path, len(entries), [
+            (entry.action, entry.entity, str(entry.entity_id)) for entry in entries
+        ])
+
+
+def replay_spool():
+    """
+    Insert spooled rows, keeping their ids and created_at (so a replay never
+    duplicates). They join the hash chain at its current head. Returns the
+    count inserted.
+    """
+    path = settings.AUDIT_LOG_SPOOL_PATH
+    claimed = f'{path}.{uuid.uuid4().hex}'
+    try:
+        os.replace(path, claimed)
+    except FileNotFoundError:
+        return 0
+
+    entries = {}
+    with open(claimed, encoding='utf-8') as spool:
+        for line in spool:
+            row = json.loads(line)
+            row['id'] = uuid.UUID(row['id'])
+            row['created_at'] = parse_datetime(row['created_at'])
+            entries[row['id']] = AuditLog(**row)
+    entries = list(entries.values())
+    try:
+        with transaction.atomic():
+            existing = set(AuditLog.objects.filter(pk__in=[entry.pk for entry in entries]).values_list('pk', flat=True))
+            fresh = [entry for entry in entries if entry.pk not in existing]
+            chain.append(fresh)
+    except Exception:
+        logger.exception('Audit spool replay failed; %d row(s) kept for the next run', len(entries))
+        _spool(entries)
+        os.remove(claimed)
+        return 0
+    os.remove(claimed)
+    return len(fresh)
@@ -0,0 +1,137 @@
+"""
+CreditBalance maintenance.
+
+Balances are adjusted from CreditTransaction signals (apps.credits.signals)
+in the same database transaction as the write: a new transaction adds its
+amount, a deleted one subtracts it, and an edited one has its old and new
+(participant, course) rows recomputed. QuerySet.update() and bulk_create() bypass signals, so bulk
+writers call apply_transactions() themselves; the rebuild_credit_balances
+command verifies and repairs the table.
+"""
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import DecimalField, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import CreditBalance, CreditTransaction
+
+ZERO = Decimal('0.00')
+
+
+def adjust(participant_id, course_id, earned, balance, create=True):
+    """Add ``earned`` / ``balance`` to one row, creating it unless ``create`` is False."""
+    rows = CreditBalance.objects.filter(participant_id=participant_id, course_id=course_id)
+    changes = dict(earned=F('earned') + earned, balance=F('balance') + balance, updated_at=timezone.now())
+    with transaction.atomic():
+        if rows.update(**changes) or not create:
+            return
+        try:
+            with transaction.atomic():
+                CreditBalance.objects.create(
+                    participant_id=participant_id, course_id=course_id, earned=earned, balance=balance,
+                )
+        except IntegrityError:
+            # Created by a concurrent writer since the UPDATE above
+            rows.update(**changes)
+
+
+def add_transaction(credit_transaction):
+    amount = Decimal(credit_transaction.amount)
+    adjust(credit_transaction.participant_id, credit_transaction.course_id, max(amount, ZERO), amount)
+
+
+def remove_transaction(credit_transaction):
+    # Never creates a row: the participant or course may be going away in the same delete
+    amount = Decimal(credit_transaction.amount)
+    adjust(credit_transaction.participant_id, credit_transaction.course_id, -max(amount, ZERO), -amount, create=False)
+
+
+def apply_transactions(credit_transactions):
+    """
+    Add rows written without signals (bulk_create) in a fixed number of
+    queries: missing balance rows are inserted (ignoring conflicts), the
+    affected rows are locked and read, and all of them are written back
+    with one bulk_update.
+    """
+    totals = {}
+    for credit_transaction in credit_transactions:
+        key = (credit_transaction.participant_id, credit_transaction.course_id)
+        amount = Decimal(credit_transaction.amount)
+        earned, balance = totals.get(key, (ZERO, ZERO))
+        totals[key] = (earned + max(amount, ZERO), balance + amount)
+    if not totals:
+        return
+    with transaction.atomic():
+        CreditBalance.objects.bulk_create(
+            [CreditBalance(participant_id=participant_id, course_id=course_id) for participant_id, course_id in totals],
+            ignore_conflicts=True,
+        )
+        rows = [
+            row for row in CreditBalance.objects.select_for_update().filter(
+                participant_id__in={participant_id for participant_id, _ in totals}
+            )
+            if (row.participant_id, row.course_id) in totals
+        ]
+        now = timezone.now()
+        for row in rows:
+            earned, balance = totals[(row.participant_id, row.course_id)]
+            row.earned += earned
+            row.balance += balance
+            row.updated_at = now
+        CreditBalance.objects.bulk_update(rows, ['earned', 'balance', 'updated_at'], batch_size=500)
+
+
+def transaction_totals(transactions=None):
+    """{(participant_id, course_id): (earned, balance)} summed from ``transactions``."""
+    decimal = DecimalField(max_digits=8, decimal_places=2)
+    rows = (
+        (transactions if transactions is not None else CreditTransaction.objects.all())
+        .order_by()
+        .values('participant_id', 'course_id')
+        .annotate(
+            total_earned=Coalesce(Sum('amount', filter=Q(amount__gt=0)), Value(ZERO), output_field=decimal),
+            total_balance=Sum('amount'),
+        )
+    )
+    return {
+        (row['participant_id'], row['course_id']): (row['total_earned'], row['total_balance'])
+        for row in rows
+    }
+
+
+def recompute(participant_id, course_id):
+    """Recompute one balance row from its transactions."""
+    actual = transaction_totals(
+        CreditTransaction.objects.filter(participant_id=participant_id, course_id=course_id)
+    ).get((participant_id, course_id))
+    rows = CreditBalance.objects.filter(participant_id=participant_id, course_id=course_id)
+    if actual is None:
+        rows.delete()
+    elif not rows.update(earned=actual[0], balance=actual[1], updated_at=timezone.now()):
+        adjust(participant_id, course_id, *actual)
+
+
+def rebuild(dry_run=False):
+    """
+    Compare every balance with its transactions and fix the drifted ones.
+    Returns [(participant_id, course_id, stored, actual)], where stored and
+    actual are (earned, balance) tuples or None for a missing row.
+    """
+    actual = transaction_totals()
+    stored = {
+        (participant_id, course_id): (earned, balance)
+        for participant_id, course_id, earned, balance in
+        CreditBalance.objects.values_list('participant_id', 'course_id', 'earned', 'balance')
+    }
+    drift = [
+        (*key, stored.get(key), actual.get(key))
+        for key in set(actual) | set(stored)
+        if stored.get(key) != actual.get(key)
+    ]
+    if not dry_run:
+        with transaction.atomic():
+            for participant_id, course_id, _, _ in drift:
+                recompute(participant_id, course_id)
+    return drift
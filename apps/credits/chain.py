@@ -0,0 +1,206 @@
+"""
+Tamper-evident hash chain over audit_logs.
+
+Every AuditLog row is inserted through append(). It locks the
+AuditChainHead row, gives each entry the next ``seq`` and sets
+
+    row_hash = sha256(prev_hash + canonical(entry))
+
+where prev_hash is the previous row's row_hash (GENESIS for seq 1). Any
+of these breaks either the row's own hash or the next row's prev_hash:
+editing a row, deleting one or reordering rows. Deleting rows from the
+end leaves the chain behind the head.
+
+checkpoint() verifies the rows added since the last checkpoint and, if
+they are intact, signs the new (seq, row_hash) with django.core.signing.
+The key is AUDIT_CHAIN_SIGNING_KEY, or SECRET_KEY by default. verify()
+starts from the latest checkpoint, so a routine check costs O(new rows).
+verify(full=True) streams the whole table in seq order. Both read
+values_list() rows through a server-side iterator and keep only the
+previous hash, so memory stays constant.
+
+Detaching old audit_logs partitions (config.partitioning) removes the
+start of the chain, so a full verify then reports the missing rows. The
+checks from a later checkpoint are unaffected. ``seq`` is unique; once the
+table is partitioned, that constraint is enforced through a side table.
+
+The head lock serializes audit inserts. Buffered writes (apps.credits.audit)
+take it once per request, after the response has been produced.
+"""
+import hashlib
+import json
+import uuid
+from dataclasses import dataclass, field
+from datetime import timezone as dt_timezone
+from typing import List
+
+from django.conf import settings
+from django.core import signing
+from django.db import transaction
+from django.utils.crypto import constant_time_compare
+
+from .models import AuditChainHead, AuditCheckpoint, AuditLog
+
+GENESIS = '0' * 64
+CHAINED_FIELDS = (
+    'id', 'seq', 'actor_ref', 'action', 'entity', 'entity_id', 'metadata', 'ip_address', 'user_agent', 'created_at',
+)
+MAX_PROBLEMS = 100
+
+_ip_field = AuditLog._meta.get_field('ip_address')
+
+
+def _uuid(value):
+    return str(uuid.UUID(str(value))) if value else None
+
+
+def canonical(values) -> bytes:
+    """Stable encoding of a row's CHAINED_FIELDS values, as built or as read back."""
+    id_, seq, actor_ref, action, entity, entity_id, metadata, ip_address, user_agent, created_at = values
+    return json.dumps(
+        [
+            _uuid(id_), seq, _uuid(actor_ref), action, entity, _uuid(entity_id), metadata,
+            ip_address or None, user_agent or '',
+            created_at.astimezone(dt_timezone.utc).isoformat(timespec='microseconds'),
+        ],
+        sort_keys=True,
+        separators=(',', ':'),
+        ensure_ascii=False,
+    ).encode()
+
+
+def row_hash(prev_hash, values) -> str:
+    return hashlib.sha256(prev_hash.encode() + canonical(values)).hexdigest()
+
+
+def sign(seq, hash_):
+    signer = signing.Signer(key=settings.AUDIT_CHAIN_SIGNING_KEY or None, salt='apps.credits.chain')
+    return signer.signature(f'{seq}:{hash_}')
+
+
+def _lock_head():
+    head, _ = AuditChainHead.objects.select_for_update().get_or_create(pk=1, defaults={'row_hash': GENESIS})
+    return head
+
+
+def _link(head, entry):
+    # Store values exactly as the database will return them, so verify() recomputes the same hash
+    entry.actor_ref = entry.actor_id
+    entry.ip_address = _ip_field.get_prep_value(entry.ip_address) or None
+    entry.metadata = json.loads(json.dumps(entry.metadata or {}))
+    entry.seq = head.seq + 1
+    entry.prev_hash = head.row_hash
+    entry.row_hash = row_hash(entry.prev_hash, [getattr(entry, name) for name in CHAINED_FIELDS])
+    head.seq, head.row_hash = entry.seq, entry.row_hash
+
+
+def append(entries, batch_size=500):
+    """Chain and bulk-insert ``entries`` (unsaved AuditLog objects); returns them."""
+    if not entries:
+        return entries
+    with transaction.atomic():
+        head = _lock_head()
+        for entry in entries:
+            _link(head, entry)
+        AuditLog.objects.bulk_create(entries, batch_size=batch_size)
+        head.save(update_fields=['seq', 'row_hash', 'updated_at'])
+    return entries
+
+
+@dataclass
+class Verification:
+    start_seq: int = 0  # first row checked
+    end_seq: int = 0  # last row checked
+    end_hash: str = GENESIS
+    rows: int = 0
+    anchor: AuditCheckpoint = None  # checkpoint an incremental check started from
+    problems: List[str] = field(default_factory=list)  # first MAX_PROBLEMS only
+    problem_count: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return not self.problem_count
+
+    def problem(self, message):
+        self.problem_count += 1
+        if len(self.problems) < MAX_PROBLEMS:
+            self.problems.append(message)
+
+
+def _check_signature(result, checkpoint):
+    if not constant_time_compare(checkpoint.signature, sign(checkpoint.seq, checkpoint.row_hash)):
+        result.problem(f'checkpoint #{checkpoint.seq}: signature does not match')
+        return False
+    return True
+
+
+def verify(full=False, chunk_size=5000) -> Verification:
+    """
+    Check the chain up to the current head: from the latest checkpoint, or
+    from seq 1 if ``full`` (also checking every checkpoint on the way).
+    """
+    result = Verification()
+    head = AuditChainHead.objects.filter(pk=1).first()
+    head_seq, head_hash = (head.seq, head.row_hash) if head else (0, GENESIS)
+
+    anchor = None if full else AuditCheckpoint.objects.order_by('-seq').first()
+    if anchor is not None and not _check_signature(result, anchor):
+        anchor = None
+    rows = AuditLog.objects.filter(seq__lte=head_seq)
+    if anchor is None:
+        # From the start; the first row must follow GENESIS
+        seq, prev = 0, GENESIS
+        checkpoints = AuditCheckpoint.objects.filter(seq__lte=head_seq).order_by('seq').iterator()
+    else:
+        # Re-check the anchor row itself, trusting only its prev_hash
+        result.anchor = anchor
+        rows = rows.filter(seq__gte=anchor.seq)
+        seq, prev = anchor.seq - 1, None
+        checkpoints = iter([anchor])
+
+    rows = rows.order_by('seq').values_list(*CHAINED_FIELDS, 'prev_hash', 'row_hash').iterator(chunk_size=chunk_size)
+    pending = next(checkpoints, None)
+    for *content, stored_prev, stored_hash in rows:
+        row_seq = content[1]
+        if not result.rows:
+            result.start_seq = row_seq
+        if row_seq != seq + 1:
+            result.problem(f'#{row_seq}: expected #{seq + 1}; rows missing or duplicated')
+        if prev is not None and stored_prev != prev:
+            result.problem(f'#{row_seq}: prev_hash does not match row #{seq}')
+        if row_hash(stored_prev, content) != stored_hash:
+            result.problem(f'#{row_seq}: content does not match row_hash')
+        while pending is not None and pending.seq <= row_seq:
+            if pending.seq < row_seq:
+                result.problem(f'checkpoint #{pending.seq}: row missing')
+            elif pending.row_hash != stored_hash:
+                result.problem(f'checkpoint #{pending.seq}: row_hash differs from the signed value')
+            if full:
+                _check_signature(result, pending)
+            pending = next(checkpoints, None)
+        seq, prev = row_seq, stored_hash
+        result.rows += 1
+
+    if pending is not None:
+        result.problem(f'checkpoint #{pending.seq}: row missing')
+    result.end_seq, result.end_hash = seq, prev or GENESIS
+    if (seq, prev) != (head_seq, head_hash):
+        result.problem(f'chain ends at #{seq} but the head is #{head_seq}')
+    return result
+
+
+def checkpoint():
+    """
+    Verify the rows since the last checkpoint and, if intact, sign the
+    chain head. Returns (verification, new checkpoint or None).
+    """
+    result = verify()
+    if not result.ok or not result.end_seq or (result.anchor and result.anchor.seq == result.end_seq):
+        return result, None
+    created = AuditCheckpoint.objects.create(
+        seq=result.end_seq,
+        row_hash=result.end_hash,
+        signature=sign(result.end_seq, result.end_hash),
+        rows_verified=result.rows,
+    )
+    return result, created
@@ -0,0 +1,41 @@
+"""
+Forms for credits app.
+"""
+from django import forms
+
+from apps.studies.models import Study
+
+
+class CreditGrantForm(forms.Form):
+    """Select attended signups to grant credit for (apps.credits.grants)."""
+
+    study = forms.ModelChoiceField(
+        queryset=Study.objects.none(),
+        required=False,
+        empty_label='All my studies',
+        widget=forms.Select(attrs={'class': 'form-select'}),
+    )
+    start_date = forms.DateField(required=False, widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}))
+    end_date = forms.DateField(required=False, widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}))
+    reason = forms.CharField(
+        required=False,
+        max_length=500,
+        widget=forms.TextInput(attrs={'class': 'form-control'}),
+        help_text='Defaults to "Attended <study title>"',
+    )
+
+    def __init__(self, *args, user, **kwargs):
+        super().__init__(*args, **kwargs)
+        studies = Study.objects.order_by('title')
+        if not user.is_admin:
+            studies = studies.filter(researcher=user)
+        self.fields['study'].queryset = studies
+
+    def clean(self):
+        cleaned = super().clean()
+        start_date, end_date = cleaned.get('start_date'), cleaned.get('end_date')
+        if not cleaned.get('study') and not (start_date and end_date):
+            raise forms.ValidationError('Choose a study or a session date range.')
+        if start_date and end_date and end_date < start_date:
+            self.add_error('end_date', 'End date must be on or after the start date.')
+        return cleaned
@@ -0,0 +1,145 @@
+"""
+Bulk credit grants for attended signups.
+
+grant_for_signups() turns attended signups into CreditTransaction rows in
+one database transaction and a fixed number of queries. It locks and reads
+the signups, skips the ones already granted, and resolves each
+participant's course (resolve_courses). It then bulk-inserts the
+transactions, appends their AuditLog rows to the audit hash chain
+(bulk_create bypasses the credit_granted signal) and applies the CreditBalance changes. The partial
+unique constraint on CreditTransaction.signup backs up the repeat-grant
+check.
+"""
+from dataclasses import dataclass, field
+from typing import List
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from apps.courses.models import Course, Enrollment
+from apps.studies.models import Signup
+
+from . import audit, balances, chain
+from .models import AuditLog, CreditTransaction
+
+
+@dataclass
+class GrantResult:
+    transactions: List[CreditTransaction] = field(default_factory=list)
+    already_granted: List[object] = field(default_factory=list)  # signup ids skipped
+
+    @property
+    def participant_count(self) -> int:
+        return len({credit.participant_id for credit in self.transactions})
+
+
+def attended_signups(user, study=None, start_date=None, end_date=None):
+    """Attended signups ``user`` may grant credit for, by study and/or session date."""
+    signups = Signup.objects.filter(status='attended', timeslot__study__credit_value__gt=0)
+    if not user.is_admin:
+        signups = signups.filter(timeslot__study__researcher=user)
+    if study is not None:
+        signups = signups.filter(timeslot__study=study)
+    if start_date:
+        signups = signups.filter(timeslot__starts_at__date__gte=start_date)
+    if end_date:
+        signups = signups.filter(timeslot__starts_at__date__lte=end_date)
+    return signups
+
+
+def resolve_courses(participant_ids):
+    """
+    {participant_id: course_id} credit allocation. Each participant gets the
+    earliest-enrolled active course that still needs credits, or their most
+    recent active enrollment if all are complete. Participants with no
+    active enrollment are left out and receive credit without a course.
+    """
+    enrollments = (
+        Enrollment.objects.filter(participant_id__in=participant_ids, course__is_active=True)
+        .with_credits()
+        .order_by('enrolled_at', 'course__code')
+        .values_list('participant_id', 'course_id', 'credits_total', 'course__credits_required')
+    )
+    allocation, needs_credit = {}, set()
+    for participant_id, course_id, earned, required in enrollments:
+        if participant_id in needs_credit:
+            continue
+        allocation[participant_id] = course_id
+        if earned < required:
+            needs_credit.add(participant_id)
+    return allocation
+
+
+def preview(signups):
+    """[(signup, course or None, already_granted)] for the grant confirmation page."""
+    granted = CreditTransaction.objects.filter(signup=OuterRef('pk'), amount__gt=0)
+    rows = list(
+        signups.annotate(already_granted=Exists(granted))
+        .select_related('participant', 'timeslot__study')
+        .order_by('timeslot__starts_at', 'participant__last_name')
+    )
+    allocation = resolve_courses({signup.participant_id for signup in rows})
+    courses = Course.objects.in_bulk(set(allocation.values()))
+    return [
+        (signup, courses.get(allocation.get(signup.participant_id)), signup.already_granted)
+        for signup in rows
+    ]
+
+
+def grant_for_signups(signups, granted_by, reason='', request=None) -> GrantResult:
+    """Grant each attended signup in ``signups`` its study's credit value, once."""
+    ip_address, user_agent = audit.request_meta(request)
+
+    with transaction.atomic():
+        locked = list(
+            signups.filter(status='attended')
+            .select_related('timeslot__study')
+            .select_for_update(of=('self',))
+        )
+        granted = set(
+            CreditTransaction.objects.filter(signup__in=[signup.pk for signup in locked], amount__gt=0)
+            .values_list('signup_id', flat=True)
+        )
+        pending = [signup for signup in locked if signup.pk not in granted]
+        result = GrantResult(already_granted=[signup.pk for signup in locked if signup.pk in granted])
+        if not pending:
+            return result
+
+        allocation = resolve_courses({signup.participant_id for signup in pending})
+        result.transactions = [
+            CreditTransaction(
+                participant_id=signup.participant_id,
+                study_id=signup.timeslot.study_id,
+                course_id=allocation.get(signup.participant_id),
+                signup=signup,
+                amount=signup.timeslot.study.credit_value,
+                reason=reason or f'Attended {signup.timeslot.study.title}',
+                created_by=granted_by,
+            )
+            for signup in pending
+        ]
+        CreditTransaction.objects.bulk_create(result.transactions, batch_size=500)
+        chain.append(
+            [
+                AuditLog(
+                    actor=granted_by,
+                    action='credit_granted',
+                    entity='credit',
+                    entity_id=credit.id,
+                    ip_address=ip_address,
+                    user_agent=user_agent,
+                    metadata={
+                        'participant_id': str(credit.participant_id),
+                        'amount': str(credit.amount),
+                        'study_id': str(credit.study_id),
+                        'course_id': str(credit.course_id) if credit.course_id else None,
+                        'signup_id': str(credit.signup_id),
+                        'bulk': True,
+                    },
+                )
+                for credit in result.transactions
+            ],
+            batch_size=500,
+        )
+        balances.apply_transactions(result.transactions)
+    return result
@@ -0,0 +1,29 @@
+"""
+Verify (and repair) CreditBalance rows against credit transactions.
+
+    python manage.py rebuild_credit_balances
+    python manage.py rebuild_credit_balances --dry-run
+
+Balances are kept current by the CreditTransaction signals (see
+apps.credits.balances); run this after bulk edits that bypass signals
+(QuerySet.update, raw SQL, data fixes).
+"""
+from django.core.management.base import BaseCommand
+
+from apps.credits import balances
+
+
+class Command(BaseCommand):
+    help = "Recompute per-participant, per-course credit balances from credit transactions."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report drifted balances without fixing them.')
+
+    def handle(self, *args, **options):
+        drift = balances.rebuild(dry_run=options['dry_run'])
+        for participant_id, course_id, stored, actual in drift:
+            self.stdout.write(f"  {participant_id} / {course_id or '-'}: stored {stored}, transactions {actual}")
+        if options['dry_run']:
+            self.stdout.write(f"{len(drift)} balance(s) drifted (dry run).")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Repaired {len(drift)} balance(s)."))
@@ -0,0 +1,44 @@
+"""
+Verify the audit log hash chain (see apps.credits.chain).
+
+    python manage.py verify_audit_chain               # rows since the last checkpoint
+    python manage.py verify_audit_chain --full        # every row and checkpoint
+    python manage.py verify_audit_chain --checkpoint  # verify, then sign a new checkpoint
+
+Exits with an error if any row or checkpoint fails verification.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.credits import chain
+
+
+class Command(BaseCommand):
+    help = "Verify the tamper-evident hash chain over audit_logs."
+
+    def add_arguments(self, parser):
+        mode = parser.add_mutually_exclusive_group()
+        mode.add_argument('--full', action='store_true', help='Verify the whole table, not just rows since the last checkpoint.')
+        mode.add_argument('--checkpoint', action='store_true', help='Sign a checkpoint at the head if verification passes.')
+
+    def handle(self, *args, **options):
+        created = None
+        if options['checkpoint']:
+            result, created = chain.checkpoint()
+        else:
+            result = chain.verify(full=options['full'])
+
+        if result.anchor is not None:
+            self.stdout.write(f"Starting from checkpoint #{result.anchor.seq} ({result.anchor.created_at:%Y-%m-%d %H:%M}).")
+        for problem in result.problems:
+            self.stdout.write(f"  {problem}")
+        if not result.ok:
+            more = result.problem_count - len(result.problems)
+            raise CommandError(
+                f"Audit chain verification failed: {result.problem_count} problem(s)"
+                + (f" ({more} not shown)" if more else "") + f" in {result.rows} row(s)."
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Verified {result.rows} row(s) (#{result.start_seq}-#{result.end_seq}); chain intact."
+        ))
+        if created is not None:
+            self.stdout.write(f"Signed checkpoint #{created.seq}.")
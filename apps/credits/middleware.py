@@ -0,0 +1,36 @@
+"""
+Middleware for credits app.
+"""
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+
+from . import audit
+
+
+class AuditBufferMiddleware:
+    """
+    Collect the request's audit events (apps.credits.audit.record) and write
+    them with one INSERT once the response is built. Must sit above
+    RLSUserContextMiddleware so that the request transaction has committed
+    by the time the batch is flushed.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with audit.batch():
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        state = audit.start_batch()
+        try:
+            return await self.get_response(request)
+        finally:
+            await sync_to_async(audit.flush)(audit.finish_batch(state))
@@ -0,0 +1,70 @@
+# Generated by Django 5.0.9 on 2026-10-19 16:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_balances(apps, schema_editor):
+    CreditTransaction = apps.get_model('credits', 'CreditTransaction')
+    CreditBalance = apps.get_model('credits', 'CreditBalance')
+    totals = (
+        CreditTransaction.objects.order_by()
+        .values('participant_id', 'course_id')
+        .annotate(
+            total_earned=Coalesce(
+                Sum('amount', filter=Q(amount__gt=0)), Value(0),
+                output_field=models.DecimalField(max_digits=8, decimal_places=2),
+            ),
+            total_balance=Sum('amount'),
+        )
+    )
+    CreditBalance.objects.bulk_create(
+        [
+            CreditBalance(
+                participant_id=row['participant_id'], course_id=row['course_id'],
+                earned=row['total_earned'], balance=row['total_balance'],
+            )
+            for row in totals.iterator(chunk_size=2000)
+        ],
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0002_alter_enrollment_options'),
+        ('credits', '0002_irb_audit_logs'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CreditBalance',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('earned', models.DecimalField(decimal_places=2, default=0, help_text='Sum of grants (positive transactions)', max_digits=8)),
+                ('balance', models.DecimalField(decimal_places=2, default=0, help_text='Net sum of grants and revocations', max_digits=8)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('course', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='credit_balances', to='courses.course')),
+                ('participant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='credit_balances', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Credit Balance',
+                'verbose_name_plural': 'Credit Balances',
+                'db_table': 'credit_balances',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='creditbalance',
+            constraint=models.UniqueConstraint(fields=('participant', 'course'), name='credit_balances_participant_course_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='creditbalance',
+            constraint=models.UniqueConstraint(condition=models.Q(('course__isnull', True)), fields=('participant',), name='credit_balances_participant_no_course_uniq'),
+        ),
+        migrations.RunPython(backfill_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.0.9 on 2026-10-19 16:06
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0002_alter_enrollment_options'),
+        ('credits', '0003_credit_balances'),
+        ('studies', '0043_waitlistentry'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='credittransaction',
+            name='signup',
+            field=models.ForeignKey(blank=True, help_text='Attended session this credit was granted for', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='credit_transactions', to='studies.signup'),
+        ),
+        migrations.AddConstraint(
+            model_name='credittransaction',
+            constraint=models.UniqueConstraint(condition=models.Q(('amount__gt', 0)), fields=('signup',), name='credit_transactions_signup_grant_uniq'),
+        ),
+    ]
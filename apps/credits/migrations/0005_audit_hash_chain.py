@@ -0,0 +1,127 @@
+# Generated by Django 5.0.9 on 2026-10-19 18:30
+
+import hashlib
+import json
+import uuid
+from datetime import timezone as dt_timezone
+
+import django.utils.timezone
+from django.db import migrations, models
+
+# Frozen copy of apps.credits.chain's hashing as of this migration; later
+# changes there must not alter what this backfill computes.
+GENESIS = '0' * 64
+
+
+def _uuid(value):
+    return str(uuid.UUID(str(value))) if value else None
+
+
+def row_hash(prev_hash, values):
+    id_, seq, actor_ref, action, entity, entity_id, metadata, ip_address, user_agent, created_at = values
+    canonical = json.dumps(
+        [
+            _uuid(id_), seq, _uuid(actor_ref), action, entity, _uuid(entity_id), metadata,
+            ip_address or None, user_agent or '',
+            created_at.astimezone(dt_timezone.utc).isoformat(timespec='microseconds'),
+        ],
+        sort_keys=True,
+        separators=(',', ':'),
+        ensure_ascii=False,
+    ).encode()
+    return hashlib.sha256(prev_hash.encode() + canonical).hexdigest()
+
+
+def chain_existing_rows(apps, schema_editor):
+    """Link existing audit rows into the chain in (created_at, id) order and set the head."""
+    AuditLog = apps.get_model('credits', 'AuditLog')
+    AuditChainHead = apps.get_model('credits', 'AuditChainHead')
+    rows = AuditLog.objects.order_by('created_at', 'id').values_list(
+        'id', 'actor_id', 'action', 'entity', 'entity_id', 'metadata', 'ip_address', 'user_agent', 'created_at',
+    )
+    seq, prev, batch = 0, GENESIS, []
+    for id_, actor_id, action, entity, entity_id, metadata, ip_address, user_agent, created_at in rows.iterator(
+        chunk_size=2000
+    ):
+        seq += 1
+        hash_ = row_hash(prev, [id_, seq, actor_id, action, entity, entity_id, metadata, ip_address, user_agent, created_at])
+        batch.append(AuditLog(id=id_, seq=seq, actor_ref=actor_id, prev_hash=prev, row_hash=hash_))
+        prev = hash_
+        if len(batch) >= 2000:
+            AuditLog.objects.bulk_update(batch, ['seq', 'actor_ref', 'prev_hash', 'row_hash'])
+            batch = []
+    AuditLog.objects.bulk_update(batch, ['seq', 'actor_ref', 'prev_hash', 'row_hash'])
+    AuditChainHead.objects.update_or_create(pk=1, defaults={'seq': seq, 'row_hash': prev})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('credits', '0004_credit_transaction_signup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditChainHead',
+            fields=[
+                ('id', models.PositiveSmallIntegerField(default=1, editable=False, primary_key=True, serialize=False)),
+                ('seq', models.BigIntegerField(default=0)),
+                ('row_hash', models.CharField(max_length=64)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Audit Chain Head',
+                'db_table': 'audit_chain_head',
+            },
+        ),
+        migrations.CreateModel(
+            name='AuditCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('seq', models.BigIntegerField(unique=True)),
+                ('row_hash', models.CharField(max_length=64)),
+                ('signature', models.CharField(help_text='Signer signature over seq and row_hash', max_length=128)),
+                ('rows_verified', models.BigIntegerField(default=0, help_text='Rows checked since the previous checkpoint')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Audit Checkpoint',
+                'verbose_name_plural': 'Audit Checkpoints',
+                'db_table': 'audit_checkpoints',
+                'ordering': ['-seq'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='auditlog',
+            name='created_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='auditlog',
+            name='seq',
+            field=models.BigIntegerField(db_index=True, editable=False, help_text='Position in the audit hash chain', null=True),
+        ),
+        migrations.AddField(
+            model_name='auditlog',
+            name='actor_ref',
+            field=models.UUIDField(blank=True, editable=False, help_text='Actor id as recorded (kept if the user is later deleted)', null=True),
+        ),
+        migrations.AddField(
+            model_name='auditlog',
+            name='prev_hash',
+            field=models.CharField(default='', editable=False, max_length=64),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='auditlog',
+            name='row_hash',
+            field=models.CharField(default='', editable=False, max_length=64),
+            preserve_default=False,
+        ),
+        migrations.RunPython(chain_existing_rows, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='auditlog',
+            name='seq',
+            field=models.BigIntegerField(db_index=True, editable=False, help_text='Position in the audit hash chain'),
+        ),
+    ]
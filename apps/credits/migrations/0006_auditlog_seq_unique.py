@@ -0,0 +1,18 @@
+# Generated by Django 5.0.9 on 2026-10-19 21:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('credits', '0005_audit_hash_chain'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='auditlog',
+            name='seq',
+            field=models.BigIntegerField(editable=False, help_text='Position in the audit hash chain', unique=True),
+        ),
+    ]
@@ -4,6 +4,7 @@ Credit transaction and ledger models.
 import uuid
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 
 class CreditTransaction(models.Model):
@@ -34,6 +35,15 @@ class CreditTransaction(models.Model):
         related_name='credit_transactions'
     )
     
+    signup = models.ForeignKey(
+        'studies.Signup',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='credit_transactions',
+        help_text="Attended session this credit was granted for"
+    )
+    
     amount = models.DecimalField(
         max_digits=4,
         decimal_places=2,
@@ -61,12 +71,71 @@ class CreditTransaction(models.Model):
             models.Index(fields=['study', '-created_at']),
             models.Index(fields=['course', '-created_at']),
         ]
+        constraints = [
+            # A signup can be granted credit once (revocations may reference it too)
+            models.UniqueConstraint(
+                fields=['signup'],
+                condition=models.Q(amount__gt=0),
+                name='credit_transactions_signup_grant_uniq',
+            ),
+        ]
     
     def __str__(self):
         action = "grant" if self.amount > 0 else "revoke"
         return f"{action.title()} {abs(self.amount)} credits to {self.participant.get_full_name()}"
 
 
+class CreditBalance(models.Model):
+    """
+    Materialized per-participant, per-course credit totals, maintained by
+    apps.credits.balances from CreditTransaction writes. Transactions without
+    a course are totalled in the row with course=NULL.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    participant = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='credit_balances'
+    )
+    course = models.ForeignKey(
+        'courses.Course',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='credit_balances'
+    )
+    earned = models.DecimalField(
+        max_digits=8,
+        decimal_places=2,
+        default=0,
+        help_text="Sum of grants (positive transactions)"
+    )
+    balance = models.DecimalField(
+        max_digits=8,
+        decimal_places=2,
+        default=0,
+        help_text="Net sum of grants and revocations"
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'credit_balances'
+        verbose_name = 'Credit Balance'
+        verbose_name_plural = 'Credit Balances'
+        constraints = [
+            models.UniqueConstraint(fields=['participant', 'course'], name='credit_balances_participant_course_uniq'),
+            models.UniqueConstraint(
+                fields=['participant'],
+                condition=models.Q(course__isnull=True),
+                name='credit_balances_participant_no_course_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.participant_id} / {self.course_id or '-'}: {self.balance}"
+
+
 class AuditLog(models.Model):
     """Audit trail for sensitive operations."""
     
@@ -88,7 +157,19 @@ class AuditLog(models.Model):
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     user_agent = models.TextField(blank=True)
     
-    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    # Set when the entry is built (not at INSERT) so it is part of the chained content
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+    
+    # Hash chain (apps.credits.chain); assigned by chain.append() at insert time
+    seq = models.BigIntegerField(editable=False, unique=True, help_text="Position in the audit hash chain")
+    actor_ref = models.UUIDField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Actor id as recorded (kept if the user is later deleted)"
+    )
+    prev_hash = models.CharField(max_length=64, editable=False)
+    row_hash = models.CharField(max_length=64, editable=False)
     
     class Meta:
         db_table = 'audit_logs'
@@ -106,5 +187,40 @@ class AuditLog(models.Model):
         return f"{actor_name}: {self.action} on {self.entity}"
 
 
+class AuditChainHead(models.Model):
+    """
+    Single row holding the last seq and row_hash of the audit hash chain.
+    chain.append() locks it, so audit inserts are chained in commit order.
+    """
+
+    id = models.PositiveSmallIntegerField(primary_key=True, default=1, editable=False)
+    seq = models.BigIntegerField(default=0)
+    row_hash = models.CharField(max_length=64)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'audit_chain_head'
+        verbose_name = 'Audit Chain Head'
+
+    def __str__(self):
+        return f"#{self.seq} {self.row_hash[:12]}"
 
 
+class AuditCheckpoint(models.Model):
+    """Signed (seq, row_hash) of a verified point in the audit hash chain."""
+
+    id = models.BigAutoField(primary_key=True)
+    seq = models.BigIntegerField(unique=True)
+    row_hash = models.CharField(max_length=64)
+    signature = models.CharField(max_length=128, help_text="Signer signature over seq and row_hash")
+    rows_verified = models.BigIntegerField(default=0, help_text="Rows checked since the previous checkpoint")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'audit_checkpoints'
+        verbose_name = 'Audit Checkpoint'
+        verbose_name_plural = 'Audit Checkpoints'
+        ordering = ['-seq']
+
+    def __str__(self):
+        return f"Checkpoint #{self.seq} ({self.created_at:%Y-%m-%d %H:%M})"
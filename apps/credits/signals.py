@@ -1,17 +1,18 @@
 """
-Signal handlers for credit audit logging.
+Signal handlers for credit audit logging and balance maintenance.
 """
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
 
-from .models import CreditTransaction, AuditLog
+from . import audit, balances
+from .models import CreditBalance, CreditTransaction
 
 
 @receiver(post_save, sender=CreditTransaction)
 def log_credit_granted(sender, instance, created, **kwargs):
     """Log credit grant when a CreditTransaction is created (IRB / 45 CFR 46)."""
     if created:
-        AuditLog.objects.create(
+        audit.record(
             actor=instance.created_by,
             action='credit_granted',
             entity='credit',
@@ -22,3 +23,38 @@ def log_credit_granted(sender, instance, created, **kwargs):
                 'study_id': str(instance.study_id) if instance.study_id else None,
             },
         )
+
+
+@receiver(pre_save, sender=CreditTransaction)
+def remember_credit_balance_key(sender, instance, raw=False, **kwargs):
+    """Keep the stored (participant, course) of an edited transaction for update_credit_balance."""
+    if not raw and not instance._state.adding:
+        instance._balance_key = (
+            CreditTransaction.objects.filter(pk=instance.pk).values_list('participant_id', 'course_id').first()
+        )
+
+
+@receiver(post_save, sender=CreditTransaction)
+def update_credit_balance(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        balances.add_transaction(instance)
+        return
+    keys = {(instance.participant_id, instance.course_id), getattr(instance, '_balance_key', None)}
+    for key in keys - {None}:
+        balances.recompute(*key)
+
+
+@receiver(post_delete, sender=CreditTransaction)
+def remove_credit_balance(sender, instance, **kwargs):
+    balances.remove_transaction(instance)
+
+
+@receiver(pre_delete, sender='courses.Course')
+def move_course_credit_balances(sender, instance, **kwargs):
+    """Deleting a course nulls its transactions' course (SET_NULL); carry their totals over."""
+    for participant_id, earned, balance in (
+        CreditBalance.objects.filter(course=instance).values_list('participant_id', 'earned', 'balance')
+    ):
+        balances.adjust(participant_id, None, earned, balance)
@@ -0,0 +1,37 @@
+"""
+Celery tasks for credits app.
+"""
+import logging
+
+from celery import shared_task
+from django.conf import settings
+
+from config.partitioning import create_future_partitions as _create_future_partitions
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def create_future_partitions():
+    """Create upcoming monthly partitions for partitioned tables (no-op unless on PostgreSQL and partitioned)."""
+    created = _create_future_partitions(months_ahead=settings.PARTITION_MONTHS_AHEAD)
+    return f"Created {len(created)} partitions: {', '.join(created)}" if created else "No partitions needed"
+
+
+@shared_task
+def replay_audit_spool():
+    """Insert audit rows spooled after a failed flush (apps.credits.audit)."""
+    from .audit import replay_spool
+    replayed = replay_spool()
+    return f"Replayed {replayed} spooled audit rows" if replayed else "Audit spool empty"
+
+
+@shared_task
+def checkpoint_audit_chain():
+    """Verify new audit rows and sign a checkpoint of the hash chain (apps.credits.chain)."""
+    from .chain import checkpoint
+    result, created = checkpoint()
+    if not result.ok:
+        logger.error('Audit chain verification failed (%d problems): %s', result.problem_count, result.problems[:10])
+        return f"Audit chain verification FAILED: {result.problem_count} problem(s)"
+    return f"Checkpoint at #{created.seq} ({result.rows} rows verified)" if created else "No new audit rows"
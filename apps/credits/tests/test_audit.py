@@ -0,0 +1,70 @@
+import json
+import os
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.db import DatabaseError, connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.credits import audit
+from apps.credits.models import AuditLog
+
+
+class AuditWriterTests(TestCase):
+    def setUp(self):
+        self.spool = os.path.join(tempfile.mkdtemp(), 'audit_spool.jsonl')
+        override = override_settings(AUDIT_LOG_SPOOL_PATH=self.spool)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def actions(self):
+        return sorted(AuditLog.objects.filter(entity='test').values_list('action', flat=True))
+
+    def test_batch_writes_committed_rows_in_one_insert(self):
+        with CaptureQueriesContext(connection) as ctx:
+            with audit.batch():
+                with self.captureOnCommitCallbacks(execute=True):
+                    for action in ('a', 'b', 'c'):
+                        audit.record(action=action, entity='test')
+                    with self.assertRaises(ValueError), transaction.atomic():
+                        audit.record(action='rolled_back', entity='test')
+                        raise ValueError
+                self.assertEqual(self.actions(), [])
+        self.assertEqual(len([q for q in ctx.captured_queries if q['sql'].startswith('INSERT INTO "audit_logs"')]), 1)
+        self.assertEqual(self.actions(), ['a', 'b', 'c'])
+
+    def test_unbatched_and_strict_rows(self):
+        audit.record(action='strict', entity='test', strict=True)
+        self.assertEqual(self.actions(), ['strict'])
+        with self.captureOnCommitCallbacks(execute=True):
+            audit.record(action='after_commit', entity='test')
+            self.assertEqual(self.actions(), ['strict'])
+        self.assertEqual(self.actions(), ['after_commit', 'strict'])
+
+    def test_failed_flush_is_spooled_and_replayed(self):
+        entry = audit.record(action='spooled', entity='test', metadata={'n': 1})
+        with mock.patch.object(AuditLog.objects, 'bulk_create', side_effect=DatabaseError('down')):
+            audit.flush([entry])
+        with open(self.spool) as spool:
+            self.assertEqual(json.loads(spool.readline())['action'], 'spooled')
+
+        written_at = timezone.now() - timedelta(minutes=5)
+        rows = [json.loads(line) for line in open(self.spool)]
+        rows[0]['created_at'] = written_at.isoformat()
+        with open(self.spool, 'w') as spool:
+            spool.write(json.dumps(rows[0]) + '\n' + json.dumps(rows[0]) + '\n')
+
+        self.assertEqual(audit.replay_spool(), 1)
+        self.assertFalse(os.path.exists(self.spool))
+        row = AuditLog.objects.get(action='spooled')
+        self.assertEqual((row.pk, row.metadata, row.created_at), (entry.pk, {'n': 1}, written_at))
+        self.assertEqual(audit.replay_spool(), 0)
+
+        # A row that made it in before its spool line was replayed is skipped
+        with open(self.spool, 'w') as spool:
+            spool.write(json.dumps(rows[0]) + '\n')
+        self.assertEqual(audit.replay_spool(), 0)
+        self.assertEqual(AuditLog.objects.filter(action='spooled').count(), 1)
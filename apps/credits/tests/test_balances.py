@@ -0,0 +1,93 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from apps.accounts.models import Profile, User
+from apps.courses.models import Course, Enrollment
+from apps.credits.models import CreditBalance, CreditTransaction
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class CreditBalanceTests(TestCase):
+    def setUp(self):
+        self.instructor = User.objects.create_user(
+            email='inst@example.com', password='password123', first_name='In', last_name='Structor', role='instructor',
+        )
+        self.course = Course.objects.create(
+            code='PSYC-101', name='Intro', term='2026-Fall', instructor=self.instructor, credits_required=Decimal('2.00'),
+        )
+        self.participants = [
+            User.objects.create_user(
+                email=f'c{i}@example.com', password='password123', first_name='C', last_name=str(i), role='participant',
+            )
+            for i in range(3)
+        ]
+        for participant in self.participants:
+            Profile.objects.get_or_create(user=participant)
+            Enrollment.objects.create(course=self.course, participant=participant)
+
+    def grant(self, participant, amount, course=None):
+        return CreditTransaction.objects.create(
+            participant=participant, course=course or self.course, amount=Decimal(amount), created_by=self.instructor,
+        )
+
+    def balance(self, participant, course=None):
+        return CreditBalance.objects.filter(participant=participant, course=course or self.course).values_list(
+            'earned', 'balance').first()
+
+    def test_balance_follows_transactions(self):
+        first, second = self.participants[:2]
+        self.grant(first, '1.50')
+        revoke = self.grant(first, '-0.50')
+        self.assertEqual(self.balance(first), (Decimal('1.50'), Decimal('1.00')))
+
+        revoke.amount = Decimal('-0.25')
+        revoke.participant = second
+        revoke.save()
+        self.assertEqual(self.balance(first), (Decimal('1.50'), Decimal('1.50')))
+        self.assertEqual(self.balance(second), (Decimal('0.00'), Decimal('-0.25')))
+
+        revoke.delete()
+        self.assertEqual(self.balance(second), (Decimal('0.00'), Decimal('0.00')))
+
+        enrollment = Enrollment.objects.get(participant=first)
+        self.assertEqual(enrollment.credits_earned(), Decimal('1.50'))
+        self.assertFalse(enrollment.is_complete())
+
+        # Deleting the course keeps the totals, now under course=NULL like the transactions
+        self.course.delete()
+        self.assertEqual(CreditBalance.objects.filter(participant=first).count(), 1)
+        self.assertEqual(CreditBalance.objects.get(participant=first, course=None).balance, Decimal('1.50'))
+
+    def test_rebuild_repairs_drift(self):
+        first, second = self.participants[:2]
+        self.grant(first, '1.00')
+        self.grant(second, '2.00')
+        CreditTransaction.objects.filter(participant=first).update(amount=Decimal('3.00'))
+        CreditBalance.objects.filter(participant=second).delete()
+
+        call_command('rebuild_credit_balances', '--dry-run', stdout=StringIO())
+        self.assertEqual(self.balance(first), (Decimal('1.00'), Decimal('1.00')))
+        call_command('rebuild_credit_balances', stdout=StringIO())
+        self.assertEqual(self.balance(first), (Decimal('3.00'), Decimal('3.00')))
+        self.assertEqual(self.balance(second), (Decimal('2.00'), Decimal('2.00')))
+
+    def test_enrollment_credits_in_one_query(self):
+        self.grant(self.participants[0], '2.00')
+        self.grant(self.participants[1], '0.50')
+        with self.assertNumQueries(1):
+            enrollments = list(Enrollment.objects.filter(course=self.course).select_related('course').with_credits())
+            self.assertEqual(sorted(e.credits_earned() for e in enrollments), [0, Decimal('0.50'), Decimal('2.00')])
+            self.assertEqual(sum(e.is_complete() for e in enrollments), 1)
+
+    def test_my_credits_totals_balances(self):
+        participant = self.participants[0]
+        self.grant(participant, '1.00')
+        CreditTransaction.objects.create(participant=participant, amount=Decimal('0.50'))
+        self.client.force_login(participant)
+        response = self.client.get(reverse('credits:my_credits'))
+        self.assertEqual(response.context['total_credits'], Decimal('1.50'))
+        self.assertEqual(len(response.context['balances']), 2)
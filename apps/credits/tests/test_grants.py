@@ -0,0 +1,103 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.messages import get_messages
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.accounts.models import User
+from apps.courses.models import Course, Enrollment
+from apps.credits import grants
+from apps.credits.models import AuditLog, CreditBalance, CreditTransaction
+from apps.studies.models import Signup, Study, Timeslot
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class BulkGrantTests(TestCase):
+    def setUp(self):
+        self.researcher = User.objects.create_user(
+            email='grant-r@example.com', password='password123', first_name='Res', last_name='R', role='researcher',
+        )
+        self.study = Study.objects.create(
+            title='Lab Study', description='Grant test.', mode='lab', consent_text='Consent.',
+            researcher=self.researcher, credit_value=Decimal('0.50'),
+        )
+        self.old_course, self.course = [
+            Course.objects.create(code=code, name=code, term=term, credits_required=Decimal('0.50'))
+            for code, term in (('PSYC-100', '2026-Spring'), ('PSYC-101', '2026-Fall'))
+        ]
+        start = timezone.now() - timedelta(days=1)
+        timeslot = Timeslot.objects.create(study=self.study, starts_at=start, ends_at=start + timedelta(hours=1), capacity=400)
+        participants = User.objects.bulk_create([
+            User(email=f'g{i:03d}@example.com', first_name='G', last_name=f'{i:03d}', role='participant')
+            for i in range(300)
+        ])
+        Enrollment.objects.bulk_create([Enrollment(course=self.course, participant=p) for p in participants])
+        Enrollment.objects.bulk_create([Enrollment(course=self.old_course, participant=p) for p in participants[:10]])
+        Signup.objects.bulk_create([
+            Signup(timeslot=timeslot, participant=p, consent_text_version='c', status='attended')
+            for p in participants
+        ])
+        self.participants = participants
+
+    def test_grants_in_constant_queries_and_skips_repeats(self):
+        signups = grants.attended_signups(self.researcher, study=self.study)
+        with CaptureQueriesContext(connection) as ctx:
+            result = grants.grant_for_signups(signups, granted_by=self.researcher)
+        # A fixed number of statements; SQLite's parameter limit splits the INSERTs into a few batches
+        self.assertLess(len(ctx.captured_queries), 30)
+        self.assertEqual(len(result.transactions), 300)
+        self.assertEqual(result.participant_count, 300)
+
+        self.assertEqual(AuditLog.objects.filter(action='credit_granted').count(), 300)
+        self.assertEqual(CreditTransaction.objects.filter(course=self.course).count(), 300)
+        balance = CreditBalance.objects.get(participant=self.participants[0], course=self.course)
+        self.assertEqual((balance.earned, balance.balance), (Decimal('0.50'), Decimal('0.50')))
+
+        # The first ten have now completed PSYC-101 and still need PSYC-100
+        self.assertEqual(grants.resolve_courses([self.participants[0].pk]), {self.participants[0].pk: self.old_course.pk})
+
+        again = grants.grant_for_signups(signups, granted_by=self.researcher)
+        self.assertEqual((len(again.transactions), len(again.already_granted)), (0, 300))
+        self.assertEqual(CreditTransaction.objects.count(), 300)
+
+    def test_grant_view_preview_and_selection(self):
+        self.client.force_login(self.researcher)
+        url = reverse('credits:grant')
+        self.assertFalse(self.client.post(url, {'preview': '1'}).context['form'].is_valid())
+
+        today = timezone.localdate()
+        data = {'start_date': today - timedelta(days=7), 'end_date': today}
+        response = self.client.post(url, {**data, 'preview': '1'})
+        self.assertEqual(len(response.context['rows']), 300)
+        self.assertEqual(response.context['grantable_count'], 300)
+
+        chosen = list(Signup.objects.order_by('participant__email').values_list('pk', flat=True)[:5])
+        response = self.client.post(url, {**data, 'grant': '1', 'reason': 'Week 1', 'signups': ['not-a-uuid']})
+        self.assertEqual(response.status_code, 200)  # back to the preview, nothing granted
+        self.assertEqual(
+            [m.message for m in get_messages(response.wsgi_request)],
+            ['Ignored 1 invalid signup id(s).', 'Select at least one signup to grant credit for.'],
+        )
+        self.assertEqual(CreditTransaction.objects.count(), 0)
+
+        # A malformed id is dropped on its own; the rest of the selection is granted
+        response = self.client.post(url, {**data, 'grant': '1', 'reason': 'Week 1', 'signups': chosen[:2] + ['x']})
+        self.assertRedirects(response, url, fetch_redirect_response=False)
+        self.assertEqual(CreditTransaction.objects.count(), 2)
+
+        response = self.client.post(url, {**data, 'grant': '1', 'reason': 'Week 1', 'signups': chosen})
+        self.assertEqual(set(CreditTransaction.objects.values_list('signup_id', flat=True)), set(chosen))
+        self.assertEqual(CreditTransaction.objects.filter(reason='Week 1').count(), 5)
+        response = self.client.post(url, {**data, 'preview': '1'})
+        self.assertEqual(response.context['grantable_count'], 295)
+
+        other = User.objects.create_user(
+            email='grant-o@example.com', password='password123', first_name='O', last_name='R', role='researcher',
+        )
+        self.client.force_login(other)
+        self.client.post(url, {**data, 'grant': '1', 'signups': [str(pk) for pk in chosen]})
+        self.assertEqual(CreditTransaction.objects.count(), 5)
@@ -1,10 +1,15 @@
 """
 Views for credits app.
 """
+import uuid
+
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from .models import CreditTransaction
+
+from . import grants
+from .forms import CreditGrantForm
+from .models import CreditBalance, CreditTransaction
 
 
 @login_required
@@ -18,29 +23,72 @@ def my_credits(request):
         participant=request.user
     ).select_related('study', 'course', 'created_by').order_by('-created_at')
     
-    # Calculate total credits
-    total_credits = sum(t.amount for t in transactions)
+    balances = list(
+        CreditBalance.objects.filter(participant=request.user)
+        .select_related('course')
+        .order_by('course__code')
+    )
+    total_credits = sum(balance.balance for balance in balances)
     
     return render(request, 'credits/my_credits.html', {
         'transactions': transactions,
+        'balances': balances,
         'total_credits': total_credits
     })
 
 
 @login_required
 def grant_credits(request):
-    """Grant credits (researcher/admin)."""
+    """
+    Bulk credit grants (researcher/admin): POST with ``preview`` lists the
+    attended signups for a study and/or session date range with their
+    resolved course; POST with ``grant`` grants the selected ones in one
+    transaction (apps.credits.grants).
+    """
     if not (request.user.is_researcher or request.user.is_admin):
         messages.error(request, 'Access denied.')
         return redirect('home')
     
-    if request.method == 'POST':
-        # TODO: Implement credit granting form
-        messages.success(request, 'Credits granted successfully!')
-        return redirect('studies:researcher_dashboard')
+    form = CreditGrantForm(request.POST or None, user=request.user)
+    rows = None
+    if request.method == 'POST' and form.is_valid():
+        signups = grants.attended_signups(
+            request.user,
+            study=form.cleaned_data['study'],
+            start_date=form.cleaned_data['start_date'],
+            end_date=form.cleaned_data['end_date'],
+        )
+        if 'grant' in request.POST:
+            selected_ids, invalid = [], 0
+            for value in request.POST.getlist('signups'):
+                try:
+                    selected_ids.append(uuid.UUID(value))
+                except ValueError:
+                    invalid += 1
+            if invalid:
+                messages.warning(request, f'Ignored {invalid} invalid signup id(s).')
+            if not selected_ids:
+                messages.error(request, 'Select at least one signup to grant credit for.')
+            else:
+                result = grants.grant_for_signups(
+                    signups.filter(pk__in=selected_ids),
+                    granted_by=request.user,
+                    reason=form.cleaned_data['reason'],
+                    request=request,
+                )
+                messages.success(
+                    request,
+                    f'Granted {len(result.transactions)} credit(s) to {result.participant_count} participant(s).',
+                )
+                if result.already_granted:
+                    messages.warning(
+                        request, f'{len(result.already_granted)} signup(s) had already been granted credit.'
+                    )
+                return redirect('credits:grant')
+        rows = grants.preview(signups)
     
-    return render(request, 'credits/grant.html')
-
-
-
-
+    return render(request, 'credits/grant.html', {
+        'form': form,
+        'rows': rows,
+        'grantable_count': sum(1 for _, _, already_granted in rows or [] if not already_granted),
+    })
@@ -4,6 +4,7 @@ Views for prescreening app.
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from apps.studies.eligibility import reindex_participant
 from .models import PrescreenQuestion, PrescreenResponse
 
 
@@ -51,6 +52,7 @@ def submit_prescreen(request):
             participant=request.user,
             defaults={'answers': answers}
         )
+        reindex_participant(request.user.pk)
         
         action = 'completed' if created else 'updated'
         messages.success(request, f'Prescreen {action} successfully!')
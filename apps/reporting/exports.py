@@ -0,0 +1,68 @@
+"""
+Streaming CSV exports.
+
+Course credit rows come from one query (enrollment joined to course,
+participant and profile, with credits from CreditBalance via
+Enrollment.with_credits) read with a server-side iterator, and are written
+through a csv writer that buffers ``chunk_rows`` lines per chunk of the
+StreamingHttpResponse. Only non-RLS tables are read, so rows can be
+produced after the request transaction has closed.
+"""
+import csv
+
+from django.http import StreamingHttpResponse
+
+from apps.courses.models import Enrollment
+
+CREDIT_COLUMNS = ['Student ID', 'Name', 'Email', 'Credits Earned', 'Credits Required', 'Status']
+COURSE_COLUMNS = ['Course', 'Section', 'Term']
+
+
+class _Echo:
+    """File-like object whose write() returns the line instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(header, rows, filename, chunk_rows=500):
+    def chunks():
+        writer = csv.writer(_Echo())
+        buffer = [writer.writerow(header)]
+        for row in rows:
+            buffer.append(writer.writerow(row))
+            if len(buffer) >= chunk_rows:
+                yield ''.join(buffer)
+                buffer = []
+        if buffer:
+            yield ''.join(buffer)
+
+    response = StreamingHttpResponse(chunks(), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def credit_rows(courses, with_course=False, chunk_size=2000):
+    """CSV rows (CREDIT_COLUMNS, prefixed by COURSE_COLUMNS if ``with_course``) for ``courses``."""
+    enrollments = (
+        Enrollment.objects.filter(course__in=courses)
+        .with_credits()
+        .order_by('course__code', 'course__section', 'participant__last_name', 'participant__first_name')
+        .values_list(
+            'course__code', 'course__section', 'course__term',
+            'participant__profile__student_id', 'participant__first_name', 'participant__last_name',
+            'participant__email', 'credits_total', 'course__credits_required',
+        )
+    )
+    for code, section, term, student_id, first_name, last_name, email, earned, required in (
+        enrollments.iterator(chunk_size=chunk_size)
+    ):
+        row = [
+            student_id or 'N/A',
+            f"{first_name} {last_name}".strip(),
+            email,
+            f"{earned:.2f}",
+            f"{required:.2f}",
+            'Complete' if earned >= required else 'In Progress',
+        ]
+        yield [code, section, term, *row] if with_course else row
@@ -0,0 +1,65 @@
+"""
+Recompute daily reporting rollups (DailyRollup) for a date range.
+
+    python manage.py refresh_reporting_rollups
+    python manage.py refresh_reporting_rollups --start 2026-08-01 --end 2026-12-31
+
+Without --start, rebuilds from the earliest signup, response or credit
+transaction. The hourly beat task only refreshes the recent window (see
+apps.reporting.rollups); run this after deploying the rollups or after
+editing older data.
+"""
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+from django.utils import timezone
+
+from apps.credits.models import CreditTransaction
+from apps.reporting import rollups
+from apps.studies.models import Response, Timeslot
+
+CHUNK_DAYS = 31
+
+
+class Command(BaseCommand):
+    help = "Rebuild daily reporting rollups for a date range (default: all history)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='First day (YYYY-MM-DD).')
+        parser.add_argument('--end', help='Last day (YYYY-MM-DD).')
+
+    def _parse(self, value):
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            raise CommandError(f"Not a YYYY-MM-DD date: {value}")
+
+    def _earliest(self):
+        candidates = [
+            Timeslot.objects.aggregate(first=Min('starts_at'))['first'],
+            Response.objects.aggregate(first=Min('created_at'))['first'],
+            CreditTransaction.objects.aggregate(first=Min('created_at'))['first'],
+        ]
+        candidates = [timezone.localdate(value) for value in candidates if value]
+        return min(candidates) if candidates else timezone.localdate()
+
+    def handle(self, *args, **options):
+        start = self._parse(options['start']) if options['start'] else self._earliest()
+        if options['end']:
+            end = self._parse(options['end'])
+        else:
+            end = timezone.localdate() + timedelta(days=settings.REPORTING_ROLLUP_LOOKAHEAD_DAYS)
+        if end < start:
+            raise CommandError("--end is before --start.")
+
+        total = 0
+        chunk_start = start
+        while chunk_start <= end:
+            chunk_end = min(chunk_start + timedelta(days=CHUNK_DAYS - 1), end)
+            written = rollups.refresh_days(chunk_start, chunk_end)
+            total += written
+            self.stdout.write(f"  {chunk_start} .. {chunk_end}: {written} rows")
+            chunk_start = chunk_end + timedelta(days=1)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt rollups {start} .. {end}: {total} rows."))
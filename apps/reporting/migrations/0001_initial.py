@@ -0,0 +1,42 @@
+# Generated by Django 5.0.9 on 2026-10-19 16:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('courses', '0002_alter_enrollment_options'),
+        ('studies', '0043_waitlistentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRollup',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('day', models.DateField()),
+                ('term', models.CharField(blank=True, db_index=True, max_length=50)),
+                ('signups', models.PositiveIntegerField(default=0)),
+                ('booked', models.PositiveIntegerField(default=0)),
+                ('attended', models.PositiveIntegerField(default=0)),
+                ('no_shows', models.PositiveIntegerField(default=0)),
+                ('cancelled', models.PositiveIntegerField(default=0)),
+                ('responses', models.PositiveIntegerField(default=0)),
+                ('credit_grants', models.PositiveIntegerField(default=0)),
+                ('credits_granted', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+                ('course', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='courses.course')),
+                ('study', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='studies.study')),
+            ],
+            options={
+                'verbose_name': 'Daily Rollup',
+                'verbose_name_plural': 'Daily Rollups',
+                'db_table': 'reporting_daily_rollups',
+                'indexes': [models.Index(fields=['day'], name='reporting_d_day_f7867c_idx'), models.Index(fields=['study', 'day'], name='reporting_d_study_i_1e370c_idx'), models.Index(fields=['course', 'day'], name='reporting_d_course__a65d62_idx'), models.Index(fields=['term', 'day'], name='reporting_d_term_f0991f_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,58 @@
+"""
+Reporting models.
+"""
+from django.db import models
+
+
+class DailyRollup(models.Model):
+    """
+    Pre-aggregated daily activity, maintained by apps.reporting.rollups.
+
+    One row per (day, study, course). Signups (by their timeslot's day) and
+    responses are counted in the study's course=NULL row; credits are split
+    by the transaction's study and course, with the course's term copied to
+    ``term`` so term dashboards can filter on it.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    day = models.DateField()
+    study = models.ForeignKey(
+        'studies.Study',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='daily_rollups'
+    )
+    course = models.ForeignKey(
+        'courses.Course',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='daily_rollups'
+    )
+    term = models.CharField(max_length=50, blank=True, db_index=True)
+
+    signups = models.PositiveIntegerField(default=0)
+    booked = models.PositiveIntegerField(default=0)
+    attended = models.PositiveIntegerField(default=0)
+    no_shows = models.PositiveIntegerField(default=0)
+    cancelled = models.PositiveIntegerField(default=0)
+    responses = models.PositiveIntegerField(default=0)
+    credit_grants = models.PositiveIntegerField(default=0)
+    credits_granted = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'reporting_daily_rollups'
+        verbose_name = 'Daily Rollup'
+        verbose_name_plural = 'Daily Rollups'
+        indexes = [
+            models.Index(fields=['day']),
+            models.Index(fields=['study', 'day']),
+            models.Index(fields=['course', 'day']),
+            models.Index(fields=['term', 'day']),
+        ]
+
+    def __str__(self):
+        return f"{self.day} study={self.study_id} course={self.course_id}"
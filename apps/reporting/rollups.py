@@ -0,0 +1,122 @@
+"""
+Daily reporting rollups (DailyRollup).
+
+refresh_days(start, end) recomputes every rollup row for the days in
+[start, end] from signups, responses and credit transactions, using one
+grouped query per source, and replaces those rows in one transaction.
+refresh_recent() is the incremental refresh run by the beat task. It only
+covers the days that can still change:
+- the last REPORTING_ROLLUP_LOOKBACK_DAYS, for attendance marking, late
+  grants and responses;
+- the next REPORTING_ROLLUP_LOOKAHEAD_DAYS, for bookings in upcoming
+  sessions.
+Run the refresh_reporting_rollups command for older history.
+"""
+import logging
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.credits.models import CreditTransaction
+from apps.studies.models import Response, Signup
+
+from .models import DailyRollup
+
+logger = logging.getLogger(__name__)
+
+LOCK_KEY = 'reporting:rollup-lock'
+SIGNUP_STATUSES = {'booked': 'booked', 'attended': 'attended', 'no_show': 'no_shows', 'cancelled': 'cancelled'}
+
+
+def _signup_rows(start, end):
+    status_counts = {
+        field: Count('pk', filter=Q(status=status)) for status, field in SIGNUP_STATUSES.items()
+    }
+    return (
+        Signup.objects.filter(timeslot__starts_at__date__range=(start, end))
+        .annotate(day=TruncDate('timeslot__starts_at'))
+        .values('day', 'timeslot__study_id')
+        .annotate(signups=Count('pk'), **status_counts)
+        .order_by()
+    )
+
+
+def _response_rows(start, end):
+    return (
+        Response.objects.filter(created_at__date__range=(start, end))
+        .annotate(day=TruncDate('created_at'))
+        .values('day', 'study_id')
+        .annotate(responses=Count('pk'))
+        .order_by()
+    )
+
+
+def _credit_rows(start, end):
+    return (
+        CreditTransaction.objects.filter(created_at__date__range=(start, end))
+        .annotate(day=TruncDate('created_at'))
+        .values('day', 'study_id', 'course_id', 'course__term')
+        .annotate(
+            credit_grants=Count('pk', filter=Q(amount__gt=0)),
+            credits_granted=Sum('amount', filter=Q(amount__gt=0)),
+        )
+        .order_by()
+    )
+
+
+def build_rollups(start, end):
+    """Unsaved DailyRollup rows for the days in [start, end]."""
+    rows = {}
+
+    def row(day, study_id, course_id=None, term=''):
+        key = (day, study_id, course_id)
+        if key not in rows:
+            rows[key] = DailyRollup(day=day, study_id=study_id, course_id=course_id, term=term or '')
+        return rows[key]
+
+    for values in _signup_rows(start, end):
+        rollup = row(values['day'], values['timeslot__study_id'])
+        rollup.signups = values['signups']
+        for field in SIGNUP_STATUSES.values():
+            setattr(rollup, field, values[field])
+    for values in _response_rows(start, end):
+        row(values['day'], values['study_id']).responses = values['responses']
+    for values in _credit_rows(start, end):
+        if not values['credit_grants']:
+            continue  # revocations only
+        rollup = row(values['day'], values['study_id'], values['course_id'], values['course__term'])
+        rollup.credit_grants = values['credit_grants']
+        rollup.credits_granted = values['credits_granted'] or Decimal('0')
+    return list(rows.values())
+
+
+def refresh_days(start, end):
+    """Replace the rollups for [start, end]; returns the number of rows written."""
+    rollups = build_rollups(start, end)
+    with transaction.atomic():
+        DailyRollup.objects.filter(day__range=(start, end)).delete()
+        DailyRollup.objects.bulk_create(rollups, batch_size=1000)
+    return len(rollups)
+
+
+def refresh_recent(today=None):
+    """
+    Incremental refresh of the window that can still change. Returns the
+    number of rows written, or None if another refresh holds the lock.
+    """
+    today = today or timezone.localdate()
+    start = today - timedelta(days=settings.REPORTING_ROLLUP_LOOKBACK_DAYS)
+    end = today + timedelta(days=settings.REPORTING_ROLLUP_LOOKAHEAD_DAYS)
+    if not cache.add(LOCK_KEY, 1, timeout=30 * 60):
+        logger.info('Rollup refresh already running; skipping')
+        return None
+    try:
+        return refresh_days(start, end)
+    finally:
+        cache.delete(LOCK_KEY)
@@ -0,0 +1,15 @@
+"""
+Celery tasks for reporting app.
+"""
+from celery import shared_task
+
+from . import rollups
+
+
+@shared_task
+def refresh_daily_rollups():
+    """Recompute the daily rollups for the recent window (apps.reporting.rollups)."""
+    written = rollups.refresh_recent()
+    if written is None:
+        return "Rollup refresh already running"
+    return f"Refreshed {written} rollup rows"
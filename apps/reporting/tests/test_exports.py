@@ -0,0 +1,95 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.db import DatabaseError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.accounts.models import Profile, User
+from apps.courses.models import Course, Enrollment
+from apps.credits.models import AuditLog, CreditTransaction
+
+
+@override_settings(
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+    COMPLIANCE_WARNINGS_ENABLED=True,
+    COMPLIANCE_REQUIRE_HITL_FOR_EXPORT=True,
+)
+class CreditExportTests(TestCase):
+    def setUp(self):
+        self.instructor, self.other_instructor = [
+            User.objects.create_user(
+                email=f'{name}@example.com', password='password123', first_name=name, last_name='I', role='instructor',
+            )
+            for name in ('inst', 'other')
+        ]
+        self.course, self.second, self.foreign = [
+            Course.objects.create(
+                code=code, name=code, term='2026-Fall', instructor=instructor, credits_required=Decimal('2.00'),
+            )
+            for code, instructor in (
+                ('PSYC-101', self.instructor), ('PSYC-201', self.instructor), ('BIOL-101', self.other_instructor),
+            )
+        ]
+        for i in range(30):
+            participant = User.objects.create_user(
+                email=f's{i:02d}@example.com', password='password123', first_name='S', last_name=f'{i:02d}',
+                role='participant',
+            )
+            profile, _ = Profile.objects.get_or_create(user=participant)
+            profile.student_id = f'W{i:04d}'
+            profile.save()
+            for course in (self.course, self.second, self.foreign):
+                Enrollment.objects.create(course=course, participant=participant)
+            if i % 3 == 0:
+                CreditTransaction.objects.create(participant=participant, course=self.course, amount=Decimal('2.00'))
+
+    def download(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        return b''.join(response.streaming_content).decode().splitlines()
+
+    def test_course_export_is_gated_and_streams_from_one_query(self):
+        self.client.force_login(self.instructor)
+        url = reverse('reporting:course_credits_csv', args=[self.course.pk])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTemplateUsed(self.client.get(url), 'reporting/export_compliance_gate.html')
+        self.assertTrue(AuditLog.objects.filter(action='ferpa_export_blocked', entity_id=self.course.pk).exists())
+
+        with CaptureQueriesContext(connection) as ctx:
+            lines = self.download(url + '?hitl_attest=1')
+        self.assertEqual(len([q for q in ctx.captured_queries if 'course_enrollments' in q['sql']]), 1)
+        self.assertEqual(lines[0], 'Student ID,Name,Email,Credits Earned,Credits Required,Status')
+        self.assertEqual(len(lines), 31)
+        self.assertEqual(lines[1], 'W0000,S 00,s00@example.com,2.00,2.00,Complete')
+        self.assertEqual(lines[2], 'W0001,S 01,s01@example.com,0.00,2.00,In Progress')
+        self.assertTrue(AuditLog.objects.filter(action='ferpa_export', entity_id=self.course.pk).exists())
+
+    def test_term_export_covers_own_courses(self):
+        self.client.force_login(self.instructor)
+        url = reverse('reporting:term_credits_csv', args=['2026-Fall']) + '?hitl_attest=1'
+        lines = self.download(url)
+        self.assertEqual(lines[0].split(',')[:4], ['Course', 'Section', 'Term', 'Student ID'])
+        self.assertEqual(len(lines), 61)
+        self.assertEqual({line.split(',')[0] for line in lines[1:]}, {'PSYC-101', 'PSYC-201'})
+
+        lines = self.download(url + f'&course={self.second.pk}&course={self.foreign.pk}')
+        self.assertEqual({line.split(',')[0] for line in lines[1:]}, {'PSYC-201'})
+        log = AuditLog.objects.filter(action='ferpa_export', entity='course_term').latest('created_at')
+        self.assertEqual(log.metadata['extra']['course_codes'], ['PSYC-201'])
+
+        self.assertEqual(self.client.get(reverse('reporting:term_credits_csv', args=['1999-Fall'])).status_code, 404)
+
+    def test_failed_audit_write_blocks_the_export(self):
+        self.client.force_login(self.instructor)
+        urls = [
+            reverse('reporting:course_credits_csv', args=[self.course.pk]),
+            reverse('reporting:term_credits_csv', args=['2026-Fall']),
+        ]
+        for url in urls:
+            with mock.patch('apps.credits.audit.record', side_effect=DatabaseError('audit down')):
+                response = self.client.get(url + '?hitl_attest=1')
+            self.assertEqual(response.status_code, 503, url)
+            self.assertFalse(response.streaming)
+            self.assertNotIn('s00@example.com', response.content.decode())
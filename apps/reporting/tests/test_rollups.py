@@ -0,0 +1,120 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.accounts.models import User
+from apps.courses.models import Course, Enrollment
+from apps.credits.models import CreditTransaction
+from apps.reporting import rollups
+from apps.reporting.models import DailyRollup
+from apps.studies.models import Response, Signup, Study, Timeslot
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class RollupTests(TestCase):
+    def setUp(self):
+        self.researcher = User.objects.create_user(
+            email='roll-r@example.com', password='password123', first_name='Res', last_name='R', role='researcher',
+        )
+        self.chair = User.objects.create_user(
+            email='roll-a@example.com', password='password123', first_name='Chair', last_name='A', role='admin',
+        )
+        self.study = Study.objects.create(
+            title='Lab Study', description='Rollup test.', mode='lab', consent_text='Consent.',
+            researcher=self.researcher,
+        )
+        self.today = timezone.localdate()
+        self.course = Course.objects.create(
+            code='PSYC-101', name='Intro', term='2026-Fall', credits_required=2,
+            term_starts=self.today - timedelta(days=30), term_ends=self.today + timedelta(days=60),
+        )
+        start = timezone.now() - timedelta(days=1)
+        timeslot = Timeslot.objects.create(study=self.study, starts_at=start, ends_at=start + timedelta(hours=1), capacity=10)
+        statuses = ['attended', 'attended', 'attended', 'no_show', 'cancelled']
+        for i, status in enumerate(statuses):
+            participant = User.objects.create_user(
+                email=f'roll{i}@example.com', password='password123', first_name='P', last_name=str(i),
+                role='participant',
+            )
+            Enrollment.objects.create(course=self.course, participant=participant)
+            Signup.objects.create(timeslot=timeslot, participant=participant, consent_text_version='c', status=status)
+            if status == 'attended':
+                CreditTransaction.objects.create(
+                    participant=participant, study=self.study, course=self.course, amount=Decimal('1.00'),
+                )
+        Response.objects.create(study=self.study, payload={})
+
+    def test_study_report_counts_in_one_query(self):
+        self.client.force_login(self.researcher)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('reporting:study_report', args=[self.study.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len([q for q in ctx.captured_queries if 'FROM "signups"' in q['sql']]), 1)
+        context = response.context
+        self.assertEqual(
+            (context['total_signups'], context['attended'], context['no_shows'], context['cancelled']), (5, 3, 1, 1),
+        )
+        self.assertEqual(context['attendance_rate'], 60)
+
+    def test_refresh_and_term_dashboard(self):
+        self.assertEqual(rollups.refresh_recent(), 3)
+        study_row = DailyRollup.objects.get(study=self.study, course=None, day=self.today - timedelta(days=1))
+        self.assertEqual((study_row.signups, study_row.attended, study_row.no_shows), (5, 3, 1))
+        credit_row = DailyRollup.objects.get(course=self.course)
+        self.assertEqual((credit_row.term, credit_row.credit_grants, credit_row.credits_granted),
+                         ('2026-Fall', 3, Decimal('3.00')))
+        self.assertEqual(DailyRollup.objects.get(study=self.study, course=None, day=self.today).responses, 1)
+        # Rerunning replaces the window's rows rather than adding to them
+        self.assertEqual(rollups.refresh_recent(), 3)
+        self.assertEqual(DailyRollup.objects.count(), 3)
+
+        self.client.force_login(self.chair)
+        self.assertContains(self.client.get(reverse('reporting:home')), reverse('reporting:term_report', args=['2026-Fall']))
+        response = self.client.get(reverse('reporting:term_report', args=['2026-Fall']))
+        self.assertEqual(response.status_code, 200)
+        course = response.context['courses'][0]
+        self.assertEqual((course.enrolled, course.credit_grants, course.credits_granted), (5, 3, Decimal('3.00')))
+        [study] = response.context['studies']
+        self.assertEqual((study['signups'], study['responses'], study['credits']), (5, 1, Decimal('3.00')))
+        self.assertEqual(study['attendance_rate'], 60)
+        self.assertEqual(self.client.get(reverse('reporting:term_report', args=['1999-Fall'])).status_code, 404)
+
+    def test_term_dashboard_counts_study_activity_within_the_term(self):
+        rollups.refresh_recent()
+        spring = Course.objects.create(
+            code='PSYC-101', name='Intro', term='2026-Spring', credits_required=2,
+            term_starts=self.today - timedelta(days=200), term_ends=self.today - timedelta(days=100),
+        )
+        # The same study also ran last term
+        last_term = self.today - timedelta(days=150)
+        DailyRollup.objects.create(day=last_term, study=self.study, signups=7, attended=6, no_shows=1, responses=4)
+        DailyRollup.objects.create(
+            day=last_term, study=self.study, course=spring, term='2026-Spring', credit_grants=6,
+            credits_granted=Decimal('6.00'),
+        )
+
+        self.client.force_login(self.chair)
+        expected = {'2026-Fall': (5, 3, 1, Decimal('3.00')), '2026-Spring': (7, 6, 4, Decimal('6.00'))}
+        for term, counts in expected.items():
+            [study] = self.client.get(reverse('reporting:term_report', args=[term])).context['studies']
+            self.assertEqual((study['signups'], study['attended'], study['responses'], study['credits']), counts, term)
+
+        # Without term dates the window runs from the term's first to last credit grant
+        Course.objects.filter(term='2026-Spring').update(term_starts=None, term_ends=None)
+        response = self.client.get(reverse('reporting:term_report', args=['2026-Spring']))
+        self.assertEqual(response.context['window'], {'start': last_term, 'end': last_term})
+        self.assertEqual(response.context['studies'][0]['signups'], 7)
+
+    def test_command_rebuilds_history(self):
+        DailyRollup.objects.all().delete()
+        call_command('refresh_reporting_rollups', stdout=StringIO())
+        self.assertEqual(DailyRollup.objects.count(), 3)
+        with self.assertRaises(CommandError):
+            call_command('refresh_reporting_rollups', '--start', '2026-02-01', '--end', '2026-01-01', stdout=StringIO())
@@ -9,6 +9,8 @@ app_name = 'reporting'
 urlpatterns = [
     path('', views.reports_home, name='home'),
     path('course/<uuid:course_id>/credits.csv', views.course_credits_csv, name='course_credits_csv'),
+    path('term/<str:term>/', views.term_report, name='term_report'),
+    path('term/<str:term>/credits.csv', views.term_credits_csv, name='term_credits_csv'),
     path('study/<uuid:study_id>/', views.study_report, name='study_report'),
 ]
 
@@ -1,17 +1,20 @@
 """
 Views for reporting app.
 """
-import csv
 import logging
 from django.shortcuts import render, get_object_or_404, redirect
 
 logger = logging.getLogger(__name__)
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import HttpResponse
-from apps.courses.models import Course, Enrollment
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max, Min, Q, Sum
+from django.http import Http404, HttpResponse
+from apps.courses.models import Course
 from apps.studies.models import Study, Signup
-from apps.credits.models import CreditTransaction
+
+from . import exports
+from .models import DailyRollup
 
 
 @login_required
@@ -21,36 +24,36 @@ def reports_home(request):
         messages.error(request, 'Access denied.')
         return redirect('home')
     
-    return render(request, 'reporting/home.html')
+    terms = []
+    if request.user.is_admin or request.user.is_instructor:
+        courses = Course.objects.all() if request.user.is_admin else Course.objects.filter(instructor=request.user)
+        terms = courses.order_by('-term').values_list('term', flat=True).distinct()
+    
+    return render(request, 'reporting/home.html', {'terms': terms})
 
 
-@login_required
-def course_credits_csv(request, course_id):
-    """Export course credits as CSV. Contains FERPA data; access restricted to instructor/admin."""
+def _ferpa_export_gate(request, *, session_key, entity, entity_id, export_type, export_label, extra,
+                      actor_note, course=None):
+    """
+    Run the FERPA export compliance gate (HITL attestation) and audit the
+    decision. Returns the gate page when the export is blocked or warnings
+    are being previewed, a 503 when the download cannot be logged, otherwise
+    None once the download is logged.
+    """
     from apps.compliance.guardrails import evaluate_ferpa_export
     from apps.compliance.explainability import log_compliance_decision, outcome_from_report
 
-    course = get_object_or_404(Course, pk=course_id)
-    logger.info(
-        'course_credits_csv accessed',
-        extra={'course_id': str(course_id), 'user_id': str(request.user.id)},
-    )
-    # Check permission
-    if not (request.user.is_admin or course.instructor == request.user):
-        messages.error(request, 'Access denied.')
-        return redirect('reporting:home')
-
     hitl_attested = bool(
         request.GET.get('hitl_attest')
         or request.POST.get('hitl_attest')
-        or request.session.get(f'export_hitl_{course_id}')
+        or request.session.get(session_key)
     )
     if request.method == 'POST' and request.POST.get('hitl_attest'):
-        request.session[f'export_hitl_{course_id}'] = True
+        request.session[session_key] = True
         hitl_attested = True
 
     compliance_report = evaluate_ferpa_export(
-        export_type='course_credits_csv',
+        export_type=export_type,
         includes_direct_identifiers=True,
         hitl_attested=hitl_attested,
         destination='download',
@@ -62,58 +65,121 @@ def course_credits_csv(request, course_id):
                 log_compliance_decision(
                     actor=request.user,
                     action='ferpa_export_blocked',
-                    entity='course',
-                    entity_id=course.id,
+                    entity=entity,
+                    entity_id=entity_id,
                     report=compliance_report,
                     outcome='block',
                     request=request,
-                    extra={'course_code': getattr(course, 'code', ''), 'export_type': 'course_credits_csv'},
+                    extra=extra,
                 )
             except Exception:
                 pass
         return render(request, 'reporting/export_compliance_gate.html', {
             'course': course,
             'compliance_report': compliance_report,
-            'export_label': f'Course credits CSV ({course.code})',
+            'export_label': export_label,
         })
 
     try:
         log_compliance_decision(
             actor=request.user,
             action='ferpa_export',
-            entity='course',
-            entity_id=course.id,
+            entity=entity,
+            entity_id=entity_id,
             report=compliance_report,
             outcome=outcome_from_report(compliance_report, proceeded=True),
             request=request,
-            actor_note='Instructor/admin downloaded course credits CSV after HITL attestation.',
-            extra={'course_code': getattr(course, 'code', ''), 'export_type': 'course_credits_csv'},
+            actor_note=actor_note,
+            extra=extra,
+            strict=True,
         )
     except Exception:
-        pass
+        # Direct identifiers only leave once the export is on record
+        logger.exception('%s: audit write failed', export_type)
+        return HttpResponse('Export unavailable. Please try again later.', status=503, content_type='text/plain')
+    return None
 
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="credits_{course.code}_{course.term}.csv"'
-    
-    writer = csv.writer(response)
-    writer.writerow(['Student ID', 'Name', 'Email', 'Credits Earned', 'Credits Required', 'Status'])
-    
-    enrollments = Enrollment.objects.filter(course=course).select_related('participant')
-    
-    for enrollment in enrollments:
-        credits_earned = enrollment.credits_earned()
-        status = 'Complete' if enrollment.is_complete() else 'In Progress'
-        
-        writer.writerow([
-            enrollment.participant.profile.student_id or 'N/A',
-            enrollment.participant.get_full_name(),
-            enrollment.participant.email,
-            f"{credits_earned:.2f}",
-            f"{course.credits_required:.2f}",
-            status
-        ])
-    
-    return response
+
+@login_required
+def course_credits_csv(request, course_id):
+    """Export course credits as CSV. Contains FERPA data; access restricted to instructor/admin."""
+    course = get_object_or_404(Course, pk=course_id)
+    logger.info(
+        'course_credits_csv accessed',
+        extra={'course_id': str(course_id), 'user_id': str(request.user.id)},
+    )
+    # Check permission
+    if not (request.user.is_admin or course.instructor == request.user):
+        messages.error(request, 'Access denied.')
+        return redirect('reporting:home')
+
+    gate = _ferpa_export_gate(
+        request,
+        session_key=f'export_hitl_{course_id}',
+        entity='course',
+        entity_id=course.id,
+        export_type='course_credits_csv',
+        export_label=f'Course credits CSV ({course.code})',
+        extra={'course_code': getattr(course, 'code', ''), 'export_type': 'course_credits_csv'},
+        actor_note='Instructor/admin downloaded course credits CSV after HITL attestation.',
+        course=course,
+    )
+    if gate is not None:
+        return gate
+
+    return exports.stream_csv(
+        exports.CREDIT_COLUMNS,
+        exports.credit_rows([course.pk]),
+        filename=f'credits_{course.code}_{course.term}.csv',
+    )
+
+
+@login_required
+def term_credits_csv(request, term):
+    """
+    Export credits for every course in ``term`` (admins) or the instructor's
+    own courses in it, optionally narrowed with ?course=<id>&course=<id>.
+    Same FERPA gate and row pipeline as course_credits_csv.
+    """
+    logger.info(
+        'term_credits_csv accessed',
+        extra={'term': term, 'user_id': str(request.user.id)},
+    )
+    if not (request.user.is_admin or request.user.is_instructor):
+        messages.error(request, 'Access denied.')
+        return redirect('reporting:home')
+
+    courses = Course.objects.filter(term=term)
+    if not request.user.is_admin:
+        courses = courses.filter(instructor=request.user)
+    course_ids = request.GET.getlist('course')
+    if course_ids:
+        try:
+            courses = courses.filter(pk__in=course_ids)
+        except ValidationError:
+            raise Http404('Invalid course id.')
+    course_codes = sorted(courses.values_list('code', flat=True))
+    if not course_codes:
+        raise Http404('No courses to export.')
+
+    gate = _ferpa_export_gate(
+        request,
+        session_key=f'export_hitl_term_{term}',
+        entity='course_term',
+        entity_id=None,
+        export_type='term_credits_csv',
+        export_label=f'Course credits CSV ({term}, {len(course_codes)} courses)',
+        extra={'term': term, 'course_codes': course_codes, 'export_type': 'term_credits_csv'},
+        actor_note='Instructor/admin downloaded term course credits CSV after HITL attestation.',
+    )
+    if gate is not None:
+        return gate
+
+    return exports.stream_csv(
+        exports.COURSE_COLUMNS + exports.CREDIT_COLUMNS,
+        exports.credit_rows(courses.values('pk'), with_course=True),
+        filename=f'credits_{term}.csv',
+    )
 
 
 @login_required
@@ -126,21 +192,91 @@ def study_report(request, study_id):
         messages.error(request, 'Access denied.')
         return redirect('reporting:home')
     
-    # Calculate statistics
-    total_signups = Signup.objects.filter(timeslot__study=study).count()
-    attended = Signup.objects.filter(timeslot__study=study, status='attended').count()
-    no_shows = Signup.objects.filter(timeslot__study=study, status='no_show').count()
-    cancelled = Signup.objects.filter(timeslot__study=study, status='cancelled').count()
+    # One pass over the study's signups with conditional counts
+    counts = Signup.objects.filter(timeslot__study=study).aggregate(
+        total_signups=Count('pk'),
+        attended=Count('pk', filter=Q(status='attended')),
+        no_shows=Count('pk', filter=Q(status='no_show')),
+        cancelled=Count('pk', filter=Q(status='cancelled')),
+    )
+    total_signups = counts['total_signups']
     
-    attendance_rate = (attended / total_signups * 100) if total_signups > 0 else 0
-    no_show_rate = (no_shows / total_signups * 100) if total_signups > 0 else 0
+    attendance_rate = (counts['attended'] / total_signups * 100) if total_signups > 0 else 0
+    no_show_rate = (counts['no_shows'] / total_signups * 100) if total_signups > 0 else 0
     
     return render(request, 'reporting/study_report.html', {
         'study': study,
-        'total_signups': total_signups,
-        'attended': attended,
-        'no_shows': no_shows,
-        'cancelled': cancelled,
+        **counts,
         'attendance_rate': attendance_rate,
         'no_show_rate': no_show_rate,
     })
+
+
+def _rate(part, total):
+    return (part / total * 100) if total else 0
+
+
+@login_required
+def term_report(request, term):
+    """
+    Term dashboard for department chairs (admins) and instructors (their own
+    courses): credits per course and activity of the studies that granted
+    them, read from the precomputed DailyRollup rows.
+
+    Study activity is counted within the term: from the earliest term_starts
+    to the latest term_ends of the term's courses, or, where those are unset,
+    the first and last day the term's credits were granted.
+    """
+    if not (request.user.is_admin or request.user.is_instructor):
+        messages.error(request, 'Access denied.')
+        return redirect('reporting:home')
+
+    courses = Course.objects.filter(term=term)
+    if not request.user.is_admin:
+        courses = courses.filter(instructor=request.user)
+    courses = list(
+        courses.select_related('instructor').annotate(enrolled=Count('enrollments')).order_by('code', 'section')
+    )
+    if not courses:
+        raise Http404('No courses for this term.')
+
+    term_rollups = DailyRollup.objects.filter(term=term, course__in=courses)
+    credits_by_course = {
+        row['course_id']: row
+        for row in term_rollups.values('course_id').annotate(
+            grants=Sum('credit_grants'), credits=Sum('credits_granted'),
+        ).order_by()
+    }
+    for course in courses:
+        totals = credits_by_course.get(course.pk, {})
+        course.credit_grants = totals.get('grants') or 0
+        course.credits_granted = totals.get('credits') or 0
+
+    window = Course.objects.filter(term=term).aggregate(start=Min('term_starts'), end=Max('term_ends'))
+    granted = DailyRollup.objects.filter(term=term).aggregate(start=Min('day'), end=Max('day'))
+    window = {bound: window[bound] or granted[bound] for bound in ('start', 'end')}
+    in_term = Q(day__range=(window['start'], window['end']))
+    studies = list(
+        DailyRollup.objects.filter(study__in=term_rollups.values('study_id'))
+        .values('study_id', 'study__title')
+        .annotate(
+            signups=Sum('signups', filter=in_term, default=0),
+            attended=Sum('attended', filter=in_term, default=0),
+            no_shows=Sum('no_shows', filter=in_term, default=0),
+            cancelled=Sum('cancelled', filter=in_term, default=0),
+            responses=Sum('responses', filter=in_term, default=0),
+            credits=Sum('credits_granted', filter=Q(term=term, course__in=courses)),
+        )
+        .order_by('study__title')
+    )
+    for study in studies:
+        study['attendance_rate'] = _rate(study['attended'], study['signups'])
+        study['no_show_rate'] = _rate(study['no_shows'], study['signups'])
+
+    return render(request, 'reporting/term_report.html', {
+        'term': term,
+        'courses': courses,
+        'studies': studies,
+        'window': window,
+        'refreshed_at': DailyRollup.objects.aggregate(latest=Max('refreshed_at'))['latest'],
+    })
@@ -10,7 +10,10 @@ from .models import (
     Study,
     Timeslot,
     Signup,
+    SignupReminder,
+    WaitlistEntry,
     Response,
+    AnalysisRun,
     StudyEmailContact,
     StudentDataConsent,
     IRBReview,
@@ -27,6 +30,21 @@ from .models import (
 # ============================================================================
 
 
+class SignupReminderInline(admin.TabularInline):
+    model = SignupReminder
+    extra = 0
+    can_delete = False
+    readonly_fields = ['offset_hours', 'sent_at']
+
+
+class WaitlistEntryInline(admin.TabularInline):
+    model = WaitlistEntry
+    extra = 0
+    fk_name = 'timeslot'
+    raw_id_fields = ['participant', 'signup']
+    readonly_fields = ['created_at', 'resolved_at']
+
+
 class IRBReviewerAssignmentInline(admin.TabularInline):
     model = IRBReviewerAssignment
     extra = 0
@@ -65,11 +83,12 @@ class StudyUpdateInline(admin.StackedInline):
 
 @admin.register(Study)
 class StudyAdmin(admin.ModelAdmin):
-    list_display = ['title', 'slug', 'researcher', 'mode', 'credit_value', 'is_active', 'irb_status', 'irb_approved_by', 'monitoring_enabled', 'collect_emails_for_infographics', 'created_at']
+    list_display = ['title', 'slug', 'researcher', 'mode', 'credit_value', 'is_active', 'irb_status', 'irb_approved_by', 'monitoring_enabled', 'collect_emails_for_infographics', 'signups', 'open_slots', 'responses', 'created_at']
+    list_select_related = ['researcher', 'irb_approved_by']
     list_filter = ['mode', 'is_active', 'is_approved', 'irb_status', 'monitoring_enabled', 'collect_emails_for_infographics', 'created_at']
     search_fields = ['title', 'slug', 'researcher__email', 'researcher__first_name', 'researcher__last_name', 'irb_number']
     raw_id_fields = ['researcher', 'irb_approved_by', 'irb_last_reviewed_by']
-    readonly_fields = ['created_at', 'updated_at', 'current_bf', 'irb_approved_at', 'irb_last_reviewed_at', 'view_audit_trail']
+    readonly_fields = ['created_at', 'updated_at', 'current_bf', 'monitoring_last_evaluated_at', 'irb_approved_at', 'irb_last_reviewed_at', 'view_audit_trail']
     actions = ['approve_studies', 'mark_irb_reviewed']
     inlines = [IRBReviewerAssignmentInline, StudyUpdateInline]
     fieldsets = (
@@ -90,7 +109,7 @@ class StudyAdmin(admin.ModelAdmin):
             'fields': ('osf_enabled', 'osf_project_id', 'osf_link')
         }),
         ('Bayesian Monitoring', {
-            'fields': ('monitoring_enabled', 'min_sample_size', 'bf_threshold', 'analysis_plugin', 'current_bf', 'monitoring_notified', 'run_analysis_on_threshold', 'post_decision_analysis_run_at', 'post_decision_r_script')
+            'fields': ('monitoring_enabled', 'min_sample_size', 'bf_threshold', 'analysis_plugin', 'current_bf', 'monitoring_notified', 'monitoring_last_evaluated_at', 'run_analysis_on_threshold', 'post_decision_analysis_run_at', 'post_decision_r_script')
         }),
         ('Infographic contact', {
             'fields': ('collect_emails_for_infographics',),
@@ -131,6 +150,27 @@ class StudyAdmin(admin.ModelAdmin):
     
     view_audit_trail.short_description = "Audit Trail (Last 10 entries)"
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_browse_stats()
+    
+    def signups(self, obj):
+        return obj.total_signups
+    
+    signups.short_description = 'Signups'
+    signups.admin_order_field = 'signup_total'
+    
+    def open_slots(self, obj):
+        return obj.available_slots
+    
+    open_slots.short_description = 'Open Slots'
+    open_slots.admin_order_field = 'open_slot_total'
+    
+    def responses(self, obj):
+        return obj.response_count
+    
+    responses.short_description = 'Responses'
+    responses.admin_order_field = 'response_total'
+    
     def save_model(self, request, obj, form, change):
         """Track IRB approval when admin saves study."""
         if change:  # Existing study
@@ -179,11 +219,17 @@ class StudyAdmin(admin.ModelAdmin):
 
 @admin.register(Timeslot)
 class TimeslotAdmin(admin.ModelAdmin):
-    list_display = ['study', 'starts_at', 'capacity', 'current_signups', 'is_cancelled']
+    list_display = ['study', 'starts_at', 'capacity', 'active_signup_count', 'is_cancelled']
     list_filter = ['is_cancelled', 'starts_at']
     search_fields = ['study__title']
     raw_id_fields = ['study']
-    readonly_fields = ['created_at', 'updated_at']
+    readonly_fields = ['active_signup_count', 'created_at', 'updated_at']
+    inlines = [WaitlistEntryInline]
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # A capacity increase frees seats for the waitlist
+        obj.promote_waitlist()
 
 
 @admin.register(Signup)
@@ -193,6 +239,16 @@ class SignupAdmin(admin.ModelAdmin):
     search_fields = ['participant__email', 'timeslot__study__title']
     raw_id_fields = ['timeslot', 'participant']
     readonly_fields = ['booked_at', 'consented_at']
+    inlines = [SignupReminderInline]
+
+    def save_model(self, request, obj, form, change):
+        # Admin edits bypass book()/cancel(): recount the affected timeslots.
+        old_timeslot_id = form.initial.get('timeslot') if change else None
+        super().save_model(request, obj, form, change)
+        affected = Timeslot.objects.filter(pk__in={obj.timeslot_id, old_timeslot_id} - {None})
+        affected.recount_signups()
+        for timeslot in affected:
+            timeslot.promote_waitlist()
 
 
 @admin.register(Response)
@@ -217,6 +273,18 @@ class ResponseAdmin(admin.ModelAdmin):
     )
 
 
+@admin.register(AnalysisRun)
+class AnalysisRunAdmin(admin.ModelAdmin):
+    list_display = ['study', 'plugin', 'sample_size', 'bf', 'status', 'duration_ms', 'created_at']
+    list_filter = ['status', 'plugin', 'created_at']
+    search_fields = ['study__title', 'plugin']
+    raw_id_fields = ['study']
+    readonly_fields = ['study', 'plugin', 'sample_size', 'bf', 'status', 'duration_ms', 'compute_ms', 'error', 'created_at']
+
+    def has_add_permission(self, request):
+        return False
+
+
 @admin.register(StudyEmailContact)
 class StudyEmailContactAdmin(admin.ModelAdmin):
     list_display = ['email', 'study', 'created_at', 'session_id']
@@ -1,5 +1,13 @@
 """
 Analysis module for Bayesian monitoring.
-"""
 
+Each plugin is a module exposing ``compute_bf(responses, params) -> float``.
+Plugins that also expose ``simulate_bf(rng, n_sims, max_n, effect_size, params)``
+can be used by the sequential design planner (see ``planner.py``).
+"""
 
+# Plugins shipped with the analysis library (import path -> label).
+ANALYSIS_PLUGINS = {
+    'apps.studies.analysis.placeholder:compute_bf': 'Placeholder (sample-size schedule)',
+    'apps.studies.analysis.normal_mean:compute_bf': 'One-sample normal mean (Gaussian prior on effect size)',
+}
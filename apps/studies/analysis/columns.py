@@ -0,0 +1,110 @@
+"""
+Memory-mapped column files for passing response data to analysis plugins.
+
+A column store is a directory holding one ``.npy`` file per numeric payload key
+(float64, NaN where the key is missing or non-numeric) plus ``_meta.json``.
+Plugin worker processes open the files with ``mmap_mode='r'`` so the data is
+shared through the page cache instead of being pickled through a pipe. Full
+payload rows (``rows.jsonl``) are only written for legacy plugins that need them.
+
+This module is imported by plugin worker subprocesses and must not import Django.
+"""
+import json
+import math
+import os
+import shutil
+import tempfile
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+META_FILE = '_meta.json'
+ROWS_FILE = 'rows.jsonl'
+
+
+def _default_dir() -> Optional[str]:
+    # /dev/shm is RAM-backed on Linux, so column files never touch disk there.
+    return '/dev/shm' if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK) else None
+
+
+def _numeric(value) -> float:
+    if isinstance(value, bool):
+        return 1.0 if value else 0.0
+    if isinstance(value, (int, float)):
+        return float(value) if math.isfinite(value) else math.nan
+    return math.nan
+
+
+class ColumnStore:
+    """A directory of column files; use as a context manager to remove it afterwards."""
+
+    def __init__(self, path: str, n: int, columns: List[str]):
+        self.path = path
+        self.n = n
+        self.columns = columns
+        self._payloads = None
+
+    @classmethod
+    def from_payloads(cls, payloads: Iterable[Dict[str, Any]], directory: Optional[str] = None) -> 'ColumnStore':
+        """Write numeric columns for ``payloads`` (an iterable of dicts) to a new temp directory."""
+        payloads = list(payloads)
+        n = len(payloads)
+        keys: Dict[str, None] = {}
+        for payload in payloads:
+            if isinstance(payload, dict):
+                for key, value in payload.items():
+                    if isinstance(value, (int, float)):
+                        keys.setdefault(str(key), None)
+        columns = list(keys)
+        path = tempfile.mkdtemp(prefix='bfcols-', dir=directory or _default_dir())
+        for index, key in enumerate(columns):
+            data = np.fromiter(
+                (_numeric(p.get(key)) if isinstance(p, dict) else math.nan for p in payloads),
+                dtype=np.float64,
+                count=n,
+            )
+            np.save(os.path.join(path, f'{index}.npy'), data)
+        with open(os.path.join(path, META_FILE), 'w', encoding='utf-8') as f:
+            json.dump({'n': n, 'columns': columns}, f)
+        store = cls(path, n, columns)
+        store._payloads = payloads
+        return store
+
+    def write_rows(self) -> None:
+        """Write full payload rows for plugins that only implement compute_bf(responses, params)."""
+        rows_path = os.path.join(self.path, ROWS_FILE)
+        if os.path.exists(rows_path) or self._payloads is None:
+            return
+        with open(rows_path, 'w', encoding='utf-8') as f:
+            for payload in self._payloads:
+                f.write(json.dumps(payload, ensure_ascii=False, default=str))
+                f.write('\n')
+
+    def cleanup(self) -> None:
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cleanup()
+
+
+def open_columns(path: str):
+    """Return (n, {name: read-only memory-mapped array}) for a column store directory."""
+    with open(os.path.join(path, META_FILE), encoding='utf-8') as f:
+        meta = json.load(f)
+    columns = {
+        name: np.load(os.path.join(path, f'{index}.npy'), mmap_mode='r')
+        for index, name in enumerate(meta['columns'])
+    }
+    return meta['n'], columns
+
+
+def read_rows(path: str):
+    """Return payload dicts from ``rows.jsonl``, or None if the rows were not written."""
+    rows_path = os.path.join(path, ROWS_FILE)
+    if not os.path.exists(rows_path):
+        return None
+    with open(rows_path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
@@ -0,0 +1,228 @@
+"""
+Sandboxed execution of Bayesian analysis plugins.
+
+Plugins run in a small pool of long-lived worker subprocesses
+(``python -m apps.studies.analysis.worker``) so a slow or runaway plugin cannot
+block the Celery worker slot that called it:
+
+- wall-clock limit: a call that does not answer within the timeout is killed;
+- memory limit: the worker's RSS is polled while it runs and it is killed when
+  it exceeds the limit (Linux /proc; not enforced where /proc is unavailable);
+- data is handed over as memory-mapped column files (see ``columns.py``), not
+  as pickled payload lists;
+- each worker keeps its resolved plugins cached, and the pool itself is a
+  per-process singleton, so plugin imports happen once per worker.
+
+Killed workers are replaced on the next call.
+"""
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import queue
+import select
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Optional
+
+from .columns import ColumnStore
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+_POLL_SECONDS = 0.05
+
+
+class PluginExecutionError(Exception):
+    """A plugin failed to load or compute. ``kind`` is load | compute | timeout | memory | crash."""
+
+    def __init__(self, message: str, kind: str = 'compute'):
+        super().__init__(message)
+        self.kind = kind
+
+
+class PluginTimeout(PluginExecutionError):
+    def __init__(self, message: str):
+        super().__init__(message, kind='timeout')
+
+
+class PluginMemoryExceeded(PluginExecutionError):
+    def __init__(self, message: str):
+        super().__init__(message, kind='memory')
+
+
+@dataclass
+class PluginResult:
+    bf: float
+    duration_ms: float
+    compute_ms: float
+
+
+class _Worker:
+    """One plugin worker subprocess speaking line-delimited JSON over stdin/stdout."""
+
+    def __init__(self, cwd: str):
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [cwd, env.get('PYTHONPATH', '')]))
+        self.proc = subprocess.Popen(
+            [sys.executable, '-m', 'apps.studies.analysis.worker'],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            cwd=cwd,
+            env=env,
+        )
+        self._buffer = b''
+
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def rss_bytes(self) -> Optional[int]:
+        try:
+            with open(f'/proc/{self.proc.pid}/statm', 'rb') as f:
+                return int(f.read().split()[1]) * _PAGE_SIZE
+        except (OSError, IndexError, ValueError):
+            return None
+
+    def kill(self) -> None:
+        try:
+            self.proc.kill()
+            self.proc.wait(timeout=5)
+        except Exception:
+            pass
+
+    def request(self, message: Dict[str, Any], timeout: float, max_rss_bytes: Optional[int]) -> Dict[str, Any]:
+        try:
+            self.proc.stdin.write(json.dumps(message).encode() + b'\n')
+            self.proc.stdin.flush()
+        except (BrokenPipeError, OSError) as exc:
+            raise PluginExecutionError(f'Plugin worker is not running: {exc}', kind='crash') from exc
+
+        fd = self.proc.stdout.fileno()
+        deadline = time.monotonic() + timeout
+        while b'\n' not in self._buffer:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise PluginTimeout(f'Plugin exceeded the {timeout:g}s time limit.')
+            ready, _, _ = select.select([fd], [], [], min(_POLL_SECONDS, remaining))
+            if ready:
+                chunk = os.read(fd, 65536)
+                if not chunk:
+                    raise PluginExecutionError('Plugin worker exited unexpectedly.', kind='crash')
+                self._buffer += chunk
+            elif max_rss_bytes:
+                rss = self.rss_bytes()
+                if rss is not None and rss > max_rss_bytes:
+                    raise PluginMemoryExceeded(
+                        f'Plugin exceeded the {max_rss_bytes // (1024 * 1024)} MB memory limit.'
+                    )
+        line, self._buffer = self._buffer.split(b'\n', 1)
+        return json.loads(line)
+
+
+class PluginExecutor:
+    """Pool of plugin worker subprocesses with per-call wall-clock and RSS limits."""
+
+    def __init__(self, size: int = 2, timeout: float = 60.0, max_rss_mb: Optional[int] = 512,
+                 cwd: Optional[str] = None, column_dir: Optional[str] = None):
+        self.size = max(1, size)
+        self.timeout = timeout
+        self.max_rss_bytes = max_rss_mb * 1024 * 1024 if max_rss_mb else None
+        self.cwd = cwd or os.getcwd()
+        self.column_dir = column_dir
+        self._idle: 'queue.LifoQueue[_Worker]' = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._spawned = 0
+
+    def _acquire(self) -> _Worker:
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    if self._spawned < self.size:
+                        try:
+                            worker = _Worker(self.cwd)
+                        except Exception as exc:
+                            raise PluginExecutionError(
+                                f'Could not start a plugin worker: {exc}', kind='crash'
+                            ) from exc
+                        self._spawned += 1
+                        return worker
+                try:
+                    worker = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise PluginExecutionError('no analysis worker available') from None
+            if worker.alive():
+                return worker
+            self._discard(worker)
+
+    def _discard(self, worker: _Worker) -> None:
+        worker.kill()
+        with self._lock:
+            self._spawned -= 1
+
+    def evaluate(self, plugin_path: str, store: ColumnStore, params: Optional[Dict[str, Any]] = None) -> PluginResult:
+        """Run ``plugin_path`` on a column store in a worker subprocess."""
+        message = {'plugin': plugin_path, 'columns': store.path, 'params': params or {}}
+        worker = self._acquire()
+        started = time.perf_counter()
+        try:
+            reply = worker.request(message, self.timeout, self.max_rss_bytes)
+            if not reply.get('ok') and reply.get('kind') == 'need_rows':
+                store.write_rows()
+                remaining = max(0.001, self.timeout - (time.perf_counter() - started))
+                reply = worker.request(message, remaining, self.max_rss_bytes)
+        except PluginExecutionError:
+            self._discard(worker)
+            raise
+        except Exception as exc:
+            self._discard(worker)
+            raise PluginExecutionError(f'Plugin worker protocol error: {exc}', kind='crash') from exc
+        self._idle.put(worker)
+
+        if not reply.get('ok'):
+            raise PluginExecutionError(reply.get('error') or 'Plugin failed.', kind=reply.get('kind') or 'compute')
+        return PluginResult(
+            bf=float(reply['bf']),
+            duration_ms=(time.perf_counter() - started) * 1000.0,
+            compute_ms=float(reply.get('duration_ms') or 0.0),
+        )
+
+    def run(self, plugin_path: str, payloads: Iterable[Dict[str, Any]],
+            params: Optional[Dict[str, Any]] = None) -> PluginResult:
+        """Write ``payloads`` to a temporary column store and evaluate the plugin on it."""
+        with ColumnStore.from_payloads(payloads, directory=self.column_dir) as store:
+            return self.evaluate(plugin_path, store, params)
+
+    def shutdown(self) -> None:
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(worker)
+
+
+_executor: Optional[PluginExecutor] = None
+_executor_pid: Optional[int] = None
+
+
+def get_executor() -> PluginExecutor:
+    """Per-process executor configured from settings (recreated after fork)."""
+    global _executor, _executor_pid
+    if _executor is None or _executor_pid != os.getpid():
+        from django.conf import settings
+
+        _executor = PluginExecutor(
+            size=getattr(settings, 'ANALYSIS_PLUGIN_WORKERS', 2),
+            timeout=getattr(settings, 'ANALYSIS_PLUGIN_TIMEOUT_SECONDS', 60),
+            max_rss_mb=getattr(settings, 'ANALYSIS_PLUGIN_MAX_RSS_MB', 512),
+            cwd=str(settings.BASE_DIR),
+            column_dir=getattr(settings, 'ANALYSIS_COLUMN_DIR', None),
+        )
+        _executor_pid = os.getpid()
+        atexit.register(_executor.shutdown)
+    return _executor
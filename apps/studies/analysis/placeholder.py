@@ -6,6 +6,17 @@ Replace this with your actual Bayesian analysis when ready.
 """
 from typing import Dict, Any, Sequence
 
+import numpy as np
+
+
+def _bf_for_n(n):
+    """Placeholder BF schedule as a function of sample size (works on scalars and arrays)."""
+    return np.select(
+        [n < 20, n < 30, n < 40],
+        [0.5, 3.0, 8.0],
+        default=12.0,
+    )
+
 
 def compute_bf(responses: Sequence[Dict[str, Any]], params: Dict[str, Any]) -> float:
     """
@@ -25,15 +36,24 @@ def compute_bf(responses: Sequence[Dict[str, Any]], params: Dict[str, Any]) -> f
         - Return a float representing BF10
     """
     # TODO: Replace with real Bayesian model
-    # For now, simulate increasing BF as sample size grows
-    n = len(responses)
-    if n < 20:
-        return 0.5  # Weak evidence for H0
-    elif n < 30:
-        return 3.0  # Anecdotal evidence for H1
-    elif n < 40:
-        return 8.0  # Moderate evidence for H1
-    else:
-        return 12.0  # Strong evidence for H1 (exceeds threshold)
+    # For now, simulate increasing BF as sample size grows:
+    # N < 20 -> 0.5, N < 30 -> 3.0, N < 40 -> 8.0, otherwise 12.0
+    return float(_bf_for_n(len(responses)))
+
+
+def compute_bf_columns(columns: Dict[str, np.ndarray], n: int, params: Dict[str, Any]) -> float:
+    """Columnar entry point used by the plugin executor; only the row count matters here."""
+    return float(_bf_for_n(n))
+
+
+def simulate_bf(rng, n_sims: int, max_n: int, effect_size: float, params: Dict[str, Any]) -> np.ndarray:
+    """
+    Simulate BF trajectories for the design planner.
+
+    The placeholder ignores the data, so every trajectory (under H0 and H1)
+    follows the same sample-size schedule.
+    """
+    trajectory = _bf_for_n(np.arange(1, max_n + 1))
+    return np.broadcast_to(trajectory, (n_sims, max_n))
 
 
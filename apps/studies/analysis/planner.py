@@ -0,0 +1,239 @@
+"""
+Sequential design planner for Bayes Factor stopping rules.
+
+Simulates many sequential trajectories under H0 (effect size 0) and H1 (the
+planned effect size) for an analysis plugin, applies the study's stopping rule
+(stop at the first N >= min_n with BF >= threshold, otherwise run to max_n) and
+reports the expected sample size, the distribution of N at stopping and the
+false/true positive rates.
+
+Trajectories are vectorized with NumPy inside each chunk and chunks are spread
+across a process pool. This module avoids Django imports at module level so
+pool workers (spawned processes) only need NumPy and the plugin module.
+"""
+from __future__ import annotations
+
+import hashlib
+import importlib
+import json
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from multiprocessing import get_context
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Trajectories simulated per vectorized chunk (bounds memory to ~chunk * max_n floats).
+CHUNK_SIZE = 500
+PERCENTILES = (5, 25, 50, 75, 95)
+HISTOGRAM_BINS = 20
+
+
+class PlannerError(Exception):
+    """Raised when a plan cannot be simulated (e.g. plugin lacks simulate_bf)."""
+
+
+@dataclass
+class StoppingSummary:
+    """Operating characteristics of the stopping rule under one hypothesis."""
+    hypothesis: str
+    effect_size: float
+    stop_rate: float
+    expected_n: float
+    percentiles: Dict[str, float]
+    histogram: List[Dict[str, float]] = field(default_factory=list)
+
+
+@dataclass
+class DesignPlan:
+    plugin: str
+    params: Dict[str, Any]
+    bf_threshold: float
+    min_n: int
+    max_n: int
+    n_sims: int
+    effect_size: float
+    seed: int
+    h0: StoppingSummary
+    h1: StoppingSummary
+
+    @property
+    def false_positive_rate(self) -> float:
+        return self.h0.stop_rate
+
+    @property
+    def true_positive_rate(self) -> float:
+        return self.h1.stop_rate
+
+    def to_dict(self) -> Dict[str, Any]:
+        d = asdict(self)
+        d['false_positive_rate'] = self.false_positive_rate
+        d['true_positive_rate'] = self.true_positive_rate
+        return d
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'DesignPlan':
+        data = dict(data)
+        data.pop('false_positive_rate', None)
+        data.pop('true_positive_rate', None)
+        data['h0'] = StoppingSummary(**data['h0'])
+        data['h1'] = StoppingSummary(**data['h1'])
+        return cls(**data)
+
+
+def load_simulator(plugin_path: str):
+    """Return the ``simulate_bf`` callable of the plugin module at ``module:func``."""
+    module_path = plugin_path.rsplit(':', 1)[0]
+    try:
+        module = importlib.import_module(module_path)
+    except ImportError as exc:
+        raise PlannerError(f'Cannot import analysis plugin {plugin_path}: {exc}') from exc
+    simulate = getattr(module, 'simulate_bf', None)
+    if simulate is None:
+        raise PlannerError(f'Analysis plugin {plugin_path} does not provide simulate_bf().')
+    return simulate
+
+
+def _simulate_chunk(args) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pool worker: simulate one chunk of trajectories and apply the stopping rule.
+
+    Returns (stop_n, stopped) arrays of length n_sims.
+    """
+    plugin_path, seed_seq, n_sims, max_n, effect_size, params, bf_threshold, min_n = args
+    simulate = load_simulator(plugin_path)
+    rng = np.random.default_rng(seed_seq)
+    bf = simulate(rng, n_sims, max_n, effect_size, params)
+    hit = np.asarray(bf) >= bf_threshold
+    if min_n > 1:
+        hit = hit.copy()
+        hit[:, :min_n - 1] = False
+    stopped = hit.any(axis=1)
+    stop_n = np.where(stopped, hit.argmax(axis=1) + 1, max_n)
+    return stop_n, stopped
+
+
+def _summarize(hypothesis: str, effect_size: float, stop_n: np.ndarray, stopped: np.ndarray,
+               min_n: int, max_n: int) -> StoppingSummary:
+    # Integer bin edges so each bucket is a whole range of sample sizes.
+    edges = np.unique(np.linspace(min_n, max_n + 1, HISTOGRAM_BINS + 1).astype(int))
+    counts, _ = np.histogram(stop_n, bins=edges)
+    total = max(1, len(stop_n))
+    histogram = [
+        {'n_from': int(edges[i]), 'n_to': int(edges[i + 1]) - 1, 'share': float(counts[i]) / total}
+        for i in range(len(counts))
+        if counts[i]
+    ]
+    return StoppingSummary(
+        hypothesis=hypothesis,
+        effect_size=float(effect_size),
+        stop_rate=float(stopped.mean()) if len(stopped) else 0.0,
+        expected_n=float(stop_n.mean()) if len(stop_n) else 0.0,
+        percentiles={f'p{p}': float(v) for p, v in zip(PERCENTILES, np.percentile(stop_n, PERCENTILES))},
+        histogram=histogram,
+    )
+
+
+def simulate_design(
+    plugin_path: str,
+    *,
+    params: Optional[Dict[str, Any]] = None,
+    bf_threshold: float,
+    min_n: int,
+    max_n: int,
+    effect_size: float,
+    n_sims: int = 2000,
+    seed: int = 20240101,
+    workers: int = 1,
+) -> DesignPlan:
+    """
+    Simulate the stopping rule under H0 and H1 and return a DesignPlan.
+
+    With ``workers > 1`` chunks run in a spawned process pool; otherwise inline.
+    """
+    params = params or {}
+    if min_n < 1 or max_n < min_n:
+        raise PlannerError('Require 1 <= min_n <= max_n.')
+    if n_sims < 1:
+        raise PlannerError('n_sims must be positive.')
+    load_simulator(plugin_path)  # fail fast before starting the pool
+
+    chunk_sizes = [CHUNK_SIZE] * (n_sims // CHUNK_SIZE)
+    if n_sims % CHUNK_SIZE:
+        chunk_sizes.append(n_sims % CHUNK_SIZE)
+    seeds = np.random.SeedSequence(seed).spawn(2 * len(chunk_sizes))
+    jobs = []
+    for h_index, h_effect in enumerate((0.0, effect_size)):
+        for c_index, size in enumerate(chunk_sizes):
+            jobs.append((plugin_path, seeds[h_index * len(chunk_sizes) + c_index], size, max_n,
+                         h_effect, params, bf_threshold, min_n))
+
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), mp_context=get_context('spawn')) as pool:
+            results = list(pool.map(_simulate_chunk, jobs))
+    else:
+        results = [_simulate_chunk(job) for job in jobs]
+
+    half = len(chunk_sizes)
+    summaries = []
+    for hypothesis, h_effect, part in (('H0', 0.0, results[:half]), ('H1', effect_size, results[half:])):
+        stop_n = np.concatenate([r[0] for r in part])
+        stopped = np.concatenate([r[1] for r in part])
+        summaries.append(_summarize(hypothesis, h_effect, stop_n, stopped, min_n, max_n))
+
+    return DesignPlan(
+        plugin=plugin_path,
+        params=params,
+        bf_threshold=float(bf_threshold),
+        min_n=int(min_n),
+        max_n=int(max_n),
+        n_sims=int(n_sims),
+        effect_size=float(effect_size),
+        seed=int(seed),
+        h0=summaries[0],
+        h1=summaries[1],
+    )
+
+
+def plan_cache_key(plugin_path: str, params: Dict[str, Any], bf_threshold: float, min_n: int,
+                   max_n: int, effect_size: float, n_sims: int, seed: int) -> str:
+    """Stable cache key for a planner configuration."""
+    raw = json.dumps(
+        [plugin_path, params, float(bf_threshold), int(min_n), int(max_n), float(effect_size), int(n_sims), int(seed)],
+        sort_keys=True,
+        default=str,
+    )
+    return 'bf_design_plan:' + hashlib.sha256(raw.encode()).hexdigest()
+
+
+def get_or_simulate_design(plugin_path: str, *, params=None, bf_threshold: float, min_n: int, max_n: int,
+                           effect_size: float, n_sims: int = 2000, seed: int = 20240101, workers: int = 1,
+                           cache_only: bool = False) -> Optional[DesignPlan]:
+    """
+    Return a cached DesignPlan for this configuration, simulating (and caching) on a miss.
+
+    With ``cache_only=True`` a miss returns None instead of simulating.
+    """
+    from django.conf import settings
+    from django.core.cache import cache
+
+    params = params or {}
+    key = plan_cache_key(plugin_path, params, bf_threshold, min_n, max_n, effect_size, n_sims, seed)
+    cached = cache.get(key)
+    if cached is not None:
+        return DesignPlan.from_dict(cached)
+    if cache_only:
+        return None
+    plan = simulate_design(
+        plugin_path,
+        params=params,
+        bf_threshold=bf_threshold,
+        min_n=min_n,
+        max_n=max_n,
+        effect_size=effect_size,
+        n_sims=n_sims,
+        seed=seed,
+        workers=workers,
+    )
+    cache.set(key, plan.to_dict(), getattr(settings, 'BF_PLANNER_CACHE_SECONDS', 7 * 24 * 3600))
+    return plan
@@ -0,0 +1,80 @@
+"""
+Analysis plugin worker process.
+
+Run as ``python -m apps.studies.analysis.worker``. Reads one JSON request per line
+on stdin and writes one JSON reply per line on stdout:
+
+    request: {"plugin": "module:func", "columns": "/dev/shm/bfcols-...", "params": {...}}
+    reply:   {"ok": true, "bf": 3.2, "duration_ms": 1.7}
+             {"ok": false, "error": "...", "kind": "load" | "compute" | "need_rows"}
+
+Resolved plugins are cached for the lifetime of the process. When the module of
+a ``module:func`` plugin also defines ``func_columns(columns, n, params)`` (e.g.
+``compute_bf_columns`` next to ``compute_bf``), that receives memory-mapped
+column arrays; otherwise ``func(responses, params)`` gets rows read from the store.
+
+Plugins run with stdout redirected to stderr, so print() cannot corrupt a reply.
+This process does not configure Django; plugins must be plain Python/NumPy code.
+"""
+import contextlib
+import importlib
+import json
+import sys
+import time
+
+from apps.studies.analysis.columns import open_columns, read_rows
+
+_plugins = {}
+
+
+def resolve(plugin_path):
+    """Import ``module:func`` once per process; returns (func, columnar variant or None)."""
+    if plugin_path not in _plugins:
+        module_path, func_name = plugin_path.rsplit(':', 1)
+        module = importlib.import_module(module_path)
+        _plugins[plugin_path] = (getattr(module, func_name), getattr(module, f'{func_name}_columns', None))
+    return _plugins[plugin_path]
+
+
+def handle(request):
+    try:
+        compute_bf, columnar = resolve(request['plugin'])
+    except Exception as exc:
+        return {'ok': False, 'kind': 'load', 'error': f'{type(exc).__name__}: {exc}'}
+
+    params = request.get('params') or {}
+    started = time.perf_counter()
+    try:
+        if columnar is not None:
+            n, columns = open_columns(request['columns'])
+            bf = columnar(columns, n, params)
+        else:
+            rows = read_rows(request['columns'])
+            if rows is None:
+                return {'ok': False, 'kind': 'need_rows', 'error': 'Plugin requires payload rows.'}
+            bf = compute_bf(rows, params)
+        bf = float(bf)
+    except MemoryError:
+        return {'ok': False, 'kind': 'memory', 'error': 'Plugin ran out of memory.'}
+    except Exception as exc:
+        return {'ok': False, 'kind': 'compute', 'error': f'{type(exc).__name__}: {exc}'}
+    return {'ok': True, 'bf': bf, 'duration_ms': (time.perf_counter() - started) * 1000.0}
+
+
+def main():
+    # stdout is the reply channel; plugin output (print, progress) goes to stderr instead
+    replies = sys.stdout
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            with contextlib.redirect_stdout(sys.stderr):
+                reply = handle(json.loads(line))
+        except Exception as exc:  # malformed request
+            reply = {'ok': False, 'kind': 'compute', 'error': f'{type(exc).__name__}: {exc}'}
+        replies.write(json.dumps(reply) + '\n')
+        replies.flush()
+
+
+if __name__ == '__main__':
+    main()
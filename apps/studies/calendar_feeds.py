@@ -0,0 +1,189 @@
+"""
+Per-user iCalendar (.ics) feeds.
+
+Participants get their non-cancelled sessions; researchers (and instructors
+and admins) get the timeslots of the studies they own, with signup counts.
+Feed URLs carry a signed token (feed_token) of the user id and the
+profile's calendar_feed_key, so calendar clients can poll without a session.
+rotate_feed_key() replaces the key, which revokes every URL issued before.
+
+Each feed is rendered from a single query (after loading the user) and cached under a per-user version
+key. Signup and timeslot changes bump the version of every affected user
+(bump_feed_versions, called from signals and Signup.cancel), which makes the
+next poll render a fresh feed. The cached entry keeps its ETag and
+Last-Modified, so unchanged polls are answered with 304 without touching the
+database.
+"""
+import hashlib
+import time
+from datetime import timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+
+TOKEN_SALT = 'studies.calendar-feed'
+VERSION_KEY = 'calendar-feed:version:{}'
+FEED_KEY = 'calendar-feed:{}:{}'
+# Sessions that ended longer ago than this are left out of the feed
+HISTORY_DAYS = 90
+
+
+def feed_token(user) -> str:
+    return signing.Signer(salt=TOKEN_SALT).sign(f'{user.pk}:{user.profile.calendar_feed_key}')
+
+
+def parse_token(token):
+    """(user id, feed key) a token was issued for, or None if the signature is invalid."""
+    try:
+        user_id, _, key = signing.Signer(salt=TOKEN_SALT).unsign(token).partition(':')
+    except signing.BadSignature:
+        return None
+    return (user_id, key) if key else None
+
+
+def rotate_feed_key(user):
+    """Give ``user`` a new feed key; URLs built from the old one stop working."""
+    from apps.accounts.models import new_calendar_feed_key
+
+    profile = user.profile
+    profile.calendar_feed_key = new_calendar_feed_key()
+    profile.save(update_fields=['calendar_feed_key', 'updated_at'])
+    bump_feed_versions([user.pk])
+
+
+def feed_version(user_id) -> int:
+    key = VERSION_KEY.format(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_feed_versions(user_ids):
+    """Invalidate the cached feeds of ``user_ids``."""
+    for user_id in {user_id for user_id in user_ids if user_id}:
+        key = VERSION_KEY.format(user_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+
+
+def _escape(value) -> str:
+    return (
+        str(value or '').replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def _stamp(value) -> str:
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def _fold(line: str) -> str:
+    """Fold content lines longer than 75 octets (RFC 5545 section 3.1)."""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line
+    parts, start = [], 0
+    while start < len(encoded):
+        end = min(start + (75 if not parts else 74), len(encoded))
+        while end < len(encoded) and (encoded[end] & 0xC0) == 0x80:
+            end -= 1  # do not split a multi-byte character
+        parts.append(encoded[start:end].decode('utf-8'))
+        start = end
+    return '\r\n '.join(parts)
+
+
+def _calendar(name, events, generated_at) -> str:
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        f'PRODID:-//{_escape(settings.INSTITUTION_NAME)}//{_escape(settings.SITE_NAME)}//EN',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{_escape(name)}',
+    ]
+    host = settings.SITE_URL.split('://')[-1].split('/')[0] or 'localhost'
+    for uid, starts_at, ends_at, summary, location, description in events:
+        lines += [
+            'BEGIN:VEVENT',
+            f'UID:{uid}@{host}',
+            f'DTSTAMP:{_stamp(generated_at)}',
+            f'DTSTART:{_stamp(starts_at)}',
+            f'DTEND:{_stamp(ends_at)}',
+            f'SUMMARY:{_escape(summary)}',
+        ]
+        if location:
+            lines.append(f'LOCATION:{_escape(location)}')
+        if description:
+            lines.append(f'DESCRIPTION:{_escape(description)}')
+        lines.append('END:VEVENT')
+    lines.append('END:VCALENDAR')
+    return '\r\n'.join(_fold(line) for line in lines) + '\r\n'
+
+
+def _participant_events(user_id, since):
+    from .models import Signup
+
+    rows = (
+        Signup.objects.filter(participant_id=user_id, timeslot__ends_at__gte=since, timeslot__is_cancelled=False)
+        .exclude(status='cancelled')
+        .order_by('timeslot__starts_at')
+        .values_list('id', 'timeslot__starts_at', 'timeslot__ends_at', 'timeslot__study__title', 'timeslot__location')
+    )
+    for signup_id, starts_at, ends_at, title, location in rows:
+        cancel_url = f'{settings.SITE_URL}/studies/signup/{signup_id}/cancel/'
+        yield f'signup-{signup_id}', starts_at, ends_at, title, location, f'To cancel: {cancel_url}'
+
+
+def _researcher_events(user_id, since):
+    from .models import Timeslot
+
+    rows = (
+        Timeslot.objects.filter(study__researcher_id=user_id, ends_at__gte=since, is_cancelled=False)
+        .order_by('starts_at')
+        .values_list('id', 'starts_at', 'ends_at', 'study__title', 'location', 'capacity', 'active_signup_count')
+    )
+    for timeslot_id, starts_at, ends_at, title, location, capacity, booked in rows:
+        summary = f'{title} ({booked}/{capacity})'
+        yield f'timeslot-{timeslot_id}', starts_at, ends_at, summary, location, f'{booked} of {capacity} seats booked'
+
+
+def get_feed(user_id, feed_key):
+    """
+    (body, etag, last_modified) for the user's feed, or None for an unknown or
+    inactive user or a ``feed_key`` that is no longer current. Rendered on a
+    cache miss and cached (with the key it was checked against) until the
+    user's feed version is bumped; a hit does not query the database.
+    """
+    from apps.accounts.models import User
+
+    key = FEED_KEY.format(user_id, feed_version(user_id))
+    cached = cache.get(key)
+    if cached is not None:
+        *entry, current_key = cached
+        return tuple(entry) if constant_time_compare(current_key, feed_key) else None
+
+    user = User.objects.filter(pk=user_id, is_active=True).select_related('profile').first()
+    profile = getattr(user, 'profile', None)
+    if profile is None or not constant_time_compare(profile.calendar_feed_key, feed_key):
+        return None
+    now = timezone.now().replace(microsecond=0)
+    since = now - timedelta(days=HISTORY_DAYS)
+    if user.is_researcher or user.is_instructor or user.is_admin or user.is_staff:
+        events = list(_researcher_events(user.pk, since))
+        name = f'{settings.SITE_NAME} - My Timeslots'
+    else:
+        events = list(_participant_events(user.pk, since))
+        name = f'{settings.SITE_NAME} - My Sessions'
+    body = _calendar(name, events, now)
+    # The ETag covers the events, not DTSTAMP, so re-rendering unchanged data still matches
+    digest = hashlib.sha256(repr((name, events)).encode()).hexdigest()[:32]
+    entry = (body, f'"{digest}"', now)
+    cache.set(key, (*entry, profile.calendar_feed_key), timeout=settings.CALENDAR_FEED_CACHE_SECONDS)
+    return entry
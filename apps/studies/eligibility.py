@@ -0,0 +1,325 @@
+"""
+Study eligibility engine.
+
+``Study.eligibility`` rules are compiled once per study version (cached by
+``updated_at``) into a predicate over ParticipantFacts, a flat snapshot of the
+data the rules need. Facts are loaded in bulk with a fixed number of queries,
+so matching one participant against every open study, or every participant
+against one study, never issues per-study or per-participant queries.
+
+Supported rules (all optional, all must hold):
+
+- ``age_min`` / ``age_max``: inclusive bounds on the age from the profile's
+  date of birth; a participant without a date of birth does not qualify.
+- ``languages``: at least one of the listed languages is in the profile.
+- ``courses``: enrolled in at least one course with one of these codes.
+- ``excluded_studies``: no non-cancelled signup for any of these studies
+  (UUIDs or slugs).
+- ``prescreen``: ``{question_id: expected}`` against PrescreenResponse.answers.
+  ``expected`` is a value (equality, or membership for multi-choice answers), a
+  list of accepted values, or ``{"min": ..., "max": ...}`` for numbers.
+
+Unknown keys are ignored. A rule whose bounds are not numbers (``age_min``,
+``age_max``, prescreen ``min``/``max``) is skipped with a warning rather than
+failing every eligibility check.
+
+The EligibleStudy table materializes the result for open (active_approved)
+studies so the study list is a single indexed join. It is updated for one
+participant on prescreen submission, enrollment and signup changes
+(reindex_participant), for one study when its rules or approval change
+(reindex_study), and daily for IRB expirations and birthdays
+(refresh_index). ``manage.py rebuild_eligibility_index`` rebuilds everything.
+"""
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from typing import Callable, Dict, FrozenSet, Iterable, List
+
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+FACTS_CHUNK_SIZE = 2000
+
+# study pk -> (updated_at, predicate)
+_compiled: Dict[object, tuple] = {}
+
+
+@dataclass(frozen=True)
+class ParticipantFacts:
+    user_id: object
+    age: int = None
+    languages: FrozenSet[str] = frozenset()
+    course_codes: FrozenSet[str] = frozenset()
+    # Study ids (as str) and slugs the participant has signed up for
+    studies: FrozenSet[str] = frozenset()
+    answers: dict = field(default_factory=dict)
+
+
+def _age(date_of_birth, today):
+    if not date_of_birth:
+        return None
+    return today.year - date_of_birth.year - ((today.month, today.day) < (date_of_birth.month, date_of_birth.day))
+
+
+def load_facts(user_ids: Iterable) -> Dict[object, ParticipantFacts]:
+    """ParticipantFacts for each user id (four queries regardless of how many users)."""
+    from apps.accounts.models import Profile
+    from apps.courses.models import Enrollment
+    from apps.prescreening.models import PrescreenResponse
+    from .models import Signup
+
+    user_ids = list(user_ids)
+    today = timezone.now().date()
+    profiles = {
+        user_id: (dob, languages)
+        for user_id, dob, languages in Profile.objects.filter(user_id__in=user_ids)
+        .values_list('user_id', 'date_of_birth', 'languages')
+    }
+    courses: Dict[object, set] = {}
+    for user_id, code in Enrollment.objects.filter(participant_id__in=user_ids).values_list('participant_id', 'course__code'):
+        courses.setdefault(user_id, set()).add(code)
+    studies: Dict[object, set] = {}
+    signups = (
+        Signup.objects.filter(participant_id__in=user_ids).exclude(status='cancelled')
+        .values_list('participant_id', 'timeslot__study_id', 'timeslot__study__slug')
+    )
+    for user_id, study_id, slug in signups:
+        studies.setdefault(user_id, set()).update((str(study_id), slug))
+    answers = dict(PrescreenResponse.objects.filter(participant_id__in=user_ids).values_list('participant_id', 'answers'))
+
+    facts = {}
+    for user_id in user_ids:
+        dob, languages = profiles.get(user_id, (None, []))
+        facts[user_id] = ParticipantFacts(
+            user_id=user_id,
+            age=_age(dob, today),
+            languages=frozenset(languages or []),
+            course_codes=frozenset(courses.get(user_id, ())),
+            studies=frozenset(studies.get(user_id, ())),
+            answers=answers.get(user_id) or {},
+        )
+    return facts
+
+
+def _as_set(value) -> FrozenSet[str]:
+    if value in (None, '', []):
+        return frozenset()
+    if isinstance(value, (list, tuple, set)):
+        return frozenset(str(item) for item in value)
+    return frozenset([str(value)])
+
+
+class InvalidRule(ValueError):
+    pass
+
+
+def _bound(value, cast, name):
+    """``value`` coerced with ``cast`` (None stays None); raises InvalidRule."""
+    if value is None:
+        return None
+    try:
+        if isinstance(value, bool):
+            raise TypeError('booleans are not bounds')
+        return cast(value)
+    except (TypeError, ValueError, OverflowError):
+        raise InvalidRule(f'{name} must be a number, not {value!r}')
+
+
+def _answer_check(question_id, expected) -> Callable[[ParticipantFacts], bool]:
+    if isinstance(expected, dict):
+        low = _bound(expected.get('min'), float, f'prescreen[{question_id}].min')
+        high = _bound(expected.get('max'), float, f'prescreen[{question_id}].max')
+
+        def check(facts):
+            try:
+                value = float(facts.answers[question_id])
+            except (KeyError, TypeError, ValueError):
+                return False
+            return (low is None or value >= low) and (high is None or value <= high)
+        return check
+
+    accepted = list(expected) if isinstance(expected, list) else [expected]
+
+    def check(facts):
+        answer = facts.answers.get(question_id)
+        if isinstance(answer, list):
+            return any(item in accepted for item in answer)
+        return answer is not None and answer in accepted
+    return check
+
+
+def compile_rules(rules) -> Callable[[ParticipantFacts], bool]:
+    """Compile an eligibility dict into a predicate over ParticipantFacts; invalid rules are skipped."""
+    rules = rules if isinstance(rules, dict) else {}
+    checks: List[Callable[[ParticipantFacts], bool]] = []
+
+    try:
+        low = _bound(rules.get('age_min'), int, 'age_min')
+        high = _bound(rules.get('age_max'), int, 'age_max')
+    except InvalidRule as exc:
+        logger.warning('Skipping eligibility age rule: %s', exc)
+        low = high = None
+    if low is not None or high is not None:
+        checks.append(lambda f: f.age is not None and (low is None or f.age >= low) and (high is None or f.age <= high))
+
+    languages = _as_set(rules.get('languages'))
+    if languages:
+        checks.append(lambda f: not languages.isdisjoint(f.languages))
+
+    courses = _as_set(rules.get('courses'))
+    if courses:
+        checks.append(lambda f: not courses.isdisjoint(f.course_codes))
+
+    excluded = _as_set(rules.get('excluded_studies'))
+    if excluded:
+        checks.append(lambda f: excluded.isdisjoint(f.studies))
+
+    prescreen = rules.get('prescreen')
+    if isinstance(prescreen, dict):
+        for question_id, expected in prescreen.items():
+            try:
+                checks.append(_answer_check(str(question_id), expected))
+            except InvalidRule as exc:
+                logger.warning('Skipping eligibility prescreen rule: %s', exc)
+
+    if not checks:
+        return lambda facts: True
+    return lambda facts: all(check(facts) for check in checks)
+
+
+def get_predicate(study) -> Callable[[ParticipantFacts], bool]:
+    """Compiled predicate for ``study``, recompiled only when ``study.updated_at`` changes."""
+    cached = _compiled.get(study.pk)
+    if cached is not None and cached[0] == study.updated_at:
+        return cached[1]
+    predicate = compile_rules(study.eligibility)
+    _compiled[study.pk] = (study.updated_at, predicate)
+    return predicate
+
+
+def eligible_studies(user, studies):
+    """The subset of ``studies`` (an iterable of Study) that ``user`` is eligible for, in order."""
+    facts = load_facts([user.pk])[user.pk]
+    return [study for study in studies if get_predicate(study)(facts)]
+
+
+def is_eligible(user, study) -> bool:
+    return get_predicate(study)(load_facts([user.pk])[user.pk])
+
+
+def _candidates(study):
+    """Participant ids that could match ``study``; narrowed in SQL by the course rule."""
+    from apps.accounts.models import User
+
+    candidates = User.objects.filter(role='participant', is_active=True)
+    courses = _as_set((study.eligibility or {}).get('courses') if isinstance(study.eligibility, dict) else None)
+    if courses:
+        candidates = candidates.filter(enrollments__course__code__in=courses).distinct()
+    return candidates.order_by('pk').values_list('pk', flat=True)
+
+
+def eligible_participant_ids(study, chunk_size=FACTS_CHUNK_SIZE):
+    """Yield ids of active participants eligible for ``study``, loading facts a chunk at a time."""
+    predicate = get_predicate(study)
+    candidates = _candidates(study)
+    last = None
+    while True:
+        page = candidates if last is None else candidates.filter(pk__gt=last)
+        user_ids = list(page[:chunk_size])
+        if not user_ids:
+            return
+        for user_id, facts in load_facts(user_ids).items():
+            if predicate(facts):
+                yield user_id
+        last = user_ids[-1]
+
+
+def count_eligible(study, chunk_size=FACTS_CHUNK_SIZE) -> int:
+    """How many active participants are eligible for ``study``."""
+    return sum(1 for _ in eligible_participant_ids(study, chunk_size=chunk_size))
+
+
+# ---------------------------------------------------------------------------
+# Materialized index (EligibleStudy)
+# ---------------------------------------------------------------------------
+
+def _replace_rows(existing, key_field, wanted, make_row):
+    """Make the rows in ``existing`` match ``wanted`` (a set of ``key_field`` values); returns (added, removed)."""
+    from django.db import transaction
+
+    current = set(existing.values_list(key_field, flat=True))
+    stale, missing = current - wanted, wanted - current
+    with transaction.atomic():
+        if stale:
+            existing.filter(**{f'{key_field}__in': stale}).delete()
+        if missing:
+            existing.model.objects.bulk_create(
+                [make_row(key) for key in missing], batch_size=1000, ignore_conflicts=True,
+            )
+    return len(missing), len(stale)
+
+
+def _open_studies():
+    from .models import Study
+
+    return Study.active_approved.only('pk', 'eligibility', 'updated_at')
+
+
+def reindex_participant(user_id):
+    """Rebuild the eligible-study rows for one participant; returns (added, removed)."""
+    from apps.accounts.models import Profile
+    from .models import EligibleStudy
+
+    facts = load_facts([user_id])[user_id]
+    wanted = {study.pk for study in _open_studies() if get_predicate(study)(facts)}
+    result = _replace_rows(
+        EligibleStudy.objects.filter(participant_id=user_id),
+        'study_id',
+        wanted,
+        lambda study_id: EligibleStudy(participant_id=user_id, study_id=study_id),
+    )
+    Profile.objects.filter(user_id=user_id).update(eligibility_indexed_at=timezone.now())
+    return result
+
+
+def reindex_study(study):
+    """Rebuild the eligible-participant rows for one study (cleared if it is not open); returns (added, removed)."""
+    from .models import EligibleStudy, Study
+
+    rows = EligibleStudy.objects.filter(study_id=study.pk)
+    if not Study.active_approved.filter(pk=study.pk).exists():
+        removed, _ = rows.delete()
+        return 0, removed
+    return _replace_rows(
+        rows,
+        'participant_id',
+        set(eligible_participant_ids(study)),
+        lambda user_id: EligibleStudy(participant_id=user_id, study_id=study.pk),
+    )
+
+
+def refresh_index():
+    """
+    Daily maintenance: drop rows for studies that stopped being open without a
+    save (IRB expiration) and re-evaluate studies with age rules (birthdays).
+    Returns (studies reindexed, rows removed for closed studies).
+    """
+    from .models import EligibleStudy, Study
+
+    removed, _ = EligibleStudy.objects.exclude(study__in=Study.active_approved.values('pk')).delete()
+    reindexed = 0
+    for study in _open_studies():
+        rules = study.eligibility if isinstance(study.eligibility, dict) else {}
+        if rules.get('age_min') is not None or rules.get('age_max') is not None:
+            reindex_study(study)
+            reindexed += 1
+    return reindexed, removed
+
+
+def ensure_participant_indexed(user):
+    """Index a participant on first use (accounts created before the index existed)."""
+    profile = getattr(user, 'profile', None)
+    if profile is not None and profile.eligibility_indexed_at is None:
+        reindex_participant(user.pk)
@@ -0,0 +1,90 @@
+"""
+Streaming response exports.
+
+Rows are read in keyset order on ``(created_at, id)``, one bounded page at a
+time, so memory use does not depend on study size and no long-lived cursor is
+held open while the client reads. The keyset doubles as a resume token: a
+client that stores the ``created_at`` and ``id`` of the last row it received
+can continue with ``after=<created_at>|<id>``.
+"""
+import csv
+import json
+import uuid
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from .models import Response
+
+PAGE_SIZE = 2000
+CSV_BASE_COLUMNS = ['response_id', 'session_id', 'created_at']
+
+
+def parse_after(value):
+    """Parse an ``after=<created_at>|<id>`` resume token; raises ValueError if malformed."""
+    created_at, _, response_id = (value or '').partition('|')
+    parsed = parse_datetime(created_at)
+    if parsed is None:
+        raise ValueError('after must look like <ISO created_at>|<response id>')
+    return parsed, uuid.UUID(response_id)
+
+
+def iter_responses(study_id, since=None, after=None, page_size=PAGE_SIZE):
+    """Yield (id, session_id, created_at, payload) for a study in (created_at, id) order."""
+    queryset = Response.objects.filter(study_id=study_id).order_by('created_at', 'id')
+    if since is not None:
+        queryset = queryset.filter(created_at__gte=since)
+    while True:
+        page = queryset
+        if after is not None:
+            created_at, response_id = after
+            page = page.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=response_id))
+        rows = list(page.values_list('id', 'session_id', 'created_at', 'payload')[:page_size])
+        yield from rows
+        if len(rows) < page_size:
+            return
+        after = (rows[-1][2], rows[-1][0])
+
+
+def ndjson_lines(rows):
+    encoder = DjangoJSONEncoder(separators=(',', ':'), ensure_ascii=False)
+    for response_id, session_id, created_at, payload in rows:
+        yield encoder.encode({
+            'id': response_id,
+            'session_id': session_id,
+            'created_at': created_at,
+            'payload': payload,
+        }) + '\n'
+
+
+class _Echo:
+    """File-like object whose write() returns the line, for streaming csv.writer output."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows, fields=None):
+    """
+    CSV rows: response_id, session_id, created_at, then either the requested
+    payload ``fields`` as columns or the whole payload as one JSON column.
+    """
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CSV_BASE_COLUMNS + (list(fields) if fields else ['payload']))
+    for response_id, session_id, created_at, payload in rows:
+        base = [response_id, session_id, created_at.isoformat()]
+        if fields:
+            payload = payload if isinstance(payload, dict) else {}
+            extra = [_csv_value(payload.get(field)) for field in fields]
+        else:
+            extra = [json.dumps(payload, cls=DjangoJSONEncoder, ensure_ascii=False)]
+        yield writer.writerow(base + extra)
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, cls=DjangoJSONEncoder, ensure_ascii=False)
+    return value
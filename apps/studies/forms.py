@@ -2,6 +2,7 @@
 Forms for studies app.
 """
 from django import forms
+from django.core.validators import MaxValueValidator
 from .models import Study, ProtocolSubmission
 
 
@@ -631,3 +632,141 @@ class ProtocolSubmissionForm(forms.ModelForm):
             'suggested_reviewers',
         ]
         # Note: 'use_ai_review' is not a model field, handled separately in view
+
+
+class DesignPlannerForm(forms.Form):
+    """Inputs for the sequential design planner (BF stopping-rule simulation)."""
+
+    plugin = forms.ChoiceField(widget=forms.Select(attrs={'class': 'form-select'}))
+    params = forms.CharField(
+        required=False,
+        initial='{}',
+        widget=forms.TextInput(attrs={'class': 'form-control font-monospace'}),
+        help_text='Plugin parameters as a JSON object, e.g. {"field": "score"}',
+    )
+    bf_threshold = forms.FloatField(min_value=0.1, widget=forms.NumberInput(attrs={'class': 'form-control', 'step': '0.5'}))
+    min_n = forms.IntegerField(min_value=1, label='Minimum N', widget=forms.NumberInput(attrs={'class': 'form-control'}))
+    max_n = forms.IntegerField(min_value=2, max_value=5000, initial=200, label='Maximum N',
+                               widget=forms.NumberInput(attrs={'class': 'form-control'}))
+    effect_size = forms.FloatField(initial=0.5, label='Effect size under H1',
+                                   widget=forms.NumberInput(attrs={'class': 'form-control', 'step': '0.05'}))
+    n_sims = forms.IntegerField(min_value=100, initial=2000, label='Trajectories per hypothesis',
+                                widget=forms.NumberInput(attrs={'class': 'form-control', 'step': '100'}))
+
+    def __init__(self, *args, plugin_choices=(), max_simulations=20000, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['plugin'].choices = list(plugin_choices)
+        self.fields['n_sims'].max_value = max_simulations
+        self.fields['n_sims'].validators.append(MaxValueValidator(max_simulations))
+
+    def clean_params(self):
+        import json
+        raw = (self.cleaned_data.get('params') or '').strip() or '{}'
+        try:
+            params = json.loads(raw)
+        except json.JSONDecodeError:
+            raise forms.ValidationError('Enter a valid JSON object.')
+        if not isinstance(params, dict):
+            raise forms.ValidationError('Enter a valid JSON object.')
+        return params
+
+    def clean(self):
+        cleaned = super().clean()
+        min_n, max_n = cleaned.get('min_n'), cleaned.get('max_n')
+        if min_n and max_n and max_n < min_n:
+            self.add_error('max_n', 'Maximum N must be at least the minimum N.')
+        return cleaned
+
+
+class TimeslotRecurrenceForm(forms.Form):
+    """Weekly recurrence for generating a batch of timeslots (apps.studies.scheduling)."""
+
+    WEEKDAY_CHOICES = [(str(i), name) for i, name in enumerate(
+        ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+    )]
+
+    start_date = forms.DateField(widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}))
+    end_date = forms.DateField(widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}))
+    weekdays = forms.MultipleChoiceField(choices=WEEKDAY_CHOICES, widget=forms.CheckboxSelectMultiple)
+    start_times = forms.CharField(
+        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': '09:00, 13:30'}),
+        help_text='Session start times (24-hour), separated by commas',
+    )
+    exclude_dates = forms.CharField(
+        required=False,
+        widget=forms.Textarea(attrs={'class': 'form-control', 'rows': 2, 'placeholder': '2026-11-26, 2026-11-27'}),
+        help_text='Holidays and other dates to skip (YYYY-MM-DD), separated by commas or new lines',
+    )
+    duration_minutes = forms.IntegerField(
+        min_value=5, max_value=24 * 60, widget=forms.NumberInput(attrs={'class': 'form-control'}),
+    )
+    capacity = forms.IntegerField(min_value=1, initial=1, widget=forms.NumberInput(attrs={'class': 'form-control'}))
+    location = forms.CharField(
+        required=False, max_length=300, widget=forms.TextInput(attrs={'class': 'form-control'}),
+        help_text='Lab room number, building, or Zoom link',
+    )
+    skip_conflicts = forms.BooleanField(
+        required=False, label='Create the non-conflicting slots and skip the rest',
+    )
+
+    def __init__(self, *args, max_slots=1000, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_slots = max_slots
+
+    def clean_start_times(self):
+        from datetime import datetime
+        times = set()
+        for raw in self.cleaned_data['start_times'].replace(';', ',').split(','):
+            raw = raw.strip()
+            if not raw:
+                continue
+            try:
+                times.add(datetime.strptime(raw, '%H:%M').time())
+            except ValueError:
+                raise forms.ValidationError(f'"{raw}" is not a time in HH:MM format.')
+        if not times:
+            raise forms.ValidationError('Enter at least one start time.')
+        return tuple(sorted(times))
+
+    def clean_exclude_dates(self):
+        from datetime import date
+        dates = set()
+        for raw in self.cleaned_data['exclude_dates'].replace('\n', ',').split(','):
+            raw = raw.strip()
+            if not raw:
+                continue
+            try:
+                dates.add(date.fromisoformat(raw))
+            except ValueError:
+                raise forms.ValidationError(f'"{raw}" is not a date in YYYY-MM-DD format.')
+        return frozenset(dates)
+
+    def clean(self):
+        cleaned = super().clean()
+        start, end = cleaned.get('start_date'), cleaned.get('end_date')
+        if start and end and end < start:
+            self.add_error('end_date', 'End date must be on or after the start date.')
+        elif not self.errors:
+            recurrence = self.recurrence()
+            if recurrence.count() == 0:
+                raise forms.ValidationError('This pattern does not produce any timeslots.')
+            if recurrence.count() > self.max_slots:
+                raise forms.ValidationError(
+                    f'This pattern produces {recurrence.count()} timeslots; the limit is {self.max_slots}.'
+                )
+        return cleaned
+
+    def recurrence(self):
+        from datetime import timedelta
+        from .scheduling import TimeslotRecurrence
+        data = self.cleaned_data
+        return TimeslotRecurrence(
+            start_date=data['start_date'],
+            end_date=data['end_date'],
+            weekdays=frozenset(int(day) for day in data['weekdays']),
+            start_times=data['start_times'],
+            duration=timedelta(minutes=data['duration_minutes']),
+            capacity=data['capacity'],
+            location=data.get('location', '').strip(),
+            exclude_dates=data.get('exclude_dates') or frozenset(),
+        )
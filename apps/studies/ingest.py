@@ -0,0 +1,440 @@
+"""
+Buffered protocol response ingestion.
+
+With ``RESPONSE_INGEST_MODE='direct'`` (the default) submit_response inserts one
+Response per request. In the buffered modes the view validates the submission,
+assigns the response id and session id itself, appends the record to a durable
+buffer and answers immediately; the flush_response_buffer task then moves the
+buffer into ``responses`` with ``bulk_create``:
+
+- ``'redis'``: a Redis list (durable when the server runs with AOF). The flusher
+  reads a batch with LRANGE and trims it only after the rows are committed.
+- ``'db'``: the ``response_ingest_buffer`` staging table, which has no indexes
+  besides its primary key and no foreign-key constraint to lock.
+
+Records are written with their pre-assigned ids and ``ignore_conflicts``, so a
+batch that is flushed twice (e.g. the worker died before trimming the buffer)
+does not create duplicates. ``Response.created_at`` is the flush time.
+
+Submissions are idempotent: each carries a submission key (the client's
+Idempotency-Key header / ``submission_key`` query param, or a hash of session_id
+and the canonical payload), unique per study. Retries get the original
+response_id back without a new write.
+
+Offline-collected responses (lab tablets) are uploaded as one gzipped NDJSON
+batch (ingest_batch); rows get the same submission keys, so re-syncing a batch
+only inserts what is new.
+"""
+import hashlib
+import json
+import logging
+import time
+import uuid
+import zlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import BufferedResponse, Response, Study
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY = 'responses:ingest'
+FLUSH_LOCK_KEY = 'responses:ingest:flush-lock'
+FLUSH_LOCK_SECONDS = 300
+FLUSH_TIME_BUDGET_SECONDS = 120
+STUDY_CACHE_KEY = 'studies:submit-target:{}'
+SUBMISSION_CACHE_KEY = 'responses:submission:{}:{}'
+SUBMISSION_CLAIM_SECONDS = 24 * 3600
+_MISSING = 'missing'
+
+BUFFERED_MODES = ('redis', 'db')
+
+
+def ingest_mode() -> str:
+    return getattr(settings, 'RESPONSE_INGEST_MODE', 'direct')
+
+
+def is_buffered() -> bool:
+    return ingest_mode() in BUFFERED_MODES
+
+
+def loads(body):
+    """Parse a JSON request body (orjson when installed). Raises ValueError on invalid JSON."""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def payload_too_large(request) -> bool:
+    """True if the declared Content-Length exceeds RESPONSE_MAX_PAYLOAD_BYTES (checked before reading the body)."""
+    try:
+        length = int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        return False
+    return length > settings.RESPONSE_MAX_PAYLOAD_BYTES
+
+
+def read_body(request):
+    """Read at most RESPONSE_MAX_PAYLOAD_BYTES + 1 bytes (covers chunked bodies without Content-Length)."""
+    return request.read(settings.RESPONSE_MAX_PAYLOAD_BYTES + 1)
+
+
+def study_cache_key(study_id) -> str:
+    return STUDY_CACHE_KEY.format(study_id)
+
+
+def invalidate_study(study_id) -> None:
+    cache.delete(study_cache_key(study_id))
+
+
+def get_submit_study(study_id):
+    """
+    Study.active_approved lookup for response submission, cached for
+    STUDY_LOOKUP_CACHE_SECONDS (misses too). Study saves and deletes invalidate it.
+    Returns None if the study is not accepting responses.
+    """
+    key = study_cache_key(study_id)
+    study = cache.get(key)
+    if study is None:
+        study = Study.active_approved.filter(pk=study_id).first() or _MISSING
+        cache.set(key, study, settings.STUDY_LOOKUP_CACHE_SECONDS)
+    return study if isinstance(study, Study) else None
+
+
+async def aget_submit_study(study_id):
+    """Async variant of get_submit_study."""
+    key = study_cache_key(study_id)
+    study = await cache.aget(key)
+    if study is None:
+        study = await Study.active_approved.filter(pk=study_id).afirst() or _MISSING
+        await cache.aset(key, study, settings.STUDY_LOOKUP_CACHE_SECONDS)
+    return study if isinstance(study, Study) else None
+
+
+def submission_key(request, session_id, payload) -> str:
+    """
+    Idempotency key for a submission: the client-supplied key (hashed if longer
+    than 64 characters), else sha256 of session_id and the canonical payload.
+    ``session_id`` must be the one that will be stored (not None).
+    """
+    client_key = request.headers.get('Idempotency-Key') or request.GET.get('submission_key')
+    return make_submission_key(session_id, payload, client_key)
+
+
+def make_submission_key(session_id, payload, client_key=None) -> str:
+    """submission_key without a request: shared by single and batch submissions."""
+    client_key = (client_key or '').strip()
+    if client_key:
+        return client_key if len(client_key) <= 64 else hashlib.sha256(client_key.encode()).hexdigest()
+    canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+    return hashlib.sha256(f'{session_id}\n{canonical}'.encode()).hexdigest()
+
+
+def find_submission(study_id, key):
+    """The existing response for ``key`` as {'id', 'session_id'}, or None (one unique-index lookup)."""
+    return Response.objects.filter(study_id=study_id, submission_key=key).values('id', 'session_id').first()
+
+
+async def afind_submission(study_id, key):
+    return await Response.objects.filter(study_id=study_id, submission_key=key).values('id', 'session_id').afirst()
+
+
+def claim_submission(record):
+    """
+    Buffered modes: claim the record's submission key before buffering it.
+
+    Returns None if this is the first submission with that key, otherwise the
+    {'id', 'session_id'} of the original (still buffered, or already flushed).
+    The claim is only exclusive across workers with a shared cache, which is why
+    settings refuse the buffered modes without CACHE_URL outside DEBUG.
+    """
+    cache_key = SUBMISSION_CACHE_KEY.format(record['study_id'], record['submission_key'])
+    if not cache.add(cache_key, (record['id'], record['session_id']), SUBMISSION_CLAIM_SECONDS):
+        claimed = cache.get(cache_key)
+        if claimed is not None:
+            return {'id': claimed[0], 'session_id': claimed[1]}
+    return find_submission(record['study_id'], record['submission_key'])
+
+
+def release_submission(record):
+    """Undo claim_submission when the record could not be buffered, so a retry can succeed."""
+    cache.delete(SUBMISSION_CACHE_KEY.format(record['study_id'], record['submission_key']))
+
+
+def build_record(study, payload, session_id=None, ip_address=None, user_agent='', key=None) -> dict:
+    """
+    Validate a submission and return the record to buffer.
+
+    Raises ValueError if ``session_id`` is not a UUID (the direct path would fail
+    at insert time; here the client has already been acknowledged).
+    """
+    session_id = uuid.UUID(str(session_id)) if session_id else uuid.uuid4()
+    return {
+        'id': str(uuid.uuid4()),
+        'study_id': str(study.pk),
+        'session_id': str(session_id),
+        'submission_key': key,
+        'payload': payload,
+        'ip_address': ip_address or None,
+        'user_agent': user_agent or '',
+        'received_at': timezone.now().isoformat(),
+    }
+
+
+class RedisResponseBuffer:
+    # Trimmed only after the batch has committed (at-least-once; ids make re-flushes no-ops).
+    transactional = False
+
+    def __init__(self, url=None, key=REDIS_KEY):
+        import redis
+
+        self.client = redis.Redis.from_url(url or settings.RESPONSE_INGEST_REDIS_URL)
+        self.key = key
+
+    def push(self, record):
+        self.client.rpush(self.key, json.dumps(record, separators=(',', ':')))
+
+    def peek(self, batch_size):
+        raw = self.client.lrange(self.key, 0, batch_size - 1)
+        return [json.loads(item) for item in raw], len(raw)
+
+    def ack(self, token):
+        self.client.ltrim(self.key, token, -1)
+
+    def __len__(self):
+        return self.client.llen(self.key)
+
+
+class DatabaseResponseBuffer:
+    # Staging rows are deleted in the same transaction that inserts the responses.
+    transactional = True
+
+    def push(self, record):
+        BufferedResponse.objects.create(
+            id=record['id'],
+            study_id=record['study_id'],
+            session_id=record['session_id'],
+            submission_key=record.get('submission_key'),
+            payload=record['payload'],
+            ip_address=record['ip_address'],
+            user_agent=record['user_agent'],
+        )
+
+    def peek(self, batch_size):
+        rows = list(
+            BufferedResponse.objects.order_by('received_at')
+            .values('id', 'study_id', 'session_id', 'submission_key', 'payload', 'ip_address', 'user_agent')[:batch_size]
+        )
+        return rows, [row['id'] for row in rows]
+
+    def ack(self, token):
+        BufferedResponse.objects.filter(id__in=token).delete()
+
+    def __len__(self):
+        return BufferedResponse.objects.count()
+
+
+def get_buffer(mode=None):
+    mode = mode or ingest_mode()
+    if mode == 'redis':
+        return RedisResponseBuffer()
+    if mode == 'db':
+        return DatabaseResponseBuffer()
+    raise ValueError(f"RESPONSE_INGEST_MODE={mode!r} does not use a buffer")
+
+
+def write_batch(records):
+    """Insert buffered records into ``responses``; returns the set of study ids written."""
+    study_ids = {str(record['study_id']) for record in records}
+    existing = {str(pk) for pk in Study.objects.filter(pk__in=study_ids).values_list('pk', flat=True)}
+    objs = [
+        Response(
+            id=record['id'],
+            study_id=record['study_id'],
+            session_id=record['session_id'],
+            submission_key=record.get('submission_key'),
+            payload=record['payload'],
+            ip_address=record['ip_address'],
+            user_agent=record['user_agent'],
+        )
+        for record in records
+        if str(record['study_id']) in existing
+    ]
+    if len(objs) < len(records):
+        logger.warning('ingest: dropping %d buffered responses for deleted studies', len(records) - len(objs))
+    Response.objects.bulk_create(objs, batch_size=500, ignore_conflicts=True)
+    return existing
+
+
+def flush(buffer=None, batch_size=None, max_batches=None, time_budget=FLUSH_TIME_BUDGET_SECONDS):
+    """
+    Move buffered responses into ``responses``. Returns (rows flushed, study ids touched).
+
+    Only one flusher runs at a time (cache lock); with CACHE_URL unset the lock is
+    per-process, which is fine for a single beat-driven worker. No new batch is
+    started after ``time_budget`` seconds, so a large backlog is drained over
+    several runs, each finishing well before the lock expires.
+    """
+    buffer = buffer or get_buffer()
+    batch_size = batch_size or settings.RESPONSE_INGEST_BATCH_SIZE
+    if not cache.add(FLUSH_LOCK_KEY, 1, timeout=FLUSH_LOCK_SECONDS):
+        return 0, set()
+    deadline = time.monotonic() + time_budget
+    flushed, touched, batches = 0, set(), 0
+    try:
+        while (max_batches is None or batches < max_batches) and (not batches or time.monotonic() < deadline):
+            records, token = buffer.peek(batch_size)
+            if not records:
+                break
+            with transaction.atomic():
+                touched |= write_batch(records)
+                if buffer.transactional:
+                    buffer.ack(token)
+            if not buffer.transactional:
+                buffer.ack(token)
+            flushed += len(records)
+            batches += 1
+    finally:
+        cache.delete(FLUSH_LOCK_KEY)
+    return flushed, touched
+
+
+class BatchError(ValueError):
+    """The batch body cannot be read any further (bad gzip, oversized line or body, too many lines)."""
+
+
+def iter_batch_lines(stream, max_rows=None, max_line_bytes=None, max_bytes=None):
+    """
+    Yield (line number, raw line) from an NDJSON byte stream, skipping blank lines.
+
+    Lines are read with a length limit, so a compressed body that expands into
+    one enormous line fails fast instead of being decompressed into memory.
+    Blank lines count toward ``max_rows`` and every line toward ``max_bytes``,
+    so a body that decompresses into whitespace is cut off just as early.
+    """
+    max_rows = max_rows or settings.RESPONSE_BATCH_MAX_ROWS
+    max_line_bytes = max_line_bytes or settings.RESPONSE_MAX_PAYLOAD_BYTES
+    max_bytes = max_bytes or settings.RESPONSE_BATCH_MAX_DECOMPRESSED_BYTES
+    line_number = total = 0
+    while True:
+        try:
+            line = stream.readline(max_line_bytes + 1)
+        except (OSError, EOFError, zlib.error) as exc:  # OSError covers gzip.BadGzipFile
+            raise BatchError(f'Unreadable body after line {line_number}: {exc}') from exc
+        if not line:
+            return
+        line_number += 1
+        total += len(line)
+        if len(line) > max_line_bytes:
+            raise BatchError(f'Line {line_number} exceeds {max_line_bytes} bytes')
+        if line_number > max_rows:
+            raise BatchError(f'Batch exceeds {max_rows} lines')
+        if total > max_bytes:
+            raise BatchError(f'Batch exceeds {max_bytes} bytes uncompressed')
+        if not line.strip():
+            continue
+        yield line_number, line
+
+
+def parse_batch_row(line):
+    """Validate one batch line; returns (session_id, payload, client key) or raises ValueError."""
+    try:
+        row = loads(line)
+    except ValueError:
+        raise ValueError('Invalid JSON')
+    if not isinstance(row, dict):
+        raise ValueError('Row must be a JSON object')
+    if 'payload' not in row:
+        raise ValueError('Missing payload')
+    try:
+        session_id = uuid.UUID(str(row['session_id']))
+    except (KeyError, ValueError):
+        raise ValueError('Missing or invalid session_id')
+    client_key = row.get('submission_key')
+    if client_key is not None and not isinstance(client_key, str):
+        raise ValueError('submission_key must be a string')
+    return session_id, row['payload'], client_key
+
+
+def ingest_batch(study, stream, ip_address=None, user_agent='', chunk_size=None):
+    """
+    Insert an NDJSON batch of responses for ``study``.
+
+    Each line is ``{"session_id": ..., "payload": {...}}`` with an optional
+    ``submission_key``; rows are deduplicated on the same submission key as
+    single submissions (so re-uploading a batch is a no-op) and inserted with one
+    bulk_create per ``chunk_size`` rows. Returns (results, created, error):
+    one result per non-blank line, in order, the number of new rows, and the
+    BatchError message if reading stopped early (rows before it are kept).
+    """
+    chunk_size = chunk_size or settings.RESPONSE_INGEST_BATCH_SIZE
+    results, chunk, created, error = [], [], 0, None
+    try:
+        for line_number, line in iter_batch_lines(stream):
+            try:
+                session_id, payload, client_key = parse_batch_row(line)
+            except ValueError as exc:
+                results.append({'line': line_number, 'status': 'error', 'error': str(exc)})
+                continue
+            result = {'line': line_number}
+            results.append(result)
+            chunk.append((result, Response(
+                id=uuid.uuid4(),
+                study_id=study.pk,
+                session_id=session_id,
+                submission_key=make_submission_key(session_id, payload, client_key),
+                payload=payload,
+                ip_address=ip_address or None,
+                user_agent=user_agent or '',
+            )))
+            if len(chunk) >= chunk_size:
+                created += _insert_batch_chunk(study, chunk)
+                chunk = []
+    except BatchError as exc:
+        error = str(exc)
+    if chunk:
+        created += _insert_batch_chunk(study, chunk)
+    return results, created, error
+
+
+def _insert_batch_chunk(study, chunk):
+    """bulk_create the chunk's new submission keys and fill in each row's result; returns rows created."""
+    keys = {obj.submission_key for _, obj in chunk}
+    existing = {
+        key: (pk, session_id)
+        for key, pk, session_id in Response.objects.filter(study_id=study.pk, submission_key__in=keys)
+        .values_list('submission_key', 'id', 'session_id')
+    }
+    pending = {}
+    for _, obj in chunk:
+        if obj.submission_key not in existing and obj.submission_key not in pending:
+            pending[obj.submission_key] = obj
+    if pending:
+        with transaction.atomic():
+            Response.objects.bulk_create(pending.values(), batch_size=500, ignore_conflicts=True)
+        # ignore_conflicts hides rows a concurrent upload inserted first: read back the winners.
+        existing.update(
+            (key, (pk, session_id))
+            for key, pk, session_id in Response.objects.filter(study_id=study.pk, submission_key__in=list(pending))
+            .values_list('submission_key', 'id', 'session_id')
+        )
+
+    created = 0
+    for result, obj in chunk:
+        pk, session_id = existing[obj.submission_key]
+        is_new = pending.get(obj.submission_key) is obj and pk == obj.id
+        created += is_new
+        result.update(
+            status='created' if is_new else 'duplicate',
+            response_id=str(pk),
+            session_id=str(session_id),
+        )
+    return created
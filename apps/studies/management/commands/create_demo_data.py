@@ -420,6 +420,9 @@ By clicking "I Agree" below, you indicate that:
             )
             signups.append(signup)
         
+        # Signups were created directly (not via Timeslot.book): bring the seat counters up to date
+        Timeslot.objects.filter(pk__in=[ts.pk for ts in timeslots]).recount_signups()
+        
         self.stdout.write(f'  ✓ Created {len(signups)} signups')
         return signups
 
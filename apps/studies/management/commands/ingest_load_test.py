@@ -0,0 +1,152 @@
+"""
+Load test for protocol response submission: direct inserts vs buffered ingestion.
+
+Fires submissions at the real submit views (full middleware stack) and reports
+sustained submissions/sec and latency for each ingestion mode, plus how long the
+buffered modes take to flush. ``--handlers wsgi`` drives submit_response with one
+thread (and DB connection) per client; ``--handlers asgi`` drives
+submit_response_async through the ASGI handler with concurrent coroutines.
+
+    python manage.py ingest_load_test --requests 2000 --concurrency 32 --modes direct db redis
+    python manage.py ingest_load_test --handlers wsgi asgi --modes direct
+
+A throwaway study is created for the run and deleted afterwards (with its responses)
+unless --study is given.
+"""
+import asyncio
+import statistics
+import threading
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import AsyncClient, Client, override_settings
+from django.urls import reverse
+
+from apps.studies import ingest
+from apps.studies.models import Response, Study
+
+
+class Command(BaseCommand):
+    help = "Measure response submissions/sec for direct vs buffered ingestion and WSGI vs ASGI."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--study', help='Study slug or UUID to submit to (default: a temporary study).')
+        parser.add_argument('--requests', type=int, default=1000, help='Submissions per mode (default 1000).')
+        parser.add_argument('--concurrency', type=int, default=16, help='Concurrent clients (default 16).')
+        parser.add_argument('--modes', nargs='+', default=['direct', 'db'], choices=['direct', 'db', 'redis'])
+        parser.add_argument('--handlers', nargs='+', default=['wsgi'], choices=['wsgi', 'asgi'])
+
+    def _get_study(self, identifier):
+        try:
+            return Study.objects.get(id=uuid.UUID(identifier))
+        except (ValueError, Study.DoesNotExist):
+            pass
+        try:
+            return Study.objects.get(slug=identifier)
+        except Study.DoesNotExist:
+            raise CommandError(f"Study not found: {identifier}")
+
+    def handle(self, *args, **options):
+        if options['study']:
+            study, temporary = self._get_study(options['study']), False
+        else:
+            study = Study.objects.create(
+                title=f'Ingest load test {uuid.uuid4().hex[:8]}',
+                description='Temporary study created by ingest_load_test.',
+                mode='online',
+                consent_text='Load test.',
+            )
+            temporary = True
+
+        try:
+            for handler in options['handlers']:
+                for mode in options['modes']:
+                    with override_settings(RESPONSE_INGEST_MODE=mode, ALLOWED_HOSTS=['*']):
+                        self._run_mode(study, handler, mode, options['requests'], options['concurrency'])
+        finally:
+            if temporary:
+                Response.objects.filter(study=study).delete()
+                study.delete()
+
+    def _run_mode(self, study, handler, mode, total, concurrency):
+        body = '{"score": 1.0, "rt_ms": 512, "condition": "A"}'
+        before = Response.objects.filter(study=study).count()
+        if handler == 'asgi':
+            url = reverse('submit_response_async', kwargs={'study_id': study.id})
+            elapsed, latencies, errors = asyncio.run(self._drive_asgi(url, body, total, concurrency))
+        else:
+            url = reverse('submit_response', kwargs={'study_id': study.id})
+            elapsed, latencies, errors = self._drive_wsgi(url, body, total, concurrency)
+        self._report(study, f"{handler} / {mode}", mode, before, total, concurrency, elapsed, latencies, errors)
+
+    async def _drive_asgi(self, url, body, total, concurrency):
+        latencies, errors = [], 0
+        remaining = iter(range(total))
+
+        async def client_loop():
+            nonlocal errors
+            client = AsyncClient()
+            for _ in remaining:
+                started = time.perf_counter()
+                response = await client.post(url, body, content_type='application/json')
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+        return time.perf_counter() - started, latencies, errors
+
+    def _drive_wsgi(self, url, body, total, concurrency):
+        latencies, errors = [], []
+        lock = threading.Lock()
+        counter = iter(range(total))
+
+        def client_loop():
+            client = Client()
+            local_latencies, local_errors = [], 0
+            while True:
+                with lock:
+                    if next(counter, None) is None:
+                        break
+                started = time.perf_counter()
+                response = client.post(url, body, content_type='application/json')
+                local_latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    local_errors += 1
+            connection.close()
+            with lock:
+                latencies.extend(local_latencies)
+                errors.append(local_errors)
+
+        threads = [threading.Thread(target=client_loop) for _ in range(concurrency)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - started, latencies, sum(errors)
+
+    def _report(self, study, label, mode, before, total, concurrency, elapsed, latencies, errors):
+        flush_seconds = None
+        if mode in ingest.BUFFERED_MODES:
+            flush_started = time.perf_counter()
+            ingest.flush()
+            flush_seconds = time.perf_counter() - flush_started
+        written = Response.objects.filter(study=study).count() - before
+
+        latencies.sort()
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] if latencies else 0.0
+        self.stdout.write(self.style.MIGRATE_HEADING(label))
+        self.stdout.write(f"  Submissions/sec: {total / elapsed:,.0f} ({total} in {elapsed:.2f}s, {concurrency} clients)")
+        if latencies:
+            self.stdout.write(
+                f"  Latency: p50 {statistics.median(latencies) * 1000:.1f} ms, p99 {p99 * 1000:.1f} ms"
+            )
+        self.stdout.write(f"  Errors: {errors}")
+        if flush_seconds is not None:
+            self.stdout.write(f"  Flush: {written} rows in {flush_seconds:.2f}s ({written / max(flush_seconds, 1e-9):,.0f} rows/sec)")
+        else:
+            self.stdout.write(f"  Rows written: {written}")
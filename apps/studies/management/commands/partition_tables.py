@@ -0,0 +1,102 @@
+"""
+Convert responses and audit_logs to PostgreSQL declarative partitions, and manage them.
+
+    python manage.py partition_tables --status
+    python manage.py partition_tables                       # convert both tables
+    python manage.py partition_tables --tables audit_logs --months-ahead 6
+    python manage.py partition_tables --detach-before 2025-01
+    python manage.py partition_tables --drop-legacy
+
+Conversion keeps the original table as <table>_unpartitioned until --drop-legacy.
+See config/partitioning.py. Does nothing on SQLite.
+"""
+from datetime import date
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from config import partitioning
+
+TABLES = list(partitioning.MONTHLY_TABLES) + list(partitioning.HASH_TABLES)
+
+
+class Command(BaseCommand):
+    help = "Partition responses (hash on study) and audit_logs (monthly) on PostgreSQL."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tables', nargs='+', choices=TABLES, default=TABLES)
+        parser.add_argument('--status', action='store_true', help='Show partitioning status and exit.')
+        parser.add_argument('--months-ahead', type=int, default=settings.PARTITION_MONTHS_AHEAD)
+        parser.add_argument('--hash-partitions', type=int, default=settings.RESPONSES_HASH_PARTITIONS)
+        parser.add_argument(
+            '--detach-before',
+            metavar='YYYY-MM',
+            help='Detach monthly partitions for months before this one (they are kept as standalone tables).',
+        )
+        parser.add_argument('--drop-legacy', action='store_true', help='Drop <table>_unpartitioned copies.')
+
+    def handle(self, *args, **options):
+        if not partitioning.supported():
+            self.stdout.write(f"Partitioning requires PostgreSQL ({connection.vendor} in use); nothing to do.")
+            return
+
+        with connection.cursor() as cursor:
+            if options['status']:
+                for table in options['tables']:
+                    self._status(cursor, table)
+                return
+
+            for table in options['tables']:
+                with transaction.atomic():
+                    if options['detach_before']:
+                        self._detach(cursor, table, options['detach_before'])
+                    elif options['drop_legacy']:
+                        self._drop_legacy(cursor, table)
+                    else:
+                        self._convert(cursor, table, options)
+
+    def _status(self, cursor, table):
+        if not partitioning.is_partitioned(cursor, table):
+            self.stdout.write(f"{table}: not partitioned")
+            return
+        partitions = partitioning.list_partitions(cursor, table)
+        self.stdout.write(f"{table}: {len(partitions)} partitions")
+        for name in partitions:
+            self.stdout.write(f"  {name}")
+
+    def _convert(self, cursor, table, options):
+        if partitioning.is_partitioned(cursor, table):
+            created = []
+            if table in partitioning.MONTHLY_TABLES:
+                created = partitioning.ensure_monthly_partitions(cursor, table, options['months_ahead'])
+            self.stdout.write(f"{table}: already partitioned; created {len(created)} new partitions")
+            return
+        if table in partitioning.MONTHLY_TABLES:
+            created = partitioning.convert_monthly(
+                cursor, table, partitioning.MONTHLY_TABLES[table], months_ahead=options['months_ahead']
+            )
+        else:
+            created = partitioning.convert_hash(
+                cursor, table, partitioning.HASH_TABLES[table], modulus=options['hash_partitions']
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"{table}: partitioned into {len(created)} partitions "
+            f"(original kept as {table}{partitioning.LEGACY_SUFFIX})"
+        ))
+
+    def _detach(self, cursor, table, value):
+        if table not in partitioning.MONTHLY_TABLES:
+            return
+        try:
+            year, month = (int(part) for part in value.split('-'))
+            before = date(year, month, 1)
+        except ValueError:
+            raise CommandError("--detach-before must look like YYYY-MM")
+        detached = partitioning.detach_monthly_partitions(cursor, table, before)
+        self.stdout.write(f"{table}: detached {', '.join(detached) or 'nothing'}")
+
+    def _drop_legacy(self, cursor, table):
+        legacy = f'{table}{partitioning.LEGACY_SUFFIX}'
+        cursor.execute(f'DROP TABLE IF EXISTS {connection.ops.quote_name(legacy)}')
+        self.stdout.write(f"Dropped {legacy} (if it existed)")
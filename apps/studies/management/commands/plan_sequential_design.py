@@ -0,0 +1,98 @@
+"""
+Simulate a study's Bayes Factor stopping rule (expected N, N at stopping, error rates).
+
+Usage:
+  python manage.py plan_sequential_design ei-pilot --effect-size 0.4 --max-n 200
+  python manage.py plan_sequential_design ei-pilot --plugin apps.studies.analysis.normal_mean:compute_bf \
+      --params '{"field": "score"}' --threshold 6 --min-n 30 --sims 5000 --workers 4
+"""
+import json
+import uuid
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.studies.analysis.planner import PlannerError, get_or_simulate_design, simulate_design
+from apps.studies.models import Study
+
+
+class Command(BaseCommand):
+    help = (
+        "Monte Carlo simulation of a study's sequential BF stopping rule under H0 and H1. "
+        "Defaults come from the study (analysis_plugin, bf_threshold, min_sample_size)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('study', help='Study slug or UUID.')
+        parser.add_argument('--plugin', help='Analysis plugin import path (default: study.analysis_plugin).')
+        parser.add_argument('--params', default='{}', help='Plugin params as a JSON object.')
+        parser.add_argument('--threshold', type=float, help='BF threshold (default: study.bf_threshold).')
+        parser.add_argument('--min-n', type=int, help='Minimum N before monitoring (default: study.min_sample_size).')
+        parser.add_argument('--max-n', type=int, default=200, help='Maximum N (trajectories stop here).')
+        parser.add_argument('--effect-size', type=float, default=0.5, help='Standardized effect size under H1.')
+        parser.add_argument('--sims', type=int, default=2000, help='Trajectories per hypothesis.')
+        parser.add_argument('--seed', type=int, default=20240101, help='Random seed.')
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=getattr(settings, 'BF_PLANNER_WORKERS', 1),
+            help='Process pool size (1 runs inline).',
+        )
+        parser.add_argument('--no-cache', action='store_true', help='Always simulate; do not read or write the cache.')
+        parser.add_argument('--json', action='store_true', help='Print the plan as JSON.')
+
+    def handle(self, *args, **options):
+        study = self._get_study(options['study'])
+        try:
+            params = json.loads(options['params'])
+        except json.JSONDecodeError as exc:
+            raise CommandError(f'--params is not valid JSON: {exc}') from exc
+        if not isinstance(params, dict):
+            raise CommandError('--params must be a JSON object.')
+
+        config = dict(
+            params=params,
+            bf_threshold=options['threshold'] if options['threshold'] is not None else study.bf_threshold,
+            min_n=options['min_n'] if options['min_n'] is not None else study.min_sample_size,
+            max_n=options['max_n'],
+            effect_size=options['effect_size'],
+            n_sims=options['sims'],
+            seed=options['seed'],
+            workers=max(1, options['workers']),
+        )
+        plugin = options['plugin'] or study.analysis_plugin
+        try:
+            if options['no_cache']:
+                plan = simulate_design(plugin, **config)
+            else:
+                plan = get_or_simulate_design(plugin, **config)
+        except PlannerError as exc:
+            raise CommandError(str(exc)) from exc
+
+        if options['json']:
+            self.stdout.write(json.dumps(plan.to_dict(), indent=2))
+            return
+
+        self.stdout.write(self.style.SUCCESS(f'Sequential design for {study.slug} ({plan.plugin})'))
+        self.stdout.write(
+            f'  threshold BF >= {plan.bf_threshold:g}, min N {plan.min_n}, max N {plan.max_n}, '
+            f'{plan.n_sims} trajectories per hypothesis, H1 effect size {plan.effect_size:g}'
+        )
+        for summary in (plan.h0, plan.h1):
+            pct = ', '.join(f'{k}={v:.0f}' for k, v in summary.percentiles.items())
+            self.stdout.write(
+                f'  {summary.hypothesis}: stop rate {summary.stop_rate:.3f}, '
+                f'expected N {summary.expected_n:.1f} ({pct})'
+            )
+        self.stdout.write(f'  False positive rate: {plan.false_positive_rate:.3f}')
+        self.stdout.write(f'  True positive rate:  {plan.true_positive_rate:.3f}')
+
+    def _get_study(self, identifier: str) -> Study:
+        try:
+            return Study.objects.get(slug=identifier)
+        except Study.DoesNotExist:
+            pass
+        try:
+            return Study.objects.get(id=uuid.UUID(identifier))
+        except (ValueError, Study.DoesNotExist) as exc:
+            raise CommandError(f'Could not find study with slug or UUID "{identifier}".') from exc
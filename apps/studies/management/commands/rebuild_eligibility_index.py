@@ -0,0 +1,51 @@
+"""
+Rebuild the participant -> eligible study index (EligibleStudy).
+
+    python manage.py rebuild_eligibility_index
+    python manage.py rebuild_eligibility_index --study <slug-or-uuid>
+
+The index is normally kept current incrementally (see apps.studies.eligibility);
+run this after deploying the index or after bulk data changes.
+"""
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.accounts.models import Profile
+from apps.studies import eligibility
+from apps.studies.models import EligibleStudy, Study
+
+
+class Command(BaseCommand):
+    help = "Rebuild the eligible-study index for every open study (or one study)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--study', help='Only this study (slug or UUID).')
+
+    def _get_study(self, identifier):
+        try:
+            return Study.objects.get(id=uuid.UUID(identifier))
+        except (ValueError, Study.DoesNotExist):
+            pass
+        try:
+            return Study.objects.get(slug=identifier)
+        except Study.DoesNotExist:
+            raise CommandError(f"Study not found: {identifier}")
+
+    def handle(self, *args, **options):
+        if options['study']:
+            study = self._get_study(options['study'])
+            added, removed = eligibility.reindex_study(study)
+            self.stdout.write(self.style.SUCCESS(f"{study.slug}: +{added} -{removed}"))
+            return
+
+        removed, _ = EligibleStudy.objects.exclude(study__in=Study.active_approved.values('pk')).delete()
+        total_added = 0
+        for study in Study.active_approved.all():
+            added, dropped = eligibility.reindex_study(study)
+            total_added += added
+            removed += dropped
+            self.stdout.write(f"  {study.slug}: +{added} -{dropped}")
+        Profile.objects.filter(user__role='participant').update(eligibility_indexed_at=timezone.now())
+        self.stdout.write(self.style.SUCCESS(f"Index rebuilt: {total_added} rows added, {removed} removed."))
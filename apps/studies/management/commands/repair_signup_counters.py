@@ -0,0 +1,52 @@
+"""
+Recompute Timeslot.active_signup_count from the signups table.
+
+    python manage.py repair_signup_counters
+    python manage.py repair_signup_counters --study <slug-or-uuid> --dry-run
+
+The counter is maintained by Timeslot.book and Signup.cancel; run this after
+editing signups directly (shell, admin bulk edits, data fixes).
+"""
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import F
+
+from apps.studies.models import Study, Timeslot
+
+
+class Command(BaseCommand):
+    help = "Recompute timeslot signup counters from signups."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--study', help='Only this study (slug or UUID).')
+        parser.add_argument('--dry-run', action='store_true', help='Report drifted counters without fixing them.')
+
+    def _get_study(self, identifier):
+        try:
+            return Study.objects.get(id=uuid.UUID(identifier))
+        except (ValueError, Study.DoesNotExist):
+            pass
+        try:
+            return Study.objects.get(slug=identifier)
+        except Study.DoesNotExist:
+            raise CommandError(f"Study not found: {identifier}")
+
+    def handle(self, *args, **options):
+        timeslots = Timeslot.objects.all()
+        if options['study']:
+            timeslots = timeslots.filter(study=self._get_study(options['study']))
+
+        if options['dry_run']:
+            drifted = (
+                timeslots.active_signup_counts()
+                .exclude(active_signup_count=F('actual_signup_count'))
+                .values_list('pk', 'active_signup_count', 'actual_signup_count')
+            )
+            for pk, stored, actual in drifted:
+                self.stdout.write(f"  {pk}: counter {stored}, signups {actual}")
+            self.stdout.write(f"{len(drifted)} timeslot(s) with drifted counters (dry run).")
+            return
+
+        fixed = timeslots.recount_signups()
+        self.stdout.write(self.style.SUCCESS(f"Repaired {fixed} timeslot counter(s)."))
@@ -0,0 +1,36 @@
+# Generated by Django 5.0.9 on 2026-10-19 00:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('studies', '0035_add_calendar_sync_and_sms_flags'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalysisRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('plugin', models.CharField(max_length=200)),
+                ('sample_size', models.PositiveIntegerField()),
+                ('bf', models.FloatField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('ok', 'OK'), ('error', 'Error'), ('timeout', 'Timed Out'), ('memory', 'Memory Limit Exceeded')], default='ok', max_length=10)),
+                ('duration_ms', models.FloatField(help_text='Wall-clock time including worker round-trip')),
+                ('compute_ms', models.FloatField(blank=True, help_text='Time spent inside the plugin', null=True)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('study', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='analysis_runs', to='studies.study')),
+            ],
+            options={
+                'verbose_name': 'Analysis Run',
+                'verbose_name_plural': 'Analysis Runs',
+                'db_table': 'analysis_runs',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['study', '-created_at'], name='analysis_ru_study_i_92a561_idx')],
+            },
+        ),
+    ]
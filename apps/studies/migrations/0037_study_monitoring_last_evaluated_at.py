@@ -0,0 +1,18 @@
+# Generated by Django 5.0.9 on 2026-10-19 00:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('studies', '0036_analysisrun'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='study',
+            name='monitoring_last_evaluated_at',
+            field=models.DateTimeField(blank=True, help_text='When sequential monitoring last evaluated this study', null=True),
+        ),
+    ]
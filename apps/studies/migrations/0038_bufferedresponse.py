@@ -0,0 +1,31 @@
+# Generated by Django 5.0.9 on 2026-10-19 00:00
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('studies', '0037_study_monitoring_last_evaluated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BufferedResponse',
+            fields=[
+                ('id', models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ('session_id', models.UUIDField()),
+                ('payload', models.JSONField()),
+                ('ip_address', models.GenericIPAddressField(blank=True, null=True)),
+                ('user_agent', models.TextField(blank=True)),
+                ('received_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('study', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='studies.study')),
+            ],
+            options={
+                'db_table': 'response_ingest_buffer',
+                'ordering': ['received_at'],
+            },
+        ),
+    ]
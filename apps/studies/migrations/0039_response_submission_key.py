@@ -0,0 +1,27 @@
+# Generated by Django 5.0.9 on 2026-10-19 00:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('studies', '0038_bufferedresponse'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='response',
+            name='submission_key',
+            field=models.CharField(blank=True, editable=False, help_text='Idempotency key (client Idempotency-Key, or hash of session_id + payload); retries reuse the first row', max_length=64, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='response',
+            constraint=models.UniqueConstraint(fields=('study', 'submission_key'), name='responses_study_submission_key_uniq'),
+        ),
+        migrations.AddField(
+            model_name='bufferedresponse',
+            name='submission_key',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+    ]
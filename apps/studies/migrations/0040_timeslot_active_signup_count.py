@@ -0,0 +1,31 @@
+# Generated by Django 5.0.9 on 2026-10-19 00:00
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_active_signup_count(apps, schema_editor):
+    Timeslot = apps.get_model('studies', 'Timeslot')
+    Signup = apps.get_model('studies', 'Signup')
+    counts = (
+        Signup.objects.filter(timeslot=OuterRef('pk')).exclude(status='cancelled')
+        .order_by().values('timeslot').annotate(n=Count('id')).values('n')
+    )
+    Timeslot.objects.update(active_signup_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('studies', '0039_response_submission_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='timeslot',
+            name='active_signup_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_active_signup_count, migrations.RunPython.noop),
+    ]
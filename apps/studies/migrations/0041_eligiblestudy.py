@@ -0,0 +1,34 @@
+# Generated by Django 5.0.9 on 2026-10-19 15:39
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('studies', '0040_timeslot_active_signup_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EligibleStudy',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('indexed_at', models.DateTimeField(auto_now=True)),
+                ('participant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='eligible_studies', to=settings.AUTH_USER_MODEL)),
+                ('study', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='eligible_participants', to='studies.study')),
+            ],
+            options={
+                'verbose_name': 'Eligible Study',
+                'verbose_name_plural': 'Eligible Studies',
+                'db_table': 'eligible_studies',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='eligiblestudy',
+            constraint=models.UniqueConstraint(fields=('participant', 'study'), name='eligible_studies_participant_study_uniq'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.0.9 on 2026-10-19 15:45
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def copy_reminder_flags(apps, schema_editor):
+    Signup = apps.get_model('studies', 'Signup')
+    SignupReminder = apps.get_model('studies', 'SignupReminder')
+    for flag, offset_hours in (('reminder_24h_sent', 24), ('reminder_2h_sent', 2)):
+        signup_ids = Signup.objects.filter(**{flag: True}).values_list('pk', flat=True).iterator(chunk_size=2000)
+        batch = []
+        for signup_id in signup_ids:
+            batch.append(SignupReminder(signup_id=signup_id, offset_hours=offset_hours))
+            if len(batch) >= 2000:
+                SignupReminder.objects.bulk_create(batch, ignore_conflicts=True)
+                batch = []
+        SignupReminder.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('studies', '0041_eligiblestudy'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SignupReminder',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('offset_hours', models.PositiveSmallIntegerField(help_text='Hours before the session the reminder was due')),
+                ('sent_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('signup', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reminders', to='studies.signup')),
+            ],
+            options={
+                'verbose_name': 'Signup Reminder',
+                'verbose_name_plural': 'Signup Reminders',
+                'db_table': 'signup_reminders',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='signupreminder',
+            constraint=models.UniqueConstraint(fields=('signup', 'offset_hours'), name='signup_reminders_signup_offset_uniq'),
+        ),
+        migrations.RunPython(copy_reminder_flags, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='signup',
+            name='reminder_24h_sent',
+        ),
+        migrations.RemoveField(
+            model_name='signup',
+            name='reminder_2h_sent',
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.0.9 on 2026-10-19 15:56
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('studies', '0042_signupreminder'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WaitlistEntry',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('waiting', 'Waiting'), ('promoted', 'Promoted'), ('withdrawn', 'Withdrawn'), ('expired', 'Expired')], default='waiting', max_length=20)),
+                ('consent_text_version', models.TextField(help_text='Copy of consent text at time of joining the waitlist')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('resolved_at', models.DateTimeField(blank=True, null=True)),
+                ('participant', models.ForeignKey(limit_choices_to={'role': 'participant'}, on_delete=django.db.models.deletion.CASCADE, related_name='waitlist_entries', to=settings.AUTH_USER_MODEL)),
+                ('signup', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='waitlist_entry', to='studies.signup')),
+                ('timeslot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlist_entries', to='studies.timeslot')),
+            ],
+            options={
+                'verbose_name': 'Waitlist Entry',
+                'verbose_name_plural': 'Waitlist Entries',
+                'db_table': 'waitlist_entries',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['timeslot', 'status', 'id'], name='waitlist_en_timeslo_aaf11b_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='waitlistentry',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'waiting')), fields=('timeslot', 'participant'), name='waitlist_entries_one_waiting_per_participant'),
+        ),
+    ]
@@ -1,6 +1,7 @@
 """
 Study, timeslot, and signup models.
 """
+import logging
 import uuid
 from datetime import timedelta
 from django.db import models
@@ -8,8 +9,57 @@ from django.utils import timezone
 from django.conf import settings
 from django.core.validators import MinValueValidator
 
+logger = logging.getLogger(__name__)
 
-class ActiveApprovedStudyManager(models.Manager):
+
+def _open_seats():
+    """Per-timeslot remaining capacity, for aggregates over timeslots."""
+    from django.db.models import F
+    from django.db.models.functions import Greatest
+    return Greatest(F('capacity') - F('active_signup_count'), 0)
+
+
+class StudyQuerySet(models.QuerySet):
+    def with_browse_stats(self):
+        """
+        Annotate signup_total, open_slot_total and response_total with correlated
+        subqueries, so listing N studies stays one query. total_signups,
+        available_slots and response_count read the annotations when present.
+        """
+        from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum
+        from django.db.models.functions import Coalesce
+
+        signups = (
+            Signup.objects.filter(timeslot__study=OuterRef('pk'))
+            .order_by().values('timeslot__study').annotate(n=Count('id')).values('n')
+        )
+        open_slots = (
+            Timeslot.objects.filter(study=OuterRef('pk'), starts_at__gte=timezone.now())
+            .order_by().values('study').annotate(n=Sum(_open_seats())).values('n')
+        )
+        responses = (
+            Response.objects.filter(study=OuterRef('pk'))
+            .order_by().values('study').annotate(n=Count('id')).values('n')
+        )
+        return self.annotate(
+            signup_total=Coalesce(Subquery(signups, output_field=IntegerField()), 0),
+            open_slot_total=Coalesce(Subquery(open_slots, output_field=IntegerField()), 0),
+            response_total=Coalesce(Subquery(responses, output_field=IntegerField()), 0),
+        )
+
+    def with_eligible_counts(self):
+        """Annotate eligible_total: participants in the eligibility index for each study."""
+        from django.db.models import Count, IntegerField, OuterRef, Subquery
+        from django.db.models.functions import Coalesce
+
+        eligible = (
+            EligibleStudy.objects.filter(study=OuterRef('pk'))
+            .order_by().values('study').annotate(n=Count('id')).values('n')
+        )
+        return self.annotate(eligible_total=Coalesce(Subquery(eligible, output_field=IntegerField()), 0))
+
+
+class ActiveApprovedStudyManager(models.Manager.from_queryset(StudyQuerySet)):
     """
     Manager for studies that are active, approved, and not expired.
     Mirrors the active_approved_studies PostgreSQL view for IRB compliance.
@@ -156,6 +206,11 @@ class Study(models.Model):
     current_bf = models.FloatField(null=True, blank=True, help_text="Current Bayes Factor value")
     monitoring_enabled = models.BooleanField(default=False, help_text="Enable sequential Bayesian monitoring")
     monitoring_notified = models.BooleanField(default=False, help_text="Notification sent when BF >= threshold")
+    monitoring_last_evaluated_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When sequential monitoring last evaluated this study"
+    )
     run_analysis_on_threshold = models.BooleanField(
         default=False,
         help_text="When True, run post-decision analysis task when BF threshold is reached"
@@ -186,7 +241,7 @@ class Study(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
-    objects = models.Manager()
+    objects = StudyQuerySet.as_manager()
     active_approved = ActiveApprovedStudyManager()
     
     class Meta:
@@ -218,6 +273,8 @@ class Study(models.Model):
     @property
     def total_signups(self):
         """Count total signups across all timeslots."""
+        if hasattr(self, 'signup_total'):
+            return self.signup_total
         return self.timeslots.aggregate(
             total=models.Count('signups')
         )['total'] or 0
@@ -227,20 +284,27 @@ class Study(models.Model):
         """Count available slots across all timeslots. Returns 'N/A' for online studies."""
         if self.mode == 'online':
             return 'N/A'
-        now = timezone.now()
-        return sum(
-            ts.available_capacity
-            for ts in self.timeslots.filter(starts_at__gte=now)
-        )
+        if hasattr(self, 'open_slot_total'):
+            return self.open_slot_total
+        from django.db.models import Sum
+
+        return self.timeslots.filter(starts_at__gte=timezone.now()).aggregate(
+            total=Sum(_open_seats())
+        )['total'] or 0
     
     @property
     def response_count(self):
         """Count total protocol responses."""
+        if hasattr(self, 'response_total'):
+            return self.response_total
         return self.responses.count()
     
     @property
     def latest_irb_review(self):
-        """Get the most recent IRB review for this study."""
+        """Get the most recent IRB review for this study (uses prefetched irb_reviews if present)."""
+        prefetched = getattr(self, '_prefetched_objects_cache', {}).get('irb_reviews')
+        if prefetched is not None:
+            return max(prefetched, key=lambda review: review.version, default=None)
         return self.irb_reviews.order_by('-version').first()
     
     @property
@@ -375,6 +439,36 @@ class StudyUpdate(models.Model):
         super().save(*args, **kwargs)
 
 
+class TimeslotFull(Exception):
+    """Raised by Timeslot.book when no seat is left."""
+
+
+class TimeslotQuerySet(models.QuerySet):
+    def active_signup_counts(self):
+        """Annotate ``actual_signup_count``: non-cancelled signups, counted from ``signups``."""
+        from django.db.models import Count, OuterRef, Subquery
+        from django.db.models.functions import Coalesce
+
+        counts = (
+            Signup.objects.filter(timeslot=OuterRef('pk')).exclude(status='cancelled')
+            .order_by().values('timeslot').annotate(n=Count('id')).values('n')
+        )
+        return self.annotate(actual_signup_count=Coalesce(Subquery(counts), 0))
+
+    def recount_signups(self):
+        """Recompute active_signup_count from ``signups``; returns the number of timeslots that were off."""
+        from django.db.models import F
+
+        drifted = list(
+            self.active_signup_counts()
+            .exclude(active_signup_count=F('actual_signup_count'))
+            .values_list('pk', 'actual_signup_count')
+        )
+        for pk, actual in drifted:
+            Timeslot.objects.filter(pk=pk).update(active_signup_count=actual)
+        return len(drifted)
+
+
 class Timeslot(models.Model):
     """Specific time slot for a study."""
     
@@ -401,9 +495,28 @@ class Timeslot(models.Model):
     
     is_cancelled = models.BooleanField(default=False)
     
+    # One-way Google Calendar sync (columns added in migration 0035)
+    google_calendar_event_id = models.CharField(
+        max_length=255,
+        blank=True,
+        db_index=True,
+        help_text="Google Calendar event id used for one-way sync"
+    )
+    google_calendar_last_synced_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Last successful Google Calendar sync time"
+    )
+    google_calendar_sync_error = models.TextField(blank=True, help_text="Last Google Calendar sync error message")
+    
+    # Non-cancelled signups, maintained by book() / Signup.cancel() (repair: manage.py repair_signup_counters)
+    active_signup_count = models.PositiveIntegerField(default=0, editable=False)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = TimeslotQuerySet.as_manager()
+    
     class Meta:
         db_table = 'timeslots'
         verbose_name = 'Study Timeslot'
@@ -420,7 +533,7 @@ class Timeslot(models.Model):
     @property
     def current_signups(self):
         """Count active signups (not cancelled)."""
-        return self.signups.exclude(status='cancelled').count()
+        return self.active_signup_count
     
     @property
     def available_capacity(self):
@@ -432,6 +545,78 @@ class Timeslot(models.Model):
         """Check if timeslot is at capacity."""
         return self.available_capacity == 0
     
+    def book(self, participant, **fields):
+        """
+        Take a seat and create the signup. Raises TimeslotFull if none is left.
+
+        The seat is claimed with one guarded UPDATE (count < capacity), so
+        concurrent bookings cannot overbook; the insert runs in the same
+        transaction and gives the seat back if it fails (e.g. duplicate signup).
+        """
+        from django.db import transaction
+        from django.db.models import F
+
+        with transaction.atomic():
+            claimed = Timeslot.objects.filter(
+                pk=self.pk, active_signup_count__lt=F('capacity'),
+            ).update(active_signup_count=F('active_signup_count') + 1)
+            if not claimed:
+                raise TimeslotFull(str(self.pk))
+            signup = Signup.objects.create(timeslot=self, participant=participant, **fields)
+        self.active_signup_count += 1
+        return signup
+    
+    def promote_waitlist(self):
+        """
+        Fill free seats from the waitlist, oldest entry first; returns the new signups.
+
+        Each promotion claims the entry with a conditional UPDATE (status
+        'waiting' -> 'promoted', skipping rows locked by a concurrent promoter)
+        and the seat through book(), in one transaction, so concurrent
+        cancellations never promote the same entry twice or overbook. Entries
+        are only promoted while the session can still be cancelled online.
+        Promoted participants are notified after commit.
+        """
+        from django.db import IntegrityError, transaction
+
+        promoted = []
+        while True:
+            timeslot = Timeslot.objects.filter(pk=self.pk).first()
+            if (
+                timeslot is None or timeslot.is_cancelled or not timeslot.can_cancel
+                or timeslot.active_signup_count >= timeslot.capacity
+            ):
+                break
+            with transaction.atomic():
+                entry = (
+                    WaitlistEntry.objects.select_for_update(skip_locked=True, of=('self',))
+                    .filter(timeslot_id=self.pk, status='waiting')
+                    .select_related('participant')
+                    .order_by('id')
+                    .first()
+                )
+                if entry is None:
+                    break
+                now = timezone.now()
+                if not WaitlistEntry.objects.filter(pk=entry.pk, status='waiting').update(
+                    status='promoted', resolved_at=now,
+                ):
+                    continue
+                try:
+                    signup = timeslot.book(entry.participant, consent_text_version=entry.consent_text_version)
+                except TimeslotFull:
+                    # Lost the seat to a direct booking: put the entry back at its place in line.
+                    WaitlistEntry.objects.filter(pk=entry.pk).update(status='waiting', resolved_at=None)
+                    break
+                except IntegrityError:
+                    # Already has a (cancelled) signup for this slot; booking again is not allowed.
+                    WaitlistEntry.objects.filter(pk=entry.pk).update(status='expired')
+                    continue
+                WaitlistEntry.objects.filter(pk=entry.pk).update(signup=signup)
+                transaction.on_commit(lambda signup_id=str(signup.pk): _notify_waitlist_promotion(signup_id))
+            promoted.append(signup)
+        return promoted
+    
     @property
     def is_past(self):
         """Check if timeslot has already occurred."""
@@ -476,9 +661,9 @@ class Signup(models.Model):
     cancelled_at = models.DateTimeField(null=True, blank=True)
     attended_at = models.DateTimeField(null=True, blank=True)
     
-    # Reminders sent
-    reminder_24h_sent = models.BooleanField(default=False)
-    reminder_2h_sent = models.BooleanField(default=False)
+    # SMS reminders sent (email reminders are recorded in SignupReminder)
+    reminder_24h_sms_sent = models.BooleanField(default=False)
+    reminder_2h_sms_sent = models.BooleanField(default=False)
     
     # Notes
     participant_notes = models.TextField(blank=True, help_text="Notes from participant")
@@ -500,11 +685,30 @@ class Signup(models.Model):
         return f"{self.participant.get_full_name()} - {self.timeslot.study.title}"
     
     def cancel(self):
-        """Mark signup as cancelled."""
-        if self.status == 'booked':
-            self.status = 'cancelled'
-            self.cancelled_at = timezone.now()
-            self.save()
+        """Mark signup as cancelled and release its seat."""
+        from django.db import transaction
+        from django.db.models import F
+
+        if self.status != 'booked':
+            return
+        now = timezone.now()
+        with transaction.atomic():
+            # Conditional on the stored status so a double cancel releases the seat once.
+            released = Signup.objects.filter(pk=self.pk, status='booked').update(status='cancelled', cancelled_at=now)
+            if released:
+                Timeslot.objects.filter(pk=self.timeslot_id, active_signup_count__gt=0).update(
+                    active_signup_count=F('active_signup_count') - 1
+                )
+                self.timeslot.promote_waitlist()
+        self.status = 'cancelled'
+        self.cancelled_at = now
+        if released:
+            # Signup history feeds excluded_studies rules
+            from .eligibility import reindex_participant
+            reindex_participant(self.participant_id)
+            from .calendar_feeds import bump_feed_versions
+            researcher_ids = Timeslot.objects.filter(pk=self.timeslot_id).values_list('study__researcher_id', flat=True)
+            transaction.on_commit(lambda: bump_feed_versions([self.participant_id, *researcher_ids]))
     
     def mark_attended(self):
         """Mark participant as attended."""
@@ -514,7 +718,7 @@ class Signup(models.Model):
             self.save()
     
     def mark_no_show(self):
-        """Mark participant as no-show."""
+        """Mark participant as no-show. The seat stays taken (no-shows count against capacity)."""
         if self.status == 'booked':
             self.status = 'no_show'
             self.save()
@@ -525,6 +729,125 @@ class Signup(models.Model):
             profile.save()
 
 
+class SignupReminder(models.Model):
+    """An email reminder sent for a signup, one row per REMINDER_HOURS_BEFORE offset."""
+    
+    id = models.BigAutoField(primary_key=True)
+    signup = models.ForeignKey(Signup, on_delete=models.CASCADE, related_name='reminders')
+    offset_hours = models.PositiveSmallIntegerField(help_text="Hours before the session the reminder was due")
+    sent_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        db_table = 'signup_reminders'
+        verbose_name = 'Signup Reminder'
+        verbose_name_plural = 'Signup Reminders'
+        constraints = [
+            models.UniqueConstraint(fields=['signup', 'offset_hours'], name='signup_reminders_signup_offset_uniq'),
+        ]
+    
+    def __str__(self):
+        return f"{self.signup_id} ({self.offset_hours}h)"
+
+
+def _notify_waitlist_promotion(signup_id):
+    from .tasks import notify_waitlist_promotion
+    try:
+        notify_waitlist_promotion.delay(signup_id)
+    except Exception:
+        logger.warning('Could not queue waitlist promotion notice for signup %s; sending inline', signup_id)
+        notify_waitlist_promotion(signup_id)
+
+
+class WaitlistEntry(models.Model):
+    """A participant waiting for a seat in a full timeslot (promoted FIFO by Timeslot.promote_waitlist)."""
+    
+    STATUS_CHOICES = [
+        ('waiting', 'Waiting'),
+        ('promoted', 'Promoted'),
+        ('withdrawn', 'Withdrawn'),
+        ('expired', 'Expired'),
+    ]
+    
+    # Auto-increment id gives the FIFO order
+    id = models.BigAutoField(primary_key=True)
+    timeslot = models.ForeignKey(Timeslot, on_delete=models.CASCADE, related_name='waitlist_entries')
+    participant = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='waitlist_entries',
+        limit_choices_to={'role': 'participant'}
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='waiting')
+    consent_text_version = models.TextField(help_text="Copy of consent text at time of joining the waitlist")
+    signup = models.OneToOneField(
+        Signup,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='waitlist_entry'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    resolved_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'waitlist_entries'
+        verbose_name = 'Waitlist Entry'
+        verbose_name_plural = 'Waitlist Entries'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['timeslot', 'status', 'id']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['timeslot', 'participant'],
+                condition=models.Q(status='waiting'),
+                name='waitlist_entries_one_waiting_per_participant',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.participant_id} waiting for {self.timeslot_id} ({self.status})"
+    
+    @property
+    def position(self):
+        """1-based place in line among waiting entries."""
+        return WaitlistEntry.objects.filter(timeslot_id=self.timeslot_id, status='waiting', id__lte=self.id).count()
+    
+    def withdraw(self):
+        if WaitlistEntry.objects.filter(pk=self.pk, status='waiting').update(
+            status='withdrawn', resolved_at=timezone.now(),
+        ):
+            self.status = 'withdrawn'
+
+
+class EligibleStudy(models.Model):
+    """
+    Materialized participant -> eligible study index, maintained by
+    apps.studies.eligibility (reindex_participant / reindex_study).
+    Only open (active_approved) studies are indexed.
+    """
+    
+    id = models.BigAutoField(primary_key=True)
+    participant = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='eligible_studies'
+    )
+    study = models.ForeignKey(Study, on_delete=models.CASCADE, related_name='eligible_participants')
+    indexed_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'eligible_studies'
+        verbose_name = 'Eligible Study'
+        verbose_name_plural = 'Eligible Studies'
+        constraints = [
+            models.UniqueConstraint(fields=['participant', 'study'], name='eligible_studies_participant_study_uniq'),
+        ]
+    
+    def __str__(self):
+        return f"{self.participant_id} -> {self.study_id}"
+
+
 class Response(models.Model):
     """Protocol response submitted by a participant."""
     
@@ -532,6 +855,13 @@ class Response(models.Model):
     
     study = models.ForeignKey(Study, on_delete=models.CASCADE, related_name='responses')
     session_id = models.UUIDField(default=uuid.uuid4, db_index=True, help_text="Anonymous session identifier")
+    submission_key = models.CharField(
+        max_length=64,
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Idempotency key (client Idempotency-Key, or hash of session_id + payload); retries reuse the first row"
+    )
     
     # Response data
     payload = models.JSONField(help_text="JSON data submitted from protocol")
@@ -550,11 +880,73 @@ class Response(models.Model):
             models.Index(fields=['study', 'created_at']),
             models.Index(fields=['session_id']),
         ]
+        constraints = [
+            models.UniqueConstraint(fields=['study', 'submission_key'], name='responses_study_submission_key_uniq'),
+        ]
     
     def __str__(self):
         return f"Response for {self.study.title} at {self.created_at}"
 
 
+class BufferedResponse(models.Model):
+    """
+    Staging row for a response accepted in buffered ingestion mode (RESPONSE_INGEST_MODE='db').
+
+    The id is the Response id already returned to the client. Rows are moved into
+    ``responses`` in batches by the flush_response_buffer task (see apps.studies.ingest).
+    The study reference has no database constraint so inserts never lock the study row.
+    """
+
+    id = models.UUIDField(primary_key=True, editable=False)
+    study = models.ForeignKey(Study, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    session_id = models.UUIDField()
+    submission_key = models.CharField(max_length=64, null=True, blank=True)
+    payload = models.JSONField()
+    ip_address = models.GenericIPAddressField(null=True, blank=True)
+    user_agent = models.TextField(blank=True)
+    received_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'response_ingest_buffer'
+        ordering = ['received_at']
+
+    def __str__(self):
+        return f"Buffered response {self.id}"
+
+
+class AnalysisRun(models.Model):
+    """One execution of a study's analysis plugin by sequential monitoring."""
+
+    STATUS_CHOICES = [
+        ('ok', 'OK'),
+        ('error', 'Error'),
+        ('timeout', 'Timed Out'),
+        ('memory', 'Memory Limit Exceeded'),
+    ]
+
+    study = models.ForeignKey(Study, on_delete=models.CASCADE, related_name='analysis_runs')
+    plugin = models.CharField(max_length=200)
+    sample_size = models.PositiveIntegerField()
+    bf = models.FloatField(null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='ok')
+    duration_ms = models.FloatField(help_text="Wall-clock time including worker round-trip")
+    compute_ms = models.FloatField(null=True, blank=True, help_text="Time spent inside the plugin")
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        db_table = 'analysis_runs'
+        verbose_name = 'Analysis Run'
+        verbose_name_plural = 'Analysis Runs'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['study', '-created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.plugin} on {self.study.title} (N={self.sample_size}, {self.status})"
+
+
 class StudyEmailContact(models.Model):
     """
     Optional email signup for sending study infographics.
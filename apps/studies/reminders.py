@@ -0,0 +1,224 @@
+"""
+Session reminder emails.
+
+send_due_reminders runs every few minutes. For each offset in
+``REMINDER_HOURS_BEFORE`` it finds, with one range query on
+``timeslot.starts_at``, the booked signups whose session starts between
+``offset`` hours from now and ``REMINDER_GRACE_MINUTES`` earlier, and that have
+no SignupReminder row for that offset yet. The work per run is therefore
+proportional to the reminders due, not to the number of bookings. A session
+booked after its reminder window has passed does not get that reminder.
+
+Messages for a run are rendered up front, then sent over a single backend
+connection in batches of ``REMINDER_EMAIL_BATCH_SIZE`` with
+``connection.send_messages``. A batch that raises is retried
+``REMINDER_EMAIL_RETRIES`` times (with exponential backoff from
+``REMINDER_EMAIL_RETRY_DELAY`` seconds, reconnecting in between); if it still
+fails, its messages are sent one at a time so a single bad address does not
+hold back the rest.
+
+SignupReminder rows are written with one bulk insert per batch for the
+signups whose message was accepted, so a worker that dies mid-run resends at
+most the batch in flight.
+"""
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .models import Signup, SignupReminder
+
+logger = logging.getLogger(__name__)
+
+DISPATCH_LOCK_KEY = 'reminders:dispatch-lock'
+DISPATCH_LOCK_SECONDS = 600
+
+
+def _signature():
+    return f'{settings.INSTITUTION_NAME}\n{settings.SITE_NAME}'
+
+
+def _when(offset_hours):
+    if offset_hours == 24:
+        return 'tomorrow'
+    return f"in {offset_hours} hour{'s' if offset_hours != 1 else ''}"
+
+
+def render_reminder(signup, offset_hours) -> EmailMessage:
+    """
+    The reminder sent ``offset_hours`` before the session. Reminders sent
+    while the participant can still cancel online include the cancel link.
+    """
+    study, timeslot = signup.timeslot.study, signup.timeslot
+    when = _when(offset_hours)
+    if offset_hours > settings.CANCELLATION_WINDOW_HOURS:
+        body = f'''
+Hello {signup.participant.first_name},
+
+This is a reminder that you have a research study scheduled {when}:
+
+Study: {study.title}
+Time: {timeslot.starts_at.strftime('%A, %B %d at %I:%M %p')}
+Location: {timeslot.location or 'See study details'}
+Duration: {study.duration_minutes} minutes
+
+If you can no longer attend, please cancel as soon as possible at:
+{settings.SITE_URL}/studies/signup/{signup.id}/cancel/
+
+Thank you for participating in research!
+
+{_signature()}
+        '''
+    else:
+        body = f'''
+Hello {signup.participant.first_name},
+
+This is a reminder that you have a research study {when}:
+
+Study: {study.title}
+Time: {timeslot.starts_at.strftime('%I:%M %p')}
+Location: {timeslot.location or 'See study details'}
+
+Please arrive on time. If you cannot attend, it may be too late to cancel online.
+Please contact the researcher directly if you have an emergency.
+
+Thank you!
+
+{_signature()}
+        '''
+    return EmailMessage(
+        subject=f'Reminder: Study {when} - {study.title}',
+        body=body.strip(),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[signup.participant.email],
+    )
+
+
+def reminder_offsets():
+    """Configured REMINDER_HOURS_BEFORE offsets, largest first."""
+    return sorted({int(hours) for hours in settings.REMINDER_HOURS_BEFORE if int(hours) > 0}, reverse=True)
+
+
+def due_signups(offset_hours, now=None):
+    """Booked signups whose ``offset_hours`` reminder is due and not yet sent."""
+    now = now or timezone.now()
+    due_by = now + timedelta(hours=offset_hours)
+    earliest = max(now, due_by - timedelta(minutes=settings.REMINDER_GRACE_MINUTES))
+    sent = SignupReminder.objects.filter(signup=OuterRef('pk'), offset_hours=offset_hours)
+    return (
+        Signup.objects.filter(
+            status='booked',
+            timeslot__starts_at__gt=earliest,
+            timeslot__starts_at__lte=due_by,
+            timeslot__is_cancelled=False,
+        )
+        .exclude(Exists(sent))
+        .select_related('participant', 'timeslot', 'timeslot__study')
+        .order_by('timeslot__starts_at', 'pk')
+    )
+
+
+def _reconnect(connection):
+    try:
+        connection.close()
+    except Exception:
+        pass
+    try:
+        connection.open()
+    except Exception as exc:
+        logger.warning('Could not reopen email connection: %s', exc)
+
+
+def _send_batch(connection, batch, retries, delay):
+    """Send ``batch`` (a list of (key, EmailMessage)); returns (sent keys, failed keys)."""
+    messages = [message for _, message in batch]
+    for attempt in range(retries + 1):
+        try:
+            connection.send_messages(messages)
+            return [key for key, _ in batch], []
+        except Exception as exc:
+            logger.warning('Email batch of %d failed (attempt %d/%d): %s', len(batch), attempt + 1, retries + 1, exc)
+            _reconnect(connection)
+            if attempt < retries and delay:
+                time.sleep(delay * 2 ** attempt)
+    if len(batch) == 1:
+        logger.error('Failed to send email to %s', ', '.join(messages[0].to))
+        return [], [batch[0][0]]
+
+    sent, failed = [], []
+    for key, message in batch:
+        try:
+            connection.send_messages([message])
+            sent.append(key)
+        except Exception as exc:
+            logger.error('Failed to send email to %s: %s', ', '.join(message.to), exc)
+            failed.append(key)
+            _reconnect(connection)
+    return sent, failed
+
+
+def send_in_batches(messages, on_sent, label='emails', batch_size=None, retries=None, delay=None):
+    """
+    Send ``messages`` (a list of (key, EmailMessage)) over one connection,
+    calling ``on_sent(keys)`` after each batch. Returns (sent, failed) counts.
+    """
+    batch_size = batch_size or settings.REMINDER_EMAIL_BATCH_SIZE
+    retries = settings.REMINDER_EMAIL_RETRIES if retries is None else retries
+    delay = settings.REMINDER_EMAIL_RETRY_DELAY if delay is None else delay
+    if not messages:
+        return 0, 0
+
+    sent_total = failed_total = 0
+    connection = get_connection(fail_silently=False)
+    connection.open()
+    try:
+        for number, start in enumerate(range(0, len(messages), batch_size), start=1):
+            batch = messages[start:start + batch_size]
+            began = time.monotonic()
+            sent, failed = _send_batch(connection, batch, retries, delay)
+            if sent:
+                on_sent(sent)
+            elapsed = time.monotonic() - began
+            sent_total += len(sent)
+            failed_total += len(failed)
+            logger.info(
+                '%s batch %d: sent %d, failed %d in %.2fs (%.1f/s)',
+                label, number, len(sent), len(failed), elapsed, len(sent) / elapsed if elapsed else float(len(sent)),
+            )
+    finally:
+        connection.close()
+    return sent_total, failed_total
+
+
+def send_due_reminders(now=None):
+    """Send every due reminder for the configured offsets; returns (sent, failed)."""
+    if not cache.add(DISPATCH_LOCK_KEY, 1, timeout=DISPATCH_LOCK_SECONDS):
+        logger.info('Reminder dispatch already running; skipping')
+        return 0, 0
+    sent_total = failed_total = 0
+    try:
+        for offset_hours in reminder_offsets():
+            messages = [(signup.pk, render_reminder(signup, offset_hours)) for signup in due_signups(offset_hours, now)]
+
+            def record(signup_ids, offset_hours=offset_hours):
+                SignupReminder.objects.bulk_create(
+                    [SignupReminder(signup_id=signup_id, offset_hours=offset_hours) for signup_id in signup_ids],
+                    ignore_conflicts=True,
+                )
+
+            sent, failed = send_in_batches(messages, record, label=f'{offset_hours}h reminders')
+            if failed:
+                logger.warning(
+                    '%d of %d %dh reminders failed and will be retried on the next run',
+                    failed, len(messages), offset_hours,
+                )
+            sent_total += sent
+            failed_total += failed
+    finally:
+        cache.delete(DISPATCH_LOCK_KEY)
+    return sent_total, failed_total
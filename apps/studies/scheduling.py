@@ -0,0 +1,139 @@
+"""
+Recurring timeslot generation.
+
+A TimeslotRecurrence (weekdays x start times between two dates, minus excluded
+dates) is expanded in memory into unsaved Timeslot instances. find_conflicts
+checks them, together with the existing non-cancelled timeslots in the same
+date range (one query), for overlaps in the same location or for the same
+researcher using a sorted sweep per location / researcher. create_timeslots
+inserts the accepted slots with one bulk_create.
+
+Blank locations (online sessions) are not checked for room conflicts.
+"""
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from typing import FrozenSet, List, Tuple
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Timeslot
+
+
+@dataclass(frozen=True)
+class TimeslotRecurrence:
+    start_date: date
+    end_date: date
+    weekdays: FrozenSet[int]  # 0 = Monday
+    start_times: Tuple[time, ...]
+    duration: timedelta
+    capacity: int = 1
+    location: str = ''
+    exclude_dates: FrozenSet[date] = field(default_factory=frozenset)
+
+    def dates(self):
+        day = self.start_date
+        while day <= self.end_date:
+            if day.weekday() in self.weekdays and day not in self.exclude_dates:
+                yield day
+            day += timedelta(days=1)
+
+    def count(self) -> int:
+        return sum(1 for _ in self.dates()) * len(self.start_times)
+
+
+def expand(study, recurrence: TimeslotRecurrence) -> List[Timeslot]:
+    """Unsaved Timeslot instances for ``recurrence``, in start order."""
+    slots = []
+    for day in recurrence.dates():
+        for start_time in sorted(recurrence.start_times):
+            starts_at = timezone.make_aware(datetime.combine(day, start_time))
+            slots.append(Timeslot(
+                study=study,
+                starts_at=starts_at,
+                ends_at=starts_at + recurrence.duration,
+                capacity=recurrence.capacity,
+                location=recurrence.location,
+            ))
+    return slots
+
+
+@dataclass(frozen=True)
+class Conflict:
+    slot: Timeslot  # generated slot
+    other_start: datetime
+    other_end: datetime
+    reason: str  # 'location' or 'researcher'
+    other_study_id: object = None
+    other_is_new: bool = False
+
+
+def _location_key(location):
+    return (location or '').strip().lower()
+
+
+def find_conflicts(study, slots: List[Timeslot]) -> List[Conflict]:
+    """
+    Overlaps between ``slots`` and existing non-cancelled timeslots (or each
+    other) in the same location or run by ``study.researcher``.
+    """
+    if not slots:
+        return []
+    window_start = min(slot.starts_at for slot in slots)
+    window_end = max(slot.ends_at for slot in slots)
+    locations = {_location_key(slot.location) for slot in slots} - {''}
+    researcher_id = study.researcher_id
+
+    scope = Q()
+    for location in {slot.location.strip() for slot in slots if _location_key(slot.location)}:
+        scope |= Q(location__iexact=location)
+    if researcher_id:
+        scope |= Q(study__researcher_id=researcher_id)
+    existing = []
+    if locations or researcher_id:
+        existing = list(
+            Timeslot.objects.filter(scope, is_cancelled=False, starts_at__lt=window_end, ends_at__gt=window_start)
+            .values_list('study_id', 'study__researcher_id', 'location', 'starts_at', 'ends_at')
+        )
+
+    # group key -> [(start, end, slot or None, study_id)]
+    groups = {}
+    for slot in slots:
+        if _location_key(slot.location):
+            groups.setdefault(('location', _location_key(slot.location)), []).append(
+                (slot.starts_at, slot.ends_at, slot, study.pk))
+        if researcher_id:
+            groups.setdefault(('researcher', researcher_id), []).append((slot.starts_at, slot.ends_at, slot, study.pk))
+    for study_id, owner_id, location, starts_at, ends_at in existing:
+        if _location_key(location) in locations:
+            groups.setdefault(('location', _location_key(location)), []).append((starts_at, ends_at, None, study_id))
+        if researcher_id and owner_id == researcher_id:
+            groups.setdefault(('researcher', researcher_id), []).append((starts_at, ends_at, None, study_id))
+
+    conflicts = []
+    for (reason, _), intervals in groups.items():
+        intervals.sort(key=lambda interval: (interval[0], interval[1]))
+        latest = None  # the interval seen so far that ends last
+        for interval in intervals:
+            if latest is not None and interval[0] < latest[1] and (interval[2] is not None or latest[2] is not None):
+                new, other = (interval, latest) if interval[2] is not None else (latest, interval)
+                conflicts.append(Conflict(
+                    slot=new[2], other_start=other[0], other_end=other[1], reason=reason,
+                    other_study_id=other[3], other_is_new=other[2] is not None,
+                ))
+            if latest is None or interval[1] > latest[1]:
+                latest = interval
+    conflicts.sort(key=lambda conflict: conflict.slot.starts_at)
+    return conflicts
+
+
+def create_timeslots(slots: List[Timeslot], batch_size=500) -> List[Timeslot]:
+    """Insert ``slots`` in one transaction (one INSERT per ``batch_size`` rows)."""
+    from .calendar_feeds import bump_feed_versions
+
+    with transaction.atomic():
+        created = Timeslot.objects.bulk_create(slots, batch_size=batch_size)
+        researcher_ids = {slot.study.researcher_id for slot in created}
+        transaction.on_commit(lambda: bump_feed_versions(researcher_ids))
+    return created
@@ -2,15 +2,25 @@
 Signal handlers for IRB audit logging.
 
 Note: Signal-created AuditLog entries do not include ip_address or user_agent
-because signals have no request context. For view-created audit entries,
-pass request.META.get('REMOTE_ADDR') and request.META.get('HTTP_USER_AGENT', '')
-when creating AuditLog from a view.
+because signals have no request context. View-created audit entries pass
+request= to apps.credits.audit.record, which fills both in.
 """
-from django.db.models.signals import pre_save, post_save
+import logging
+
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
 from django.utils import timezone
-from .models import Study, Signup
-from apps.credits.models import AuditLog
+from django.db import transaction
+from .models import Study, Signup, Timeslot
+from apps.courses.models import Enrollment
+from apps.credits import audit
+
+logger = logging.getLogger(__name__)
+
+# Study fields that change which participants the eligibility index lists for it
+ELIGIBILITY_INDEX_FIELDS = (
+    'eligibility', 'is_active', 'is_approved', 'is_classroom_based', 'irb_status', 'irb_expiration',
+)
 
 
 @receiver(pre_save, sender=Study)
@@ -30,6 +40,13 @@ def track_irb_changes(sender, instance, **kwargs):
             if old_instance.is_approved != instance.is_approved:
                 instance._approval_changed = True
                 instance._old_approval = old_instance.is_approved
+            
+            # Eligibility rules or anything that opens/closes the study for signup
+            if any(
+                getattr(old_instance, field) != getattr(instance, field)
+                for field in ELIGIBILITY_INDEX_FIELDS
+            ):
+                instance._eligibility_changed = True
                 
         except Study.DoesNotExist:
             pass
@@ -41,7 +58,7 @@ def log_irb_changes(sender, instance, created, **kwargs):
     
     if created:
         # New study created
-        AuditLog.objects.create(
+        audit.record(
             actor=instance.researcher,
             action='study_created',
             entity='study',
@@ -55,7 +72,7 @@ def log_irb_changes(sender, instance, created, **kwargs):
     else:
         # Check for IRB status change
         if hasattr(instance, '_irb_status_changed'):
-            AuditLog.objects.create(
+            audit.record(
                 actor=instance.irb_last_reviewed_by,
                 action='irb_status_changed',
                 entity='study',
@@ -72,7 +89,7 @@ def log_irb_changes(sender, instance, created, **kwargs):
         # Check for approval status change
         if hasattr(instance, '_approval_changed'):
             action = 'study_approved' if instance.is_approved else 'study_deactivated'
-            AuditLog.objects.create(
+            audit.record(
                 actor=instance.irb_approved_by if instance.is_approved else instance.irb_last_reviewed_by,
                 action=action,
                 entity='study',
@@ -89,7 +106,7 @@ def log_irb_changes(sender, instance, created, **kwargs):
 def log_participant_consent(sender, instance, created, **kwargs):
     """Log participant consent when a signup is created (IRB / 45 CFR 46)."""
     if created:
-        AuditLog.objects.create(
+        audit.record(
             actor=instance.participant,
             action='participant_consent',
             entity='signup',
@@ -100,3 +117,87 @@ def log_participant_consent(sender, instance, created, **kwargs):
             },
         )
 
+
+@receiver(post_save, sender=Study)
+@receiver(post_delete, sender=Study)
+def invalidate_submit_study_cache(sender, instance, **kwargs):
+    """Drop the cached submission lookup so approval/activation changes apply immediately."""
+    from .ingest import invalidate_study
+    invalidate_study(instance.pk)
+
+
+@receiver(post_delete, sender=Signup)
+def release_deleted_signup_seat(sender, instance, **kwargs):
+    """Keep Timeslot.active_signup_count in step when an active signup row is deleted."""
+    from django.db.models import F
+    from .models import Timeslot
+
+    if instance.status != 'cancelled':
+        Timeslot.objects.filter(pk=instance.timeslot_id, active_signup_count__gt=0).update(
+            active_signup_count=F('active_signup_count') - 1
+        )
+        # Refill from the waitlist only when the signup itself was deleted, not
+        # when it goes away with its timeslot, study or participant.
+        origin = kwargs.get('origin')
+        if isinstance(origin, Signup) or getattr(origin, 'model', None) is Signup:
+            timeslot = Timeslot.objects.filter(pk=instance.timeslot_id).first()
+            if timeslot is not None:
+                timeslot.promote_waitlist()
+
+
+@receiver(post_save, sender=Study)
+def reindex_study_eligibility_on_change(sender, instance, created, **kwargs):
+    """Queue an eligibility index rebuild for new studies and rule/approval changes."""
+    if not (created or getattr(instance, '_eligibility_changed', False)):
+        return
+    from .tasks import reindex_study_eligibility
+
+    study_id = str(instance.pk)
+
+    def enqueue():
+        try:
+            reindex_study_eligibility.delay(study_id)
+        except Exception:
+            logger.warning('Could not queue eligibility reindex for study %s; running inline', study_id)
+            reindex_study_eligibility(study_id)
+
+    transaction.on_commit(enqueue)
+
+
+@receiver(post_save, sender=Signup)
+@receiver(post_delete, sender=Signup)
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+def reindex_participant_eligibility(sender, instance, **kwargs):
+    """Signup history and course enrollment feed eligibility rules: refresh the participant's index."""
+    if sender is Signup and not kwargs.get('created', True):
+        return  # Status edits go through Signup.cancel(), which reindexes itself
+    # Skip cascades: the participant (or the study) may be going away in the same delete
+    origin = kwargs.get('origin')
+    if 'origin' in kwargs and not (isinstance(origin, sender) or getattr(origin, 'model', None) is sender):
+        return
+    from .eligibility import reindex_participant
+    reindex_participant(instance.participant_id)
+
+
+def _bump_calendar_feeds(user_ids):
+    from .calendar_feeds import bump_feed_versions
+    user_ids = set(user_ids)
+    transaction.on_commit(lambda: bump_feed_versions(user_ids))
+
+
+@receiver(post_save, sender=Signup)
+@receiver(post_delete, sender=Signup)
+def invalidate_signup_calendar_feeds(sender, instance, **kwargs):
+    """A signup shows in the participant's feed and in the researcher's seat counts."""
+    researcher_ids = Timeslot.objects.filter(pk=instance.timeslot_id).values_list('study__researcher_id', flat=True)
+    _bump_calendar_feeds([instance.participant_id, *researcher_ids])
+
+
+@receiver(post_save, sender=Timeslot)
+@receiver(post_delete, sender=Timeslot)
+def invalidate_timeslot_calendar_feeds(sender, instance, **kwargs):
+    """Time, location or cancellation changes reach the researcher and every booked participant."""
+    participant_ids = Signup.objects.filter(timeslot_id=instance.pk).values_list('participant_id', flat=True)
+    researcher_ids = Study.objects.filter(pk=instance.study_id).values_list('researcher_id', flat=True)
+    _bump_calendar_feeds([*participant_ids, *researcher_ids])
@@ -6,17 +6,24 @@ import json
 import logging
 import subprocess
 import tempfile
+import time
+from collections import Counter
 from pathlib import Path
 
 from celery import shared_task
+from django.db import connection, transaction
+from django.db.models import Count, F, Max, Q
 from django.utils import timezone
 from django.core.mail import send_mail
 from django.conf import settings
 from datetime import timedelta
+from itertools import groupby
+from operator import itemgetter
 from typing import Tuple
 
-from .models import Signup, Study, Response, IRBReviewerAssignment, StudyUpdate, ProtocolSubmission
-import importlib
+from .models import Signup, Study, Timeslot, Response, AnalysisRun, IRBReviewerAssignment, StudyUpdate, ProtocolSubmission
+from .analysis.executor import PluginExecutionError, get_executor
+from . import reminders
 
 logger = logging.getLogger(__name__)
 
@@ -316,123 +323,170 @@ If you received this message, no further action is necessary.
 
 
 @shared_task
-def send_24h_reminders():
-    """Send 24-hour reminders for upcoming sessions."""
-    now = timezone.now()
-    start_window = now + timedelta(hours=23, minutes=30)
-    end_window = now + timedelta(hours=24, minutes=30)
-    
-    signups = Signup.objects.filter(
-        status='booked',
-        reminder_24h_sent=False,
-        timeslot__starts_at__gte=start_window,
-        timeslot__starts_at__lt=end_window,
-        timeslot__is_cancelled=False
-    ).select_related('participant', 'timeslot', 'timeslot__study')
-    
-    count = 0
-    for signup in signups:
-        try:
-            send_mail(
-                subject=f'Reminder: Study tomorrow - {signup.timeslot.study.title}',
-                message=f'''
-Hello {signup.participant.first_name},
+def send_due_reminders():
+    """Send the reminders due for every REMINDER_HOURS_BEFORE offset."""
+    sent, failed = reminders.send_due_reminders()
+    return f"Sent {sent} reminders" + (f" ({failed} failed)" if failed else "")
 
-This is a reminder that you have a research study scheduled tomorrow:
 
-Study: {signup.timeslot.study.title}
-Time: {signup.timeslot.starts_at.strftime('%A, %B %d at %I:%M %p')}
-Location: {signup.timeslot.location or 'See study details'}
-Duration: {signup.timeslot.study.duration_minutes} minutes
+def _update_returning_supported():
+    if connection.vendor == 'postgresql':
+        return True
+    return connection.vendor == 'sqlite' and connection.Database.sqlite_version_info >= (3, 35)
 
-If you can no longer attend, please cancel as soon as possible at:
-{settings.SITE_URL}/studies/signup/{signup.id}/cancel/
 
-Thank you for participating in research!
+def _flag_missed_signups(cutoff):
+    """
+    Set status='no_show' on booked signups whose timeslot ended before
+    ``cutoff``; returns [(signup id, participant id, timeslot id)] for the rows
+    changed. One UPDATE ... RETURNING where the database supports it.
+    """
+    overdue = Timeslot.objects.filter(ends_at__lt=cutoff).values('pk')
+    if not _update_returning_supported():
+        rows = list(
+            Signup.objects.select_for_update()
+            .filter(status='booked', timeslot__in=overdue)
+            .values_list('pk', 'participant_id', 'timeslot_id')
+        )
+        Signup.objects.filter(pk__in=[row[0] for row in rows], status='booked').update(status='no_show')
+        return rows
+
+    quote = connection.ops.quote_name
+    overdue_sql, overdue_params = overdue.query.sql_with_params()
+    sql = (
+        f"UPDATE {quote(Signup._meta.db_table)} SET {quote('status')} = %s "
+        f"WHERE {quote('status')} = %s AND {quote('timeslot_id')} IN ({overdue_sql}) "
+        f"RETURNING {quote('id')}, {quote('participant_id')}, {quote('timeslot_id')}"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, ['no_show', 'booked', *overdue_params])
+        returned = cursor.fetchall()
+    as_signup_id = Signup._meta.pk.to_python
+    as_user_id = Signup._meta.get_field('participant').target_field.to_python
+    as_timeslot_id = Timeslot._meta.pk.to_python
+    return [(as_signup_id(a), as_user_id(b), as_timeslot_id(c)) for a, b, c in returned]
 
-{settings.INSTITUTION_NAME}
-{settings.SITE_NAME}
-                '''.strip(),
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[signup.participant.email],
-                fail_silently=False,
+
+@shared_task
+def mark_missed_sessions():
+    """
+    Mark no-shows for sessions that have passed.
+
+    Set-based: one UPDATE of signup statuses, one profile UPDATE per distinct
+    no-show increment and one bulk audit insert, all in a single transaction.
+    Seats stay taken (no-shows count against capacity), so timeslot counters
+    are unchanged. Signup post_save signals do not fire.
+    """
+    from apps.accounts.models import Profile
+    from apps.credits import chain
+    from apps.credits.models import AuditLog
+
+    started = time.monotonic()
+    cutoff = timezone.now() - timedelta(hours=1)  # Grace period
+
+    with transaction.atomic():
+        rows = _flag_missed_signups(cutoff)
+        if rows:
+            per_participant = Counter(participant_id for _, participant_id, _ in rows)
+            by_increment = {}
+            for participant_id, n in per_participant.items():
+                by_increment.setdefault(n, []).append(participant_id)
+            for n, participant_ids in by_increment.items():
+                Profile.objects.filter(user_id__in=participant_ids).update(no_show_count=F('no_show_count') + n)
+
+            study_ids = dict(
+                Timeslot.objects.filter(pk__in={timeslot_id for _, _, timeslot_id in rows}).values_list('pk', 'study_id')
             )
-            signup.reminder_24h_sent = True
-            signup.save(update_fields=['reminder_24h_sent'])
-            count += 1
-        except Exception as e:
-            print(f"Failed to send 24h reminder to {signup.participant.email}: {e}")
-    
-    return f"Sent {count} 24-hour reminders"
+            chain.append(
+                [
+                    AuditLog(
+                        action='signup_no_show',
+                        entity='signup',
+                        entity_id=signup_id,
+                        metadata={
+                            'participant_id': str(participant_id),
+                            'study_id': str(study_ids.get(timeslot_id)),
+                            'source': 'mark_missed_sessions',
+                        },
+                    )
+                    for signup_id, participant_id, timeslot_id in rows
+                ],
+                batch_size=1000,
+            )
+
+    elapsed = time.monotonic() - started
+    participants = len({participant_id for _, participant_id, _ in rows})
+    logger.info('Marked %d no-shows for %d participants in %.2fs', len(rows), participants, elapsed)
+    return f"Marked {len(rows)} no-shows for {participants} participants in {elapsed:.2f}s"
 
 
 @shared_task
-def send_2h_reminders():
-    """Send 2-hour reminders for upcoming sessions."""
-    now = timezone.now()
-    start_window = now + timedelta(hours=1, minutes=45)
-    end_window = now + timedelta(hours=2, minutes=15)
-    
-    signups = Signup.objects.filter(
-        status='booked',
-        reminder_2h_sent=False,
-        timeslot__starts_at__gte=start_window,
-        timeslot__starts_at__lt=end_window,
-        timeslot__is_cancelled=False
-    ).select_related('participant', 'timeslot', 'timeslot__study')
-    
-    count = 0
-    for signup in signups:
-        try:
-            send_mail(
-                subject=f'Reminder: Study in 2 hours - {signup.timeslot.study.title}',
-                message=f'''
+def notify_waitlist_promotion(signup_id):
+    """Tell a participant that a waitlist spot opened and they are now booked."""
+    signup = Signup.objects.filter(pk=signup_id).select_related('participant', 'timeslot', 'timeslot__study').first()
+    if signup is None or signup.status != 'booked':
+        return "Signup no longer booked"
+    timeslot, study = signup.timeslot, signup.timeslot.study
+    try:
+        send_mail(
+            subject=f'You are booked: {study.title}',
+            message=f'''
 Hello {signup.participant.first_name},
 
-This is a reminder that you have a research study in 2 hours:
+A spot opened up and you have been moved from the waitlist to a booking:
 
-Study: {signup.timeslot.study.title}
-Time: {signup.timeslot.starts_at.strftime('%I:%M %p today')}
-Location: {signup.timeslot.location or 'See study details'}
-
-Please arrive on time. If you cannot attend, it may be too late to cancel online.
-Please contact the researcher directly if you have an emergency.
+Study: {study.title}
+Time: {timeslot.starts_at.strftime('%A, %B %d at %I:%M %p')}
+Location: {timeslot.location or 'See study details'}
+Duration: {study.duration_minutes} minutes
 
-Thank you!
+If you can no longer attend, please cancel as soon as possible at:
+{settings.SITE_URL}/studies/signup/{signup.id}/cancel/
 
 {settings.INSTITUTION_NAME}
 {settings.SITE_NAME}
-                '''.strip(),
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[signup.participant.email],
-                fail_silently=False,
-            )
-            signup.reminder_2h_sent = True
-            signup.save(update_fields=['reminder_2h_sent'])
-            count += 1
-        except Exception as e:
-            print(f"Failed to send 2h reminder to {signup.participant.email}: {e}")
-    
-    return f"Sent {count} 2-hour reminders"
+            '''.strip(),
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            recipient_list=[signup.participant.email],
+            fail_silently=False,
+        )
+    except Exception as exc:
+        logger.error('Failed to send waitlist promotion notice for signup %s: %s', signup_id, exc)
+        return "Failed to send waitlist promotion notice"
+    return f"Sent waitlist promotion notice to {signup.participant.email}"
 
 
-@shared_task
-def mark_missed_sessions():
-    """Mark no-shows for sessions that have passed."""
-    now = timezone.now()
-    cutoff = now - timedelta(hours=1)  # Grace period
-    
-    missed_signups = Signup.objects.filter(
-        status='booked',
-        timeslot__ends_at__lt=cutoff
-    )
-    
-    count = 0
-    for signup in missed_signups:
-        signup.mark_no_show()
-        count += 1
-    
-    return f"Marked {count} no-shows"
+def _evaluate_study(study, payloads, n, executor):
+    """
+    Run the study's analysis plugin on ``payloads``.
+
+    Returns (unsaved AnalysisRun, PluginExecutionError or None); ``run.bf`` is
+    None when the plugin failed.
+    """
+    run = AnalysisRun(study=study, plugin=study.analysis_plugin, sample_size=n)
+    try:
+        result = executor.run(study.analysis_plugin, payloads, params={})
+    except PluginExecutionError as e:
+        run.status = 'error' if e.kind in ('load', 'compute', 'crash') else e.kind
+        run.duration_ms = 0.0
+        run.error = str(e)
+        return run, e
+    run.bf = result.bf
+    run.duration_ms = result.duration_ms
+    run.compute_ms = result.compute_ms
+    return run, None
+
+
+def _notify_threshold_reached(study):
+    """Notify the researcher (and optionally queue post-decision analysis) once BF crosses the threshold."""
+    # Send notification (call directly to avoid Celery setup issues)
+    try:
+        notification_result = send_bf_notification(str(study.id))
+    except Exception as e:
+        notification_result = f"Notification failed: {e}"
+    if getattr(study, 'run_analysis_on_threshold', False):
+        run_post_decision_analysis.delay(str(study.id))
+    return notification_result
 
 
 @shared_task
@@ -442,10 +496,10 @@ def run_sequential_bayes_monitoring(study_id):
     
     This task:
     1. Checks if monitoring is enabled and minimum N is reached
-    2. Loads the analysis plugin
-    3. Computes the Bayes Factor with all responses
-    4. Updates the study's current_bf
-    5. Sends notification if BF >= threshold (and not already notified)
+    2. Computes the Bayes Factor with all responses in the sandboxed plugin
+       executor (see apps.studies.analysis.executor) and records an AnalysisRun
+    3. Updates the study's current_bf
+    4. Sends notification if BF >= threshold (and not already notified)
     """
     try:
         study = Study.objects.get(id=study_id)
@@ -461,42 +515,128 @@ def run_sequential_bayes_monitoring(study_id):
     if n < study.min_sample_size:
         return f"Study {study.slug}: N={n} < min_sample_size={study.min_sample_size}, skipping monitoring"
     
-    # Load analysis plugin
-    try:
-        module_path, func_name = study.analysis_plugin.rsplit(':', 1)
-        module = importlib.import_module(module_path)
-        compute_bf = getattr(module, func_name)
-    except Exception as e:
-        return f"Study {study.slug}: Failed to load analysis plugin: {e}"
-    
-    # Get all responses
-    responses = list(study.responses.order_by('created_at').values_list('payload', flat=True))
-    
-    # Compute BF
-    try:
-        bf_value = compute_bf(responses, params={})
-        study.current_bf = bf_value
-        study.save(update_fields=['current_bf'])
-    except Exception as e:
-        return f"Study {study.slug}: Failed to compute BF: {e}"
-    
+    evaluated_at = timezone.now()
+    responses = study.responses.order_by('created_at').values_list('payload', flat=True)
+    run, error = _evaluate_study(study, responses, n, get_executor())
+    run.save()
+    study.monitoring_last_evaluated_at = evaluated_at
+    if error is not None:
+        study.save(update_fields=['monitoring_last_evaluated_at'])
+        if error.kind == 'load':
+            return f"Study {study.slug}: Failed to load analysis plugin: {error}"
+        return f"Study {study.slug}: Failed to compute BF: {error}"
+
+    bf_value = run.bf
+    study.current_bf = bf_value
+    study.save(update_fields=['current_bf', 'monitoring_last_evaluated_at'])
+
     # Check if we should notify
     if bf_value >= study.bf_threshold and not study.monitoring_notified:
-        # Send notification (call directly to avoid Celery setup issues)
-        try:
-            notification_result = send_bf_notification(study_id)
-        except Exception as e:
-            notification_result = f"Notification failed: {e}"
-        
         study.monitoring_notified = True
         study.save(update_fields=['monitoring_notified'])
-        if getattr(study, 'run_analysis_on_threshold', False):
-            run_post_decision_analysis.delay(str(study.id))
+        notification_result = _notify_threshold_reached(study)
         return f"Study {study.slug}: BF={bf_value:.2f} >= {study.bf_threshold}, notification: {notification_result}"
     
     return f"Study {study.slug}: BF={bf_value:.2f}, N={n}"
 
 
+@shared_task
+def sweep_bayes_monitoring():
+    """
+    Evaluate every monitored study that has new responses since its last evaluation.
+
+    Runs in a fixed number of queries regardless of how many studies are due:
+    one grouped query picks the studies (response count and latest response per
+    study), one query streams all their payloads in study order, then results
+    are written back with bulk_update / bulk_create. Plugins run in the shared
+    executor pool, so each plugin is imported once per worker process.
+    """
+    evaluated_at = timezone.now()
+    due = list(
+        Study.objects.filter(monitoring_enabled=True)
+        .annotate(n_responses=Count('responses'), latest_response_at=Max('responses__created_at'))
+        .filter(n_responses__gte=F('min_sample_size'))
+        .filter(
+            Q(monitoring_last_evaluated_at__isnull=True)
+            | Q(latest_response_at__gt=F('monitoring_last_evaluated_at'))
+        )
+    )
+    if not due:
+        return "No studies due for monitoring"
+
+    studies_by_id = {study.id: study for study in due}
+    payload_rows = (
+        Response.objects.filter(study_id__in=studies_by_id, created_at__lte=evaluated_at)
+        .order_by('study_id', 'created_at')
+        .values_list('study_id', 'payload')
+        .iterator(chunk_size=2000)
+    )
+
+    executor = get_executor()
+    runs, crossed = [], []
+    for study_id, rows in groupby(payload_rows, key=itemgetter(0)):
+        study = studies_by_id[study_id]
+        payloads = [payload for _, payload in rows]
+        run, error = _evaluate_study(study, payloads, len(payloads), executor)
+        runs.append(run)
+        study.monitoring_last_evaluated_at = evaluated_at
+        if error is not None:
+            logger.warning("Monitoring sweep: study %s failed: %s", study.slug, error)
+            continue
+        study.current_bf = run.bf
+        if run.bf >= study.bf_threshold and not study.monitoring_notified:
+            study.monitoring_notified = True
+            crossed.append(study)
+
+    Study.objects.bulk_update(due, ['current_bf', 'monitoring_notified', 'monitoring_last_evaluated_at'])
+    AnalysisRun.objects.bulk_create(runs)
+    for study in crossed:
+        _notify_threshold_reached(study)
+
+    failed = sum(1 for run in runs if run.bf is None)
+    return f"Evaluated {len(runs)} studies ({failed} failed, {len(crossed)} reached threshold)"
+
+
+@shared_task
+def flush_response_buffer():
+    """
+    Move responses accepted in buffered ingestion mode into the responses table.
+
+    Queues one monitoring run per monitored study that received responses,
+    instead of one per submission.
+    """
+    from . import ingest
+
+    if not ingest.is_buffered():
+        return "Response ingestion is direct; nothing to flush"
+    flushed, study_ids = ingest.flush(time_budget=ingest.FLUSH_TIME_BUDGET_SECONDS)
+    monitored = Study.objects.filter(pk__in=study_ids, monitoring_enabled=True).values_list('pk', flat=True)
+    for study_id in monitored:
+        run_sequential_bayes_monitoring.delay(str(study_id))
+    return f"Flushed {flushed} buffered responses for {len(study_ids)} studies"
+
+
+@shared_task
+def reindex_study_eligibility(study_id):
+    """Rebuild one study's rows in the eligible-study index (after rule or approval changes)."""
+    from .eligibility import reindex_study
+
+    study = Study.objects.filter(pk=study_id).first()
+    if study is None:
+        return f"Study {study_id} not found"
+    added, removed = reindex_study(study)
+    return f"Eligibility index for {study.slug}: +{added} -{removed}"
+
+
+@shared_task
+def refresh_eligibility_index():
+    """Daily: drop index rows for studies closed by IRB expiration, re-evaluate age rules."""
+    from .eligibility import refresh_index
+
+    reindexed, removed = refresh_index()
+    return f"Reindexed {reindexed} studies with age rules; removed {removed} rows for closed studies"
+
+
 def _run_post_decision_r_script(study, data_path: Path, script_path: Path) -> Tuple[bool, str]:
     """Run R script with Rscript; pass data_path and study_id as args. Returns (success, message)."""
     try:
@@ -0,0 +1,36 @@
+"""Analysis plugins used by the executor tests (imported inside worker subprocesses)."""
+import time
+
+
+def sleepy_bf(responses, params):
+    time.sleep(params.get('seconds', 10))
+    return 1.0
+
+
+def greedy_bf(responses, params):
+    blocks = []
+    while True:
+        blocks.append(bytearray(16 * 1024 * 1024))
+        time.sleep(0.01)
+
+
+def row_count_bf(responses, params):
+    return float(len(responses))
+
+
+def chatty_bf(responses, params):
+    print('computing on', len(responses), 'rows')
+    return float(len(responses))
+
+
+def compute_bf_columns(columns, n, params):
+    """Columnar variant of a ``compute_bf`` this module does not define; no plugin here may use it."""
+    return -1.0
+
+
+def column_count_bf(responses, params):
+    return float(len(responses))
+
+
+def column_count_bf_columns(columns, n, params):
+    return n + 0.5
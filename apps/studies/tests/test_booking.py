@@ -0,0 +1,90 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.accounts.models import User
+from apps.studies.models import Signup, Study, Timeslot, TimeslotFull
+
+
+class TimeslotCounterTests(TestCase):
+    def setUp(self):
+        self.study = Study.objects.create(
+            title='Lab Study',
+            description='Booking test.',
+            mode='lab',
+            consent_text='Consent.',
+            is_active=True,
+            is_approved=True,
+            irb_status='approved',
+        )
+        start = timezone.now() + timedelta(days=3)
+        self.timeslot = Timeslot.objects.create(
+            study=self.study, starts_at=start, ends_at=start + timedelta(hours=1), capacity=2,
+        )
+        self.participants = [
+            User.objects.create_user(
+                email=f'p{i}@example.com', password='password123', first_name='P', last_name=str(i),
+                role='participant',
+            )
+            for i in range(3)
+        ]
+
+    def test_book_fills_slot_and_stale_instances_cannot_overbook(self):
+        stale = Timeslot.objects.get(pk=self.timeslot.pk)
+        self.timeslot.book(self.participants[0], consent_text_version='c')
+        self.timeslot.book(self.participants[1], consent_text_version='c')
+        # The stale copy still reads 0 seats taken; the guarded UPDATE refuses anyway.
+        self.assertFalse(stale.is_full)
+        with self.assertRaises(TimeslotFull):
+            stale.book(self.participants[2], consent_text_version='c')
+        self.timeslot.refresh_from_db()
+        self.assertEqual(self.timeslot.active_signup_count, 2)
+        with self.assertNumQueries(0):
+            self.assertTrue(self.timeslot.is_full)
+            self.assertEqual(self.timeslot.available_capacity, 0)
+
+    def test_duplicate_booking_gives_the_seat_back(self):
+        self.timeslot.book(self.participants[0], consent_text_version='c')
+        with self.assertRaises(IntegrityError):
+            self.timeslot.book(self.participants[0], consent_text_version='c')
+        self.timeslot.refresh_from_db()
+        self.assertEqual(self.timeslot.active_signup_count, 1)
+
+    def test_cancel_and_delete_release_seats_once(self):
+        first = self.timeslot.book(self.participants[0], consent_text_version='c')
+        second = self.timeslot.book(self.participants[1], consent_text_version='c')
+        first.cancel()
+        Signup.objects.get(pk=first.pk).cancel()
+        second.mark_no_show()
+        self.timeslot.refresh_from_db()
+        self.assertEqual(self.timeslot.active_signup_count, 1)
+        second.delete()
+        self.timeslot.refresh_from_db()
+        self.assertEqual(self.timeslot.active_signup_count, 0)
+        self.assertEqual(self.study.available_slots, 2)
+
+    def test_book_timeslot_view(self):
+        self.timeslot.capacity = 1
+        self.timeslot.save()
+        url = reverse('studies:book_timeslot', args=[self.timeslot.pk])
+        self.client.force_login(self.participants[0])
+        self.assertRedirects(self.client.post(url), reverse('studies:my_bookings'), fetch_redirect_response=False)
+        self.client.force_login(self.participants[1])
+        self.client.post(url)
+        self.assertEqual(Signup.objects.filter(timeslot=self.timeslot).count(), 1)
+
+    def test_repair_command(self):
+        Signup.objects.create(timeslot=self.timeslot, participant=self.participants[0], consent_text_version='c')
+        Signup.objects.create(
+            timeslot=self.timeslot, participant=self.participants[1], consent_text_version='c', status='cancelled',
+        )
+        out = StringIO()
+        call_command('repair_signup_counters', stdout=out)
+        self.assertIn('Repaired 1', out.getvalue())
+        self.timeslot.refresh_from_db()
+        self.assertEqual(self.timeslot.active_signup_count, 1)
@@ -0,0 +1,86 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.accounts.models import User
+from apps.studies.models import Response, Signup, Study, Timeslot
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class StudyBrowseQueryTests(TestCase):
+    def setUp(self):
+        self.researcher = User.objects.create_user(
+            email='browse@example.com', password='password123', first_name='Bro', last_name='Wse',
+            role='researcher',
+        )
+        self.admin = User.objects.create_superuser(
+            email='admin@example.com', password='password123', first_name='Ad', last_name='Min',
+        )
+        self.participants = [
+            User.objects.create_user(
+                email=f'browse-p{i}@example.com', password='password123', first_name='P', last_name=str(i),
+                role='participant',
+            )
+            for i in range(2)
+        ]
+        self.add_study()
+
+    def add_study(self):
+        index = Study.objects.count()
+        study = Study.objects.create(
+            title=f'Browse Study {index}',
+            description='Browse stats test.',
+            mode='lab',
+            researcher=self.researcher,
+            consent_text='Consent.',
+            is_active=True,
+            is_approved=True,
+            irb_status='approved',
+        )
+        start = timezone.now() + timedelta(days=2)
+        for offset in range(2):
+            timeslot = Timeslot.objects.create(
+                study=study,
+                starts_at=start + timedelta(hours=offset),
+                ends_at=start + timedelta(hours=offset, minutes=30),
+                capacity=3,
+            )
+        timeslot.book(self.participants[0], consent_text_version='c')
+        Response.objects.create(study=study, payload={'x': 1})
+        return study
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def assertConstantQueries(self, url, user):
+        self.client.force_login(user)
+        self.client.get(url)  # warm-up: first visit builds a participant's eligibility index
+        one = self.count_queries(url)
+        for _ in range(3):
+            self.add_study()
+        self.assertEqual(self.count_queries(url), one)
+
+    def test_with_browse_stats(self):
+        Signup.objects.filter(timeslot__study__isnull=False).update(status='cancelled')
+        study = Study.objects.with_browse_stats().get()
+        with self.assertNumQueries(0):
+            self.assertEqual(study.total_signups, 1)
+            self.assertEqual(study.response_count, 1)
+            # Counter still counts the signup: the bulk update above bypassed Signup.cancel().
+            self.assertEqual(study.available_slots, 5)
+
+    def test_study_list_is_constant(self):
+        self.assertConstantQueries(reverse('studies:list'), self.participants[1])
+
+    def test_researcher_dashboard_is_constant(self):
+        self.assertConstantQueries(reverse('studies:researcher_dashboard'), self.researcher)
+
+    def test_admin_changelist_is_constant(self):
+        self.assertConstantQueries(reverse('admin:studies_study_changelist'), self.admin)
@@ -0,0 +1,87 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.accounts.models import User
+from apps.studies.calendar_feeds import feed_token
+from apps.studies.models import Study, Timeslot
+
+
+class CalendarFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.researcher = User.objects.create_user(
+            email='ics-r@example.com', password='password123', first_name='Res', last_name='Earcher', role='researcher',
+        )
+        self.participant = User.objects.create_user(
+            email='ics-p@example.com', password='password123', first_name='Par', last_name='Ticipant',
+            role='participant',
+        )
+        study = Study.objects.create(
+            title='Memory, Attention; Sleep', description='Feed test.', mode='lab', consent_text='Consent.',
+            researcher=self.researcher, is_active=True, is_approved=True, irb_status='approved',
+        )
+        start = timezone.now() + timedelta(days=2)
+        self.timeslot = Timeslot.objects.create(
+            study=study, starts_at=start, ends_at=start + timedelta(hours=1), capacity=2, location='Room 101',
+        )
+        self.signup = self.timeslot.book(self.participant, consent_text_version='c')
+
+    def url(self, user):
+        return reverse('studies:calendar_feed', args=[feed_token(user)])
+
+    def test_participant_feed_and_conditional_get(self):
+        response = self.client.get(self.url(self.participant))
+        self.assertEqual(response['Content-Type'], 'text/calendar; charset=utf-8')
+        body = response.content.decode()
+        self.assertIn('BEGIN:VEVENT', body)
+        self.assertIn('SUMMARY:Memory\\, Attention\\; Sleep', body)
+        self.assertIn('LOCATION:Room 101', body)
+
+        with CaptureQueriesContext(connection) as ctx:
+            cached = self.client.get(self.url(self.participant), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached['ETag'], response['ETag'])
+        self.assertFalse([q for q in ctx.captured_queries if 'signups' in q['sql'] or 'users' in q['sql']])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.signup.cancel()
+        changed = self.client.get(self.url(self.participant), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotIn('BEGIN:VEVENT', changed.content.decode())
+
+    def test_researcher_feed_shows_seat_counts(self):
+        body = self.client.get(self.url(self.researcher)).content.decode()
+        self.assertIn('(1/2)', body)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.timeslot.location = 'Room 202'
+            self.timeslot.save()
+        self.assertIn('LOCATION:Room 202', self.client.get(self.url(self.researcher)).content.decode())
+        self.assertIn('LOCATION:Room 202', self.client.get(self.url(self.participant)).content.decode())
+
+    def test_invalid_token(self):
+        self.assertEqual(self.client.get(reverse('studies:calendar_feed', args=['nope:abc'])).status_code, 404)
+        self.participant.is_active = False
+        self.participant.save()
+        self.assertEqual(self.client.get(self.url(self.participant)).status_code, 404)
+
+    def test_resetting_the_feed_url_revokes_the_old_one(self):
+        old_url = self.url(self.participant)
+        self.assertEqual(self.client.get(old_url).status_code, 200)  # now cached
+
+        self.client.force_login(self.participant)
+        response = self.client.post(reverse('studies:reset_calendar_feed'))
+        self.assertRedirects(response, reverse('studies:my_bookings'), fetch_redirect_response=False)
+        self.participant.profile.refresh_from_db()
+        new_url = self.url(self.participant)
+        self.assertNotEqual(new_url, old_url)
+        self.assertEqual(self.client.get(old_url).status_code, 404)
+        self.assertEqual(self.client.get(new_url).status_code, 200)
+        self.assertEqual(self.client.get(new_url).status_code, 200)  # cached entry checks the key too
+        self.assertEqual(self.client.get(old_url).status_code, 404)
+        self.assertEqual(self.client.get(reverse('studies:reset_calendar_feed')).status_code, 405)
@@ -0,0 +1,109 @@
+from io import StringIO
+from unittest import mock
+
+import numpy as np
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from apps.accounts.models import User
+from apps.studies.analysis import normal_mean
+from apps.studies.analysis.planner import PlannerError, get_or_simulate_design, simulate_design
+from apps.studies.models import Study
+
+PLACEHOLDER = 'apps.studies.analysis.placeholder:compute_bf'
+NORMAL_MEAN = 'apps.studies.analysis.normal_mean:compute_bf'
+
+
+class NormalMeanPluginTests(SimpleTestCase):
+    def test_simulated_trajectory_matches_compute_bf(self):
+        """Column j of simulate_bf equals compute_bf on the first j + 1 observations."""
+        rng = np.random.default_rng(7)
+        bf = normal_mean.simulate_bf(rng, 1, 30, 0.3, {})
+        rng = np.random.default_rng(7)
+        data = rng.standard_normal((1, 30))[0] + 0.3
+        payloads = [{'score': float(x)} for x in data]
+        for n in (1, 10, 30):
+            self.assertAlmostEqual(bf[0, n - 1], normal_mean.compute_bf(payloads[:n], {}), places=6)
+
+    def test_missing_field_is_skipped(self):
+        self.assertEqual(normal_mean.compute_bf([{'other': 1}], {}), 1.0)
+
+
+class PlannerTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_placeholder_stops_at_schedule(self):
+        plan = simulate_design(PLACEHOLDER, bf_threshold=10, min_n=20, max_n=60, effect_size=0.5, n_sims=200)
+        # Placeholder BF reaches 12 at N=40 regardless of the data.
+        self.assertEqual(plan.false_positive_rate, 1.0)
+        self.assertEqual(plan.true_positive_rate, 1.0)
+        self.assertEqual(plan.h0.expected_n, 40.0)
+        self.assertEqual(plan.h1.percentiles['p50'], 40.0)
+
+    def test_normal_mean_error_rates(self):
+        plan = simulate_design(NORMAL_MEAN, bf_threshold=10, min_n=10, max_n=150, effect_size=0.5, n_sims=1000)
+        self.assertLess(plan.false_positive_rate, 0.1)
+        self.assertGreater(plan.true_positive_rate, 0.8)
+        self.assertLess(plan.h1.expected_n, plan.h0.expected_n)
+
+    def test_process_pool_matches_inline(self):
+        kwargs = dict(bf_threshold=6, min_n=5, max_n=80, effect_size=0.4, n_sims=1200, seed=3)
+        inline = simulate_design(NORMAL_MEAN, workers=1, **kwargs)
+        pooled = simulate_design(NORMAL_MEAN, workers=2, **kwargs)
+        self.assertEqual(inline.to_dict(), pooled.to_dict())
+
+    def test_plan_is_cached(self):
+        kwargs = dict(bf_threshold=10, min_n=20, max_n=60, effect_size=0.5, n_sims=100)
+        self.assertIsNone(get_or_simulate_design(PLACEHOLDER, cache_only=True, **kwargs))
+        plan = get_or_simulate_design(PLACEHOLDER, **kwargs)
+        self.assertEqual(get_or_simulate_design(PLACEHOLDER, cache_only=True, **kwargs), plan)
+
+    def test_plugin_without_simulator_raises(self):
+        with self.assertRaises(PlannerError):
+            simulate_design('apps.studies.analysis:ANALYSIS_PLUGINS', bf_threshold=10, min_n=1, max_n=5,
+                            effect_size=0.5, n_sims=10)
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class DesignPlannerViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.researcher = User.objects.create_user(
+            email='planner@example.com',
+            password='password123',
+            first_name='Plan',
+            last_name='Ner',
+            role='researcher',
+        )
+        self.study = Study.objects.create(
+            title='Planner Study',
+            description='Design planner test.',
+            mode='online',
+            researcher=self.researcher,
+            consent_text='Consent.',
+        )
+
+    def test_post_renders_the_plan_and_get_reads_cache(self):
+        self.client.login(email='planner@example.com', password='password123')
+        url = reverse('studies:design_planner', args=[self.study.slug])
+        data = {
+            'plugin': PLACEHOLDER, 'params': '{}', 'bf_threshold': 10, 'min_n': 20,
+            'max_n': 60, 'effect_size': 0.5, 'n_sims': 200,
+        }
+        with mock.patch('apps.studies.analysis.planner.ProcessPoolExecutor') as pool:
+            response = self.client.post(url, data)
+        pool.assert_not_called()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['plan'].h0.expected_n, 40.0)
+
+        response = self.client.get(url, data)
+        self.assertEqual(response.context['plan'].h0.expected_n, 40.0)
+
+    def test_command_prints_error_rates(self):
+        out = StringIO()
+        call_command('plan_sequential_design', self.study.slug, '--sims', '100', '--max-n', '60',
+                     '--workers', '1', stdout=out)
+        self.assertIn('False positive rate: 1.000', out.getvalue())
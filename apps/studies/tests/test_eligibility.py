@@ -0,0 +1,200 @@
+from datetime import date, timedelta
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.accounts.models import Profile, User
+from apps.courses.models import Course, Enrollment
+from apps.prescreening.models import PrescreenQuestion, PrescreenResponse
+from apps.studies import eligibility
+from apps.studies.eligibility import ParticipantFacts, compile_rules
+from apps.studies.models import EligibleStudy, Study, Timeslot
+from apps.studies.tasks import reindex_study_eligibility
+
+
+class CompileRulesTests(SimpleTestCase):
+    def test_rules(self):
+        predicate = compile_rules({
+            'age_min': 18,
+            'age_max': 30,
+            'languages': ['es'],
+            'courses': ['PSYC-101'],
+            'excluded_studies': ['pilot'],
+            'prescreen': {'q1': 'yes', 'q2': {'min': 3}, 'q3': ['red', 'blue']},
+        })
+        facts = ParticipantFacts(
+            user_id=1, age=20, languages=frozenset(['en', 'es']), course_codes=frozenset(['PSYC-101']),
+            answers={'q1': 'yes', 'q2': '4', 'q3': ['green', 'blue']},
+        )
+        self.assertTrue(predicate(facts))
+        for change in (
+            {'age': None},
+            {'age': 31},
+            {'languages': frozenset(['en'])},
+            {'course_codes': frozenset()},
+            {'studies': frozenset(['pilot'])},
+            {'answers': {**facts.answers, 'q2': 2}},
+            {'answers': {**facts.answers, 'q3': ['green']}},
+        ):
+            self.assertFalse(predicate(ParticipantFacts(**{**facts.__dict__, **change})), change)
+
+    def test_invalid_rules_are_skipped(self):
+        with self.assertLogs('apps.studies.eligibility', 'WARNING') as logs:
+            predicate = compile_rules({
+                'age_min': 'eighteen',
+                'age_max': 30,
+                'prescreen': {'q1': {'min': 'low'}, 'q2': {'max': [3]}, 'q3': 'yes'},
+            })
+        self.assertEqual(len(logs.output), 3)
+        facts = ParticipantFacts(user_id=1, age=50, answers={'q3': 'yes'})
+        self.assertTrue(predicate(facts))
+        self.assertFalse(predicate(ParticipantFacts(user_id=1, answers={'q3': 'no'})))
+
+    def test_empty_rules_accept_everyone(self):
+        self.assertTrue(compile_rules({})(ParticipantFacts(user_id=1)))
+        self.assertTrue(compile_rules(None)(ParticipantFacts(user_id=1)))
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class EligibilityQueryTests(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(code='PSYC-101', name='Intro', term='2026-Fall')
+        self.adult, self.minor, self.other = [
+            User.objects.create_user(
+                email=f'{name}@example.com', password='password123', first_name=name, last_name='P',
+                role='participant',
+            )
+            for name in ('adult', 'minor', 'other')
+        ]
+        today = timezone.now().date()
+        for user, years in ((self.adult, 25), (self.minor, 16), (self.other, 40)):
+            user.profile.date_of_birth = date(today.year - years, 1, 1)
+            user.profile.save()
+        Enrollment.objects.create(course=self.course, participant=self.adult)
+        Enrollment.objects.create(course=self.course, participant=self.minor)
+        PrescreenResponse.objects.create(participant=self.adult, answers={'handed': 'right'})
+
+        self.open = self._study('Open Study', {})
+        self.course_study = self._study('Course Study', {'age_min': 18, 'courses': ['PSYC-101']})
+        self.handed = self._study('Handedness Study', {'prescreen': {'handed': 'right'}})
+        self.follow_up = self._study('Follow-up Study', {'excluded_studies': [self.open.slug]})
+
+        start = timezone.now() + timedelta(days=1)
+        slot = Timeslot.objects.create(study=self.open, starts_at=start, ends_at=start + timedelta(hours=1), capacity=5)
+        slot.book(self.other, consent_text_version='c')
+
+    def _study(self, title, rules):
+        return Study.objects.create(
+            title=title, description='Eligibility test.', mode='online', consent_text='Consent.',
+            is_active=True, is_approved=True, irb_status='approved', eligibility=rules,
+        )
+
+    def titles(self, user):
+        studies = Study.active_approved.order_by('title')
+        return {study.title for study in eligibility.eligible_studies(user, studies)}
+
+    def test_participant_matching_uses_constant_queries(self):
+        studies = list(Study.active_approved.all())
+        with self.assertNumQueries(4):
+            eligibility.eligible_studies(self.adult, studies)
+        self.assertEqual(self.titles(self.adult), {'Open Study', 'Course Study', 'Handedness Study', 'Follow-up Study'})
+        self.assertEqual(self.titles(self.minor), {'Open Study', 'Follow-up Study'})
+        self.assertEqual(self.titles(self.other), {'Open Study'})
+
+    def test_predicate_is_recompiled_when_study_changes(self):
+        self.assertFalse(eligibility.is_eligible(self.other, self.handed))
+        self.handed.eligibility = {}
+        self.handed.save()
+        self.assertTrue(eligibility.is_eligible(self.other, self.handed))
+
+    def test_count_eligible(self):
+        self.assertEqual(eligibility.count_eligible(self.open), 3)
+        self.assertEqual(eligibility.count_eligible(self.course_study, chunk_size=1), 1)
+        self.assertEqual(sorted(eligibility.eligible_participant_ids(self.follow_up)), sorted([self.adult.pk, self.minor.pk]))
+
+    def test_malformed_rules_do_not_break_the_study_list(self):
+        # Written around model validation and the save signals, as a bad import would
+        Study.objects.filter(pk=self.handed.pk).update(
+            eligibility={'age_min': None, 'age_max': 'old', 'prescreen': {'handed': {'min': {}}}},
+            updated_at=timezone.now(),
+        )
+        Profile.objects.filter(user=self.minor).update(eligibility_indexed_at=None)
+        self.client.force_login(self.minor)
+        with self.assertLogs('apps.studies.eligibility', 'WARNING'):
+            response = self.client.get(reverse('studies:list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Handedness Study', {study.title for study in response.context['studies']})
+
+    def test_study_list_filters_for_participants(self):
+        self.client.force_login(self.minor)
+        response = self.client.get(reverse('studies:list'))
+        titles = {study.title for study in response.context['studies']}
+        self.assertEqual(titles, {'Open Study', 'Follow-up Study'})
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class EligibilityIndexTests(TestCase):
+    def setUp(self):
+        self.participant = User.objects.create_user(
+            email='indexed@example.com', password='password123', first_name='In', last_name='Dexed',
+            role='participant',
+        )
+        self.question = PrescreenQuestion.objects.create(question_text='Handedness?', type='single_choice')
+        self.study = Study.objects.create(
+            title='Indexed Study', description='Index test.', mode='online', consent_text='Consent.',
+            is_active=True, is_approved=True, irb_status='approved',
+            eligibility={'prescreen': {str(self.question.id): 'left'}},
+        )
+
+    def indexed(self):
+        return set(EligibleStudy.objects.filter(participant=self.participant).values_list('study_id', flat=True))
+
+    def test_prescreen_submission_reindexes_participant(self):
+        eligibility.reindex_participant(self.participant.pk)
+        self.assertEqual(self.indexed(), set())
+        self.client.force_login(self.participant)
+        self.client.post(reverse('prescreening:submit'), {f'question_{self.question.id}': 'left'})
+        self.assertEqual(self.indexed(), {self.study.pk})
+
+    @mock.patch.object(reindex_study_eligibility, 'delay', side_effect=reindex_study_eligibility)
+    def test_study_changes_reindex_study(self, delay):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.study.eligibility = {}
+            self.study.save()
+        self.assertEqual(self.indexed(), {self.study.pk})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.study.is_active = False
+            self.study.save()
+        self.assertEqual(self.indexed(), set())
+        self.assertEqual(delay.call_count, 2)
+
+    def test_enrollment_and_expiration(self):
+        course = Course.objects.create(code='PSYC-200', name='Methods', term='2026-Fall')
+        self.study.eligibility = {'courses': ['PSYC-200']}
+        self.study.save()
+        Enrollment.objects.create(course=course, participant=self.participant)
+        self.assertEqual(self.indexed(), {self.study.pk})
+        self.assertEqual(Study.objects.with_eligible_counts().get(pk=self.study.pk).eligible_total, 1)
+
+        Study.objects.filter(pk=self.study.pk).update(irb_expiration=timezone.now().date() - timedelta(days=1))
+        self.assertEqual(eligibility.refresh_index(), (0, 1))
+        self.assertEqual(self.indexed(), set())
+
+    def test_study_list_reads_the_index(self):
+        self.client.force_login(self.participant)
+        self.assertEqual(list(self.client.get(reverse('studies:list')).context['studies']), [])
+        EligibleStudy.objects.create(participant=self.participant, study=self.study)
+        self.assertEqual(list(self.client.get(reverse('studies:list')).context['studies']), [self.study])
+
+    def test_deleting_a_booked_participant(self):
+        EligibleStudy.objects.create(participant=self.participant, study=self.study)
+        self.study.eligibility = {}
+        self.study.save()
+        start = timezone.now() + timedelta(days=1)
+        slot = Timeslot.objects.create(study=self.study, starts_at=start, ends_at=start + timedelta(hours=1), capacity=2)
+        slot.book(self.participant, consent_text_version='c')
+
+        self.participant.delete()
+        self.assertFalse(EligibleStudy.objects.filter(participant_id=self.participant.pk).exists())
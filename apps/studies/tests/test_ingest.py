@@ -0,0 +1,116 @@
+import json
+import uuid
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.studies import ingest
+from apps.studies.models import BufferedResponse, Response, Study
+from apps.studies.tasks import flush_response_buffer
+
+
+@override_settings(RESPONSE_INGEST_MODE='db')
+class BufferedIngestionTests(TestCase):
+    def setUp(self):
+        self.study = Study.objects.create(
+            title='Ingest Study',
+            description='Buffered ingestion test.',
+            mode='online',
+            consent_text='Consent.',
+            monitoring_enabled=True,
+        )
+        self.url = reverse('submit_response', kwargs={'study_id': self.study.id})
+
+    def _submit(self, payload, **query):
+        url = self.url + ('?' + '&'.join(f'{k}={v}' for k, v in query.items()) if query else '')
+        return self.client.post(url, json.dumps(payload), content_type='application/json')
+
+    def test_submission_is_buffered_then_flushed_with_same_ids(self):
+        session_id = uuid.uuid4()
+        data = self._submit({'score': 1}, session_id=session_id).json()
+        self.assertEqual(data['session_id'], str(session_id))
+        self.assertFalse(Response.objects.exists())
+        self.assertEqual(BufferedResponse.objects.count(), 1)
+
+        with mock.patch('apps.studies.tasks.run_sequential_bayes_monitoring.delay') as delay:
+            for _ in range(3):
+                self._submit({'score': 2})
+            result = flush_response_buffer()
+        self.assertEqual(result, 'Flushed 4 buffered responses for 1 studies')
+        delay.assert_called_once_with(str(self.study.id))
+        response = Response.objects.get(id=data['response_id'])
+        self.assertEqual(response.session_id, session_id)
+        self.assertEqual(Response.objects.count(), 4)
+        self.assertFalse(BufferedResponse.objects.exists())
+
+    def test_invalid_session_id_is_rejected_up_front(self):
+        response = self._submit({'score': 1}, session_id='not-a-uuid')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(BufferedResponse.objects.exists())
+
+    def test_reflushing_a_batch_does_not_duplicate(self):
+        record = ingest.build_record(self.study, {'score': 1})
+        ingest.write_batch([record])
+        ingest.write_batch([record])
+        self.assertEqual(Response.objects.count(), 1)
+
+    def test_flush_stops_starting_batches_after_time_budget(self):
+        for n in range(3):
+            self._submit({'score': n})
+        self.assertEqual(ingest.flush(batch_size=1, time_budget=0)[0], 1)
+        self.assertEqual(BufferedResponse.objects.count(), 2)
+        self.assertEqual(ingest.flush(batch_size=1)[0], 2)
+
+    @override_settings(RESPONSE_INGEST_MODE='direct')
+    def test_direct_mode_flush_is_noop(self):
+        self.assertEqual(flush_response_buffer(), 'Response ingestion is direct; nothing to flush')
+
+
+class IdempotentSubmissionTests(TestCase):
+    def setUp(self):
+        self.study = Study.objects.create(
+            title='Idempotent Study',
+            description='Retry test.',
+            mode='online',
+            consent_text='Consent.',
+        )
+        self.url = reverse('submit_response', kwargs={'study_id': self.study.id})
+
+    def _post(self, payload, url=None, **extra):
+        return self.client.post(url or self.url, json.dumps(payload), content_type='application/json', **extra).json()
+
+    def test_retry_with_same_session_and_payload_returns_original(self):
+        url = f'{self.url}?session_id={uuid.uuid4()}'
+        first = self._post({'score': 1}, url)
+        with CaptureQueriesContext(connection) as queries:
+            retry = self._post({'score': 1}, url)
+        self.assertFalse([q for q in queries if q['sql'].startswith('INSERT')])
+        self.assertEqual(retry['response_id'], first['response_id'])
+        self.assertTrue(retry['duplicate'])
+        self.assertEqual(Response.objects.count(), 1)
+        self._post({'score': 2}, url)
+        self.assertEqual(Response.objects.count(), 2)
+
+    def test_idempotency_key_header(self):
+        first = self._post({'score': 1}, HTTP_IDEMPOTENCY_KEY='attempt-1')
+        retry = self._post({'score': 1, 'retry': True}, HTTP_IDEMPOTENCY_KEY='attempt-1')
+        self.assertEqual(retry['response_id'], first['response_id'])
+        self.assertEqual(Response.objects.count(), 1)
+
+    def test_without_session_identical_payloads_are_distinct(self):
+        self._post({'score': 1})
+        self._post({'score': 1})
+        self.assertEqual(Response.objects.count(), 2)
+
+    @override_settings(RESPONSE_INGEST_MODE='db')
+    def test_buffered_retry_returns_original_id(self):
+        url = f'{self.url}?submission_key=abc'
+        first = self._post({'score': 1}, url)
+        retry = self._post({'score': 1}, url)
+        self.assertEqual(retry['response_id'], first['response_id'])
+        self.assertEqual(BufferedResponse.objects.count(), 1)
+        ingest.flush()
+        self.assertEqual(Response.objects.get().id, uuid.UUID(first['response_id']))
@@ -0,0 +1,68 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.accounts.models import User
+from apps.credits.models import AuditLog
+from apps.studies.models import Signup, Study, Timeslot
+from apps.studies.tasks import mark_missed_sessions
+
+
+class MarkMissedSessionsTests(TestCase):
+    def setUp(self):
+        self.study = Study.objects.create(
+            title='Lab Study', description='No-show test.', mode='lab', consent_text='Consent.',
+            is_active=True, is_approved=True, irb_status='approved',
+        )
+        self.alice, self.bob = [
+            User.objects.create_user(
+                email=f'{name}@example.com', password='password123', first_name=name, last_name='P',
+                role='participant',
+            )
+            for name in ('alice', 'bob')
+        ]
+
+    def slot(self, hours_from_now):
+        start = timezone.now() + timedelta(hours=hours_from_now)
+        return Timeslot.objects.create(study=self.study, starts_at=start, ends_at=start + timedelta(hours=1), capacity=5)
+
+    def test_overdue_bookings_are_marked_in_bulk(self):
+        past, earlier, future = self.slot(-5), self.slot(-30), self.slot(5)
+        missed = [past.book(self.alice, consent_text_version='c'), earlier.book(self.alice, consent_text_version='c')]
+        missed.append(past.book(self.bob, consent_text_version='c'))
+        upcoming = future.book(self.bob, consent_text_version='c')
+        cancelled = earlier.book(self.bob, consent_text_version='c')
+        cancelled.cancel()
+        AuditLog.objects.all().delete()
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertTrue(mark_missed_sessions().startswith('Marked 3 no-shows for 2 participants'))
+        # UPDATE signups, two profile increments (+2, +1), timeslot lookup, audit insert, savepoints,
+        # plus the audit chain head lock and update.
+        self.assertLessEqual(len(ctx.captured_queries), 11)
+
+        self.assertEqual(
+            set(Signup.objects.filter(status='no_show').values_list('pk', flat=True)), {s.pk for s in missed},
+        )
+        self.assertEqual(Signup.objects.get(pk=upcoming.pk).status, 'booked')
+        self.assertEqual(Signup.objects.get(pk=cancelled.pk).status, 'cancelled')
+        self.alice.profile.refresh_from_db()
+        self.bob.profile.refresh_from_db()
+        self.assertEqual((self.alice.profile.no_show_count, self.bob.profile.no_show_count), (2, 1))
+        self.assertEqual(
+            set(AuditLog.objects.filter(action='signup_no_show').values_list('entity_id', flat=True)),
+            {s.pk for s in missed},
+        )
+        self.assertTrue(mark_missed_sessions().startswith('Marked 0 no-shows'))
+
+    @mock.patch('apps.studies.tasks._update_returning_supported', return_value=False)
+    def test_fallback_without_update_returning(self, _):
+        signup = self.slot(-5).book(self.alice, consent_text_version='c')
+        self.assertTrue(mark_missed_sessions().startswith('Marked 1 no-shows for 1 participants'))
+        self.assertEqual(Signup.objects.get(pk=signup.pk).status, 'no_show')
+        self.alice.profile.refresh_from_db()
+        self.assertEqual(self.alice.profile.no_show_count, 1)
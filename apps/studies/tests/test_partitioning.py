@@ -0,0 +1,137 @@
+from datetime import date, timedelta
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from apps.credits import chain
+from apps.credits.models import AuditLog
+from apps.credits.tasks import create_future_partitions
+from apps.studies.models import Response, Study
+from config import partitioning
+
+
+class PartitionHelperTests(SimpleTestCase):
+    def test_month_arithmetic(self):
+        self.assertEqual(partitioning.add_months(date(2026, 11, 1), 2), date(2027, 1, 1))
+        self.assertEqual(partitioning.add_months(date(2026, 1, 1), -1), date(2025, 12, 1))
+        self.assertEqual(partitioning.monthly_partition_name('audit_logs', date(2026, 3, 1)), 'audit_logs_p2026_03')
+
+
+class PartitionCommandSqliteTests(TestCase):
+    def test_noop_outside_postgresql(self):
+        out = StringIO()
+        call_command('partition_tables', stdout=out)
+        self.assertIn('requires PostgreSQL', out.getvalue())
+        self.assertEqual(create_future_partitions(), 'No partitions needed')
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Partitioning is PostgreSQL-only')
+class PartitionCommandPostgresTests(TestCase):
+    """Runs the real conversion SQL; PostgreSQL DDL is transactional, so each test rolls it back."""
+
+    def setUp(self):
+        self.study = Study.objects.create(
+            title='Partitioned Study', description='Partitioning test.', mode='online', consent_text='Consent.',
+        )
+        Response.objects.bulk_create(
+            Response(study=self.study, payload={'n': n}, submission_key=f'key-{n}') for n in range(5)
+        )
+        now = timezone.now()
+        chain.append([
+            AuditLog(action='seeded', entity='test', created_at=now - timedelta(days=days)) for days in (0, 40, 70)
+        ])
+
+    def _catalog(self, table):
+        """(row count, {constraint name: definition}, {index name: definition}) for ``table``."""
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT count(*) FROM {table}')
+            count = cursor.fetchone()[0]
+            constraints = dict(partitioning._constraint_definitions(cursor, table, 'pu'))
+            cursor.execute('SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s', [table])
+            indexes = dict(cursor.fetchall())
+        return count, constraints, indexes
+
+    def test_convert_keeps_rows_keys_and_indexes_then_drops_legacy(self):
+        before = {table: self._catalog(table) for table in ('responses', 'audit_logs')}
+
+        out = StringIO()
+        call_command('partition_tables', '--months-ahead', '1', '--hash-partitions', '4', stdout=out)
+        self.assertIn('responses: partitioned into 4 partitions', out.getvalue())
+
+        with connection.cursor() as cursor:
+            for table in before:
+                self.assertTrue(partitioning.is_partitioned(cursor, table))
+            self.assertEqual(len(partitioning.list_partitions(cursor, 'responses')), 4)
+            # default partition, plus one per month from the oldest row through next month
+            self.assertGreaterEqual(len(partitioning.list_partitions(cursor, 'audit_logs')), 5)
+
+        for table, column in (('responses', 'study_id'), ('audit_logs', 'created_at')):
+            count, constraints, indexes = self._catalog(table)
+            old_count, old_constraints, old_indexes = before[table]
+            self.assertEqual(count, old_count)
+            self.assertIn(f'PRIMARY KEY (id, {column})', constraints.values())
+            old_pk = next(name for name, definition in old_constraints.items() if definition.startswith('PRIMARY KEY'))
+            # Unique constraints without the partition column move to a <name>_keys side table
+            moved = {
+                name for name, definition in old_constraints.items()
+                if definition.startswith('UNIQUE') and column not in definition
+            }
+            self.assertLessEqual(set(old_indexes) - {old_pk} - moved, set(indexes))
+            for name in moved:
+                keys_count, keys_constraints, _ = self._catalog(f'{name}_keys')
+                self.assertEqual((keys_count, keys_constraints[name]), (count, old_constraints[name]))
+        self.assertEqual(
+            self._catalog('responses')[1]['responses_study_submission_key_uniq'], 'UNIQUE (study_id, submission_key)',
+        )
+        self.assertEqual(
+            [definition for definition in before['audit_logs'][1].values() if definition == 'UNIQUE (seq)'],
+            ['UNIQUE (seq)'],
+        )
+
+        # The ORM writes through the partitioned parents, and the idempotency key is still enforced
+        Response.objects.create(study=self.study, payload={'n': 5}, submission_key='key-5')
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Response.objects.create(study=self.study, payload={'n': 6}, submission_key='key-0')
+        chain.append([AuditLog(action='after', entity='test')])
+        # The chain position is still unique across partitions
+        taken = AuditLog.objects.order_by('seq').first()
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            AuditLog.objects.create(action='forged', entity='test', seq=taken.seq, prev_hash='0', row_hash='0')
+        self.assertEqual(Response.objects.filter(study=self.study).count(), 6)
+        self.assertEqual(AuditLog.objects.filter(entity='test').count(), 4)
+        self.assertTrue(chain.verify(full=True).ok)
+
+        status = StringIO()
+        call_command('partition_tables', '--status', stdout=status)
+        self.assertIn('responses: 4 partitions', status.getvalue())
+
+        call_command('partition_tables', '--drop-legacy', stdout=StringIO())
+        with connection.cursor() as cursor:
+            for table in before:
+                cursor.execute('SELECT to_regclass(%s)', [f'{table}{partitioning.LEGACY_SUFFIX}'])
+                self.assertIsNone(cursor.fetchone()[0])
+        self.assertEqual(Response.objects.filter(study=self.study).count(), 6)
+
+    def test_creating_a_month_moves_its_rows_out_of_default(self):
+        call_command('partition_tables', '--tables', 'audit_logs', '--months-ahead', '0', stdout=StringIO())
+        # Written while no partition exists for its month (a missed beat run)
+        later = timezone.now() + timedelta(days=70)
+        entry, = chain.append([AuditLog(action='early', entity='test', created_at=later)])
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT count(*) FROM audit_logs_default')
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+            created = partitioning.ensure_monthly_partitions(cursor, 'audit_logs', months_ahead=3)
+            name = partitioning.monthly_partition_name('audit_logs', partitioning.month_start(later))
+            self.assertIn(name, created)
+            cursor.execute('SELECT count(*) FROM audit_logs_default')
+            self.assertEqual(cursor.fetchone()[0], 0)
+            cursor.execute(f'SELECT id FROM {name}')
+            self.assertEqual([row[0] for row in cursor.fetchall()], [entry.pk])
+
+        chain.append([AuditLog(action='after', entity='test', created_at=later)])
+        self.assertTrue(chain.verify(full=True).ok)
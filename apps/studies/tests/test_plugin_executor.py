@@ -0,0 +1,172 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+
+from apps.accounts.models import User
+from apps.studies.analysis.columns import ColumnStore, open_columns
+from apps.studies.analysis.executor import (
+    PluginExecutionError,
+    PluginExecutor,
+    PluginMemoryExceeded,
+    PluginTimeout,
+)
+from apps.studies.models import AnalysisRun, Response, Study
+from apps.studies.tasks import run_sequential_bayes_monitoring, sweep_bayes_monitoring
+
+PLUGINS = 'apps.studies.tests.plugins'
+
+
+class ColumnStoreTests(SimpleTestCase):
+    def test_numeric_columns_round_trip(self):
+        payloads = [{'score': 1.5, 'flag': True}, {'score': 'n/a'}, {'other': 3}]
+        with ColumnStore.from_payloads(payloads) as store:
+            n, columns = open_columns(store.path)
+        self.assertEqual(n, 3)
+        self.assertEqual(columns['score'][0], 1.5)
+        self.assertNotEqual(columns['score'][1], columns['score'][1])  # NaN
+        self.assertEqual(columns['flag'][0], 1.0)
+        self.assertEqual(columns['other'][2], 3.0)
+
+
+class PluginExecutorTests(SimpleTestCase):
+    def setUp(self):
+        self.executor = PluginExecutor(size=1, timeout=5, max_rss_mb=256)
+        self.addCleanup(self.executor.shutdown)
+
+    def test_columnar_plugin(self):
+        payloads = [{'score': 0.5}] * 30
+        result = self.executor.run('apps.studies.analysis.normal_mean:compute_bf', payloads, {})
+        from apps.studies.analysis import normal_mean
+        self.assertAlmostEqual(result.bf, normal_mean.compute_bf(payloads, {}))
+        self.assertGreater(result.duration_ms, 0)
+
+    def test_legacy_plugin_gets_rows(self):
+        result = self.executor.run(f'{PLUGINS}:row_count_bf', [{'a': 'x'}] * 7, {})
+        self.assertEqual(result.bf, 7.0)
+
+    def test_columnar_variant_follows_the_configured_function(self):
+        self.assertEqual(self.executor.run(f'{PLUGINS}:column_count_bf', [{'a': 1}] * 3, {}).bf, 3.5)
+
+    def test_failed_spawn_does_not_use_up_a_slot(self):
+        with mock.patch('apps.studies.analysis.executor._Worker', side_effect=OSError('fork failed')):
+            with self.assertRaisesMessage(PluginExecutionError, 'Could not start a plugin worker'):
+                self.executor.run(f'{PLUGINS}:row_count_bf', [{}], {})
+        self.assertEqual(self.executor._spawned, 0)
+        self.assertEqual(self.executor.run(f'{PLUGINS}:row_count_bf', [{}] * 2, {}).bf, 2.0)
+
+    def test_plugin_output_does_not_corrupt_replies(self):
+        result = self.executor.run(f'{PLUGINS}:chatty_bf', [{'a': 'x'}] * 4, {})
+        self.assertEqual(result.bf, 4.0)
+        self.assertEqual(self.executor.run(f'{PLUGINS}:chatty_bf', [{}], {}).bf, 1.0)  # same worker
+
+    def test_saturated_pool_raises_execution_error(self):
+        busy = self.executor._acquire()
+        self.addCleanup(self.executor._idle.put, busy)
+        self.executor.timeout = 0.2
+        with self.assertRaisesMessage(PluginExecutionError, 'no analysis worker available'):
+            self.executor.run(f'{PLUGINS}:row_count_bf', [{}], {})
+
+    def test_load_error(self):
+        with self.assertRaises(PluginExecutionError) as ctx:
+            self.executor.run('apps.studies.analysis.missing:compute_bf', [], {})
+        self.assertEqual(ctx.exception.kind, 'load')
+
+    def test_timeout_kills_worker_and_pool_recovers(self):
+        self.executor.timeout = 0.5
+        with self.assertRaises(PluginTimeout):
+            self.executor.run(f'{PLUGINS}:sleepy_bf', [{}], {'seconds': 30})
+        self.executor.timeout = 5
+        result = self.executor.run('apps.studies.analysis.placeholder:compute_bf', [{}] * 25, {})
+        self.assertEqual(result.bf, 3.0)
+
+    def test_memory_limit(self):
+        self.executor.max_rss_bytes = 128 * 1024 * 1024
+        with self.assertRaises(PluginMemoryExceeded):
+            self.executor.run(f'{PLUGINS}:greedy_bf', [{}], {})
+
+
+class MonitoringTaskTests(TestCase):
+    def setUp(self):
+        researcher = User.objects.create_user(
+            email='monitor@example.com',
+            password='password123',
+            first_name='Mon',
+            last_name='Itor',
+            role='researcher',
+        )
+        self.study = Study.objects.create(
+            title='Monitored Study',
+            description='Monitoring test.',
+            mode='online',
+            researcher=researcher,
+            consent_text='Consent.',
+            monitoring_enabled=True,
+            min_sample_size=5,
+            bf_threshold=100,
+        )
+        Response.objects.bulk_create(Response(study=self.study, payload={'score': 1}) for _ in range(25))
+
+    def test_records_analysis_run(self):
+        result = run_sequential_bayes_monitoring(str(self.study.id))
+        self.assertIn('BF=3.00', result)
+        run = AnalysisRun.objects.get(study=self.study)
+        self.assertEqual((run.status, run.sample_size, run.bf), ('ok', 25, 3.0))
+        self.study.refresh_from_db()
+        self.assertEqual(self.study.current_bf, 3.0)
+
+    def test_failed_plugin_is_recorded(self):
+        Study.objects.filter(pk=self.study.pk).update(analysis_plugin='apps.studies.analysis.missing:compute_bf')
+        result = run_sequential_bayes_monitoring(str(self.study.id))
+        self.assertIn('Failed to load analysis plugin', result)
+        self.assertEqual(AnalysisRun.objects.get(study=self.study).status, 'error')
+
+
+class MonitoringSweepTests(TestCase):
+    def setUp(self):
+        self.researcher = User.objects.create_user(
+            email='sweep@example.com',
+            password='password123',
+            first_name='Sw',
+            last_name='Eep',
+            role='researcher',
+        )
+
+    def _study(self, title, n, **kwargs):
+        study = Study.objects.create(
+            title=title,
+            description='Sweep test.',
+            mode='online',
+            researcher=self.researcher,
+            consent_text='Consent.',
+            monitoring_enabled=True,
+            min_sample_size=5,
+            **kwargs,
+        )
+        Response.objects.bulk_create(Response(study=study, payload={'score': 1}) for _ in range(n))
+        return study
+
+    def test_sweep_uses_fixed_number_of_queries(self):
+        studies = [self._study(f'Sweep {i}', 25, bf_threshold=100) for i in range(6)]
+        below_min = self._study('Too Small', 2)
+        crossed = self._study('Crossed', 45, bf_threshold=10)
+        # select due studies, stream payloads, bulk_update, bulk_create (+ notification lookup)
+        with self.assertNumQueries(5):
+            result = sweep_bayes_monitoring()
+        self.assertIn('Evaluated 7 studies', result)
+        for study in studies:
+            study.refresh_from_db()
+            self.assertEqual(study.current_bf, 3.0)
+            self.assertIsNotNone(study.monitoring_last_evaluated_at)
+        crossed.refresh_from_db()
+        self.assertTrue(crossed.monitoring_notified)
+        self.assertEqual(crossed.current_bf, 12.0)
+        below_min.refresh_from_db()
+        self.assertIsNone(below_min.monitoring_last_evaluated_at)
+        self.assertEqual(AnalysisRun.objects.count(), 7)
+
+    def test_sweep_skips_studies_without_new_responses(self):
+        study = self._study('Evaluated', 25)
+        sweep_bayes_monitoring()
+        self.assertEqual(sweep_bayes_monitoring(), 'No studies due for monitoring')
+        Response.objects.create(study=study, payload={'score': 1})
+        self.assertIn('Evaluated 1 studies', sweep_bayes_monitoring())
@@ -0,0 +1,76 @@
+from datetime import timedelta
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.accounts.models import User
+from apps.studies.models import SignupReminder, Study, Timeslot
+from apps.studies.tasks import send_due_reminders
+
+
+class BouncingBackend(EmailBackend):
+    """locmem backend that rejects the whole batch if any recipient is at bounce.example.com."""
+
+    batches = []
+
+    def send_messages(self, messages):
+        BouncingBackend.batches.append(len(messages))
+        if any(address.endswith('@bounce.example.com') for message in messages for address in message.to):
+            raise OSError('550 mailbox unavailable')
+        return super().send_messages(messages)
+
+
+@override_settings(REMINDER_EMAIL_BATCH_SIZE=2, REMINDER_EMAIL_RETRIES=1, REMINDER_EMAIL_RETRY_DELAY=0)
+class ReminderDispatchTests(TestCase):
+    def setUp(self):
+        self.study = Study.objects.create(
+            title='Lab Study', description='Reminder test.', mode='lab', consent_text='Consent.',
+            is_active=True, is_approved=True, irb_status='approved',
+        )
+        BouncingBackend.batches = []
+
+    def book(self, hours_ahead, *emails):
+        start = timezone.now() + timedelta(hours=hours_ahead)
+        timeslot = Timeslot.objects.create(
+            study=self.study, starts_at=start, ends_at=start + timedelta(hours=1), capacity=len(emails),
+        )
+        for email in emails:
+            participant = User.objects.create_user(
+                email=email, password='password123', first_name='P', last_name='X', role='participant',
+            )
+            timeslot.book(participant, consent_text_version='c')
+
+    def reminded(self, offset_hours):
+        return set(
+            SignupReminder.objects.filter(offset_hours=offset_hours).values_list('signup__participant__email', flat=True)
+        )
+
+    @override_settings(REMINDER_HOURS_BEFORE=[24, 2], REMINDER_GRACE_MINUTES=60)
+    def test_due_reminders_per_offset(self):
+        self.book(23.5, 'a@example.com', 'b@example.com', 'c@example.com')
+        self.book(24.5, 'later@example.com')
+        self.book(1.5, 'soon@example.com')
+        self.book(22, 'booked-late@example.com')
+        self.assertEqual(send_due_reminders(), 'Sent 4 reminders')
+        self.assertEqual(self.reminded(24), {'a@example.com', 'b@example.com', 'c@example.com'})
+        self.assertEqual(self.reminded(2), {'soon@example.com'})
+        subjects = {message.to[0]: message.subject for message in mail.outbox}
+        self.assertEqual(subjects['a@example.com'], 'Reminder: Study tomorrow - Lab Study')
+        self.assertEqual(subjects['soon@example.com'], 'Reminder: Study in 2 hours - Lab Study')
+        self.assertIn('/cancel/', mail.outbox[0].body)
+        self.assertEqual(send_due_reminders(), 'Sent 0 reminders')
+
+    @override_settings(REMINDER_HOURS_BEFORE=[2], EMAIL_BACKEND='apps.studies.tests.test_reminders.BouncingBackend')
+    def test_failed_batch_is_retried_then_isolated(self):
+        # Due signups are sent in session order: the bounce shares the first batch with one good address.
+        self.book(1.25, 'gone@bounce.example.com')
+        self.book(1.5, 'ok@example.com', 'later@example.com')
+        self.assertEqual(send_due_reminders(), 'Sent 2 reminders (1 failed)')
+        # Batch of two fails twice, is split into singles; the second batch goes through whole.
+        self.assertEqual(BouncingBackend.batches, [2, 2, 1, 1, 1])
+        self.assertEqual(self.reminded(2), {'ok@example.com', 'later@example.com'})
+        BouncingBackend.batches = []
+        self.assertEqual(send_due_reminders(), 'Sent 0 reminders (1 failed)')
+        self.assertEqual(BouncingBackend.batches, [1, 1])
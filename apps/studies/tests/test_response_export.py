@@ -0,0 +1,106 @@
+import csv
+import io
+import json
+from datetime import timedelta
+from unittest import mock
+
+from django.db import DatabaseError
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.accounts.models import User
+from apps.credits.models import AuditLog
+from apps.studies import exports
+from apps.studies.models import Response, Study
+
+
+class ResponseExportTests(TestCase):
+    def setUp(self):
+        self.researcher = User.objects.create_user(
+            email='export@example.com',
+            password='password123',
+            first_name='Ex',
+            last_name='Port',
+            role='researcher',
+        )
+        self.study = Study.objects.create(
+            title='Export Study',
+            description='Response export test.',
+            mode='online',
+            researcher=self.researcher,
+            consent_text='Consent.',
+        )
+        self.base = timezone.now() - timedelta(days=1)
+        self.responses = []
+        for i in range(7):
+            response = Response.objects.create(
+                study=self.study,
+                payload={'score': i, 'tags': ['a']},
+                ip_address='10.0.0.1',
+                user_agent='browser',
+            )
+            # Pairs of rows share a timestamp so the id tie-breaker matters.
+            Response.objects.filter(pk=response.pk).update(created_at=self.base + timedelta(minutes=i // 2))
+            response.refresh_from_db()
+            self.responses.append(response)
+        self.expected = [r.id for r in sorted(self.responses, key=lambda r: (r.created_at, r.id))]
+        self.url = reverse('studies:export_responses', args=[self.study.slug])
+
+    def _ndjson(self, response):
+        content = b''.join(response.streaming_content).decode()
+        return [json.loads(line) for line in content.splitlines()]
+
+    def test_keyset_pages_cover_every_row_in_order(self):
+        rows = list(exports.iter_responses(self.study.id, page_size=2))
+        self.assertEqual([row[0] for row in rows], self.expected)
+
+    def test_resume_after_last_row(self):
+        first = list(exports.iter_responses(self.study.id, page_size=3))[:3]
+        token = exports.parse_after(f'{first[-1][2].isoformat()}|{first[-1][0]}')
+        rest = list(exports.iter_responses(self.study.id, after=token, page_size=3))
+        self.assertEqual([row[0] for row in first + rest], self.expected)
+
+    def test_ndjson_export_omits_network_identifiers(self):
+        self.client.force_login(self.researcher)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = self._ndjson(response)
+        self.assertEqual([row['id'] for row in rows], [str(pk) for pk in self.expected])
+        self.assertEqual(set(rows[0]), {'id', 'session_id', 'created_at', 'payload'})
+        self.assertTrue(AuditLog.objects.filter(action='ferpa_export', entity_id=self.study.id).exists())
+
+    def test_since_filters_rows(self):
+        self.client.force_login(self.researcher)
+        since = (self.base + timedelta(minutes=3)).isoformat()
+        rows = self._ndjson(self.client.get(self.url, {'since': since}))
+        self.assertEqual([row['payload']['score'] for row in rows], [6])
+
+    def test_csv_with_flattened_fields(self):
+        self.client.force_login(self.researcher)
+        response = self.client.get(self.url, {'format': 'csv', 'fields': 'score,tags'})
+        reader = csv.reader(io.StringIO(b''.join(response.streaming_content).decode()))
+        header, *rows = list(reader)
+        self.assertEqual(header, ['response_id', 'session_id', 'created_at', 'score', 'tags'])
+        self.assertEqual(len(rows), 7)
+        self.assertEqual(rows[0][4], '["a"]')
+
+    def test_failed_audit_write_blocks_the_export(self):
+        self.client.force_login(self.researcher)
+        with mock.patch('apps.credits.audit.record', side_effect=DatabaseError('audit down')):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(response.streaming)
+        self.assertNotIn(str(self.expected[0]), response.content.decode())
+
+    def test_bad_cursor_is_rejected(self):
+        self.client.force_login(self.researcher)
+        self.assertEqual(self.client.get(self.url, {'after': 'nope'}).status_code, 400)
+
+    def test_other_researcher_is_denied(self):
+        other = User.objects.create_user(
+            email='other@example.com', password='password123', first_name='O', last_name='R', role='researcher',
+        )
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
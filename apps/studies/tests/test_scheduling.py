@@ -0,0 +1,99 @@
+from datetime import date, datetime, time, timedelta
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.accounts.models import User
+from apps.studies.models import Study, Timeslot
+from apps.studies.scheduling import TimeslotRecurrence, expand, find_conflicts
+
+
+def at(day, hour, minute=0):
+    return timezone.make_aware(datetime.combine(day, time(hour, minute)))
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class TimeslotGeneratorTests(TestCase):
+    def setUp(self):
+        self.researcher, self.colleague = [
+            User.objects.create_user(
+                email=f'{name}@example.com', password='password123', first_name=name, last_name='R',
+                role='researcher',
+            )
+            for name in ('lab', 'colleague')
+        ]
+        self.study = self._study('Lab Study', self.researcher)
+        self.monday = date(2030, 1, 7)
+
+    def _study(self, title, researcher):
+        return Study.objects.create(
+            title=title, description='Scheduling test.', mode='lab', consent_text='Consent.',
+            researcher=researcher, duration_minutes=45,
+        )
+
+    def recurrence(self, **overrides):
+        fields = dict(
+            start_date=self.monday, end_date=self.monday + timedelta(days=13), weekdays=frozenset([0, 2]),
+            start_times=(time(9), time(13)), duration=timedelta(minutes=45), capacity=2, location='Room 101',
+        )
+        fields.update(overrides)
+        return TimeslotRecurrence(**fields)
+
+    def test_expand_skips_excluded_dates(self):
+        recurrence = self.recurrence(exclude_dates=frozenset([self.monday + timedelta(days=2)]))
+        slots = expand(self.study, recurrence)
+        self.assertEqual(len(slots), recurrence.count())
+        self.assertEqual(len(slots), 6)
+        self.assertEqual(slots[0].starts_at, at(self.monday, 9))
+        self.assertEqual(slots[0].ends_at, at(self.monday, 9, 45))
+
+    def test_conflicts_by_room_researcher_and_within_batch(self):
+        other = self._study('Other Study', self.colleague)
+        Timeslot.objects.create(study=other, starts_at=at(self.monday, 9, 30), ends_at=at(self.monday, 10), location='room 101')
+        Timeslot.objects.create(study=other, starts_at=at(self.monday, 13), ends_at=at(self.monday, 14), location='Room 202')
+        mine = self._study('Second Study', self.researcher)
+        Timeslot.objects.create(study=mine, starts_at=at(self.monday + timedelta(days=2), 12, 30),
+                                ends_at=at(self.monday + timedelta(days=2), 13, 15), location='Zoom')
+        Timeslot.objects.create(study=mine, starts_at=at(self.monday + timedelta(days=7), 9),
+                                ends_at=at(self.monday + timedelta(days=7), 10), is_cancelled=True)
+
+        slots = expand(self.study, self.recurrence(start_times=(time(9), time(13), time(13, 30))))
+        with self.assertNumQueries(1):
+            conflicts = find_conflicts(self.study, slots)
+        found = {(c.slot.starts_at, c.reason, c.other_is_new) for c in conflicts}
+        self.assertIn((at(self.monday, 9), 'location', False), found)
+        self.assertIn((at(self.monday + timedelta(days=2), 13), 'researcher', False), found)
+        self.assertIn((at(self.monday, 13, 30), 'location', True), found)
+        self.assertNotIn(at(self.monday + timedelta(days=7), 9), {c.slot.starts_at for c in conflicts})
+
+    def test_preview_and_commit_a_semester(self):
+        url = reverse('studies:generate_timeslots', args=[self.study.pk])
+        data = {
+            'start_date': '2030-01-07', 'end_date': '2030-05-31', 'weekdays': ['0', '1', '2', '3', '4'],
+            'start_times': '09:00, 10:00, 11:00, 14:00, 15:00', 'exclude_dates': '2030-03-11\n2030-03-12',
+            'duration_minutes': '45', 'capacity': '2', 'location': 'Room 101',
+        }
+        self.client.force_login(self.researcher)
+        self.assertEqual(self.client.get(url).context['form'].initial['duration_minutes'], 45)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(url, {**data, 'preview': '1'})
+        preview_queries = len(ctx.captured_queries)
+        self.assertEqual(len(response.context['preview']), 515)
+        self.assertFalse(Timeslot.objects.exists())
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(url, {**data, 'commit': '1'})
+        self.assertRedirects(response, reverse('studies:manage_timeslots', args=[self.study.pk]))
+        # One extra INSERT per 500-row batch compared to the preview.
+        self.assertLessEqual(len(ctx.captured_queries), preview_queries + 4)
+        self.assertEqual(Timeslot.objects.filter(study=self.study, capacity=2).count(), 515)
+
+        # Generating the same pattern again conflicts with every slot just created.
+        response = self.client.post(url, {**data, 'commit': '1'})
+        self.assertEqual(response.context['conflict_count'], 515)
+        self.assertEqual(Timeslot.objects.count(), 515)
+        self.assertEqual(self.client.get(reverse('studies:manage_timeslots', args=[self.study.pk])).status_code, 200)
@@ -0,0 +1,52 @@
+import json
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from apps.studies import ingest
+from apps.studies.models import Response, Study
+
+
+class AsyncSubmitResponseTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.study = Study.objects.create(
+            title='Async Study',
+            description='Async submission test.',
+            mode='online',
+            consent_text='Consent.',
+        )
+        self.url = reverse('submit_response_async', kwargs={'study_id': self.study.id})
+
+    async def test_submit_creates_response(self):
+        response = await self.async_client.post(self.url, '{"score": 2}', content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.content)
+        saved = await Response.objects.aget(id=data['response_id'])
+        self.assertEqual(saved.payload, {'score': 2})
+
+    @override_settings(RESPONSE_MAX_PAYLOAD_BYTES=64)
+    async def test_oversized_payload_is_rejected(self):
+        body = json.dumps({'text': 'x' * 100})
+        response = await self.async_client.post(self.url, body, content_type='application/json')
+        self.assertEqual(response.status_code, 413)
+        self.assertFalse(await Response.objects.aexists())
+
+    async def test_invalid_json(self):
+        response = await self.async_client.post(self.url, '{nope', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_study_lookup_is_cached_and_invalidated_on_save(self):
+        self.assertEqual(ingest.get_submit_study(self.study.id), self.study)
+        with self.assertNumQueries(0):
+            self.assertEqual(ingest.get_submit_study(self.study.id), self.study)
+        self.study.is_active = False
+        self.study.save()
+        self.assertIsNone(ingest.get_submit_study(self.study.id))
+
+    async def test_inactive_study_is_404(self):
+        await Study.objects.filter(pk=self.study.pk).aupdate(is_approved=False)
+        ingest.invalidate_study(self.study.pk)
+        response = await self.async_client.post(self.url, '{}', content_type='application/json')
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,105 @@
+import gzip
+import json
+import uuid
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from apps.studies.models import Response, Study
+
+
+def ndjson(rows):
+    return ''.join(json.dumps(row) + '\n' for row in rows).encode()
+
+
+class SubmitResponseBatchTests(TestCase):
+    def setUp(self):
+        self.study = Study.objects.create(
+            title='Tablet Study',
+            description='Offline batch upload test.',
+            mode='online',
+            consent_text='Consent.',
+            monitoring_enabled=True,
+        )
+        self.url = reverse('submit_response_batch', kwargs={'study_id': self.study.id})
+        self.session = str(uuid.uuid4())
+
+    def post(self, body, gzipped=True, **extra):
+        if gzipped:
+            body = gzip.compress(body)
+            extra.setdefault('HTTP_CONTENT_ENCODING', 'gzip')
+        return self.client.post(self.url, body, content_type='application/x-ndjson', **extra)
+
+    def test_batch_is_inserted_and_resync_is_idempotent(self):
+        rows = [{'session_id': self.session, 'payload': {'trial': i}} for i in range(5)]
+        with mock.patch('apps.studies.views.run_sequential_bayes_monitoring') as monitoring:
+            first = self.post(ndjson(rows)).json()
+            second = self.post(ndjson(rows)).json()
+        self.assertEqual((first['created'], first['duplicates']), (5, 0))
+        self.assertEqual((second['created'], second['duplicates']), (0, 5))
+        self.assertEqual(
+            [r['response_id'] for r in first['results']],
+            [r['response_id'] for r in second['results']],
+        )
+        self.assertEqual(Response.objects.filter(study=self.study).count(), 5)
+        # One evaluation per upload that created rows, not one per row.
+        self.assertEqual(monitoring.delay.call_count, 1)
+
+    @override_settings(RESPONSE_INGEST_BATCH_SIZE=2)
+    def test_row_errors_and_in_batch_duplicates(self):
+        body = ndjson([
+            {'session_id': self.session, 'payload': {'a': 1}},
+            {'payload': {'a': 2}},
+            {'session_id': self.session, 'payload': {'a': 1}},
+        ]) + b'\n{broken\n' + ndjson([{'session_id': self.session, 'payload': {'a': 3}, 'submission_key': 'k-3'}])
+        data = self.post(body, gzipped=False).json()
+        self.assertEqual([r['status'] for r in data['results']], ['created', 'error', 'duplicate', 'error', 'created'])
+        self.assertEqual([r['line'] for r in data['results']], [1, 2, 3, 5, 6])
+        self.assertEqual(data['results'][0]['response_id'], data['results'][2]['response_id'])
+        self.assertTrue(Response.objects.filter(submission_key='k-3').exists())
+
+    @override_settings(RESPONSE_BATCH_MAX_ROWS=2)
+    def test_too_many_rows_keeps_rows_before_the_limit(self):
+        rows = [{'session_id': self.session, 'payload': {'trial': i}} for i in range(3)]
+        response = self.post(ndjson(rows))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['created'], 2)
+        self.assertEqual(Response.objects.count(), 2)
+
+    def test_blank_lines_count_toward_the_limits(self):
+        rows = ndjson([{'session_id': self.session, 'payload': {'trial': 1}}])
+        with override_settings(RESPONSE_BATCH_MAX_ROWS=100):
+            # ~10 MB of newlines compresses to a few KB
+            response = self.post(rows + b'\n' * (10 * 1024 * 1024))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'Batch exceeds 100 lines')
+        self.assertEqual(response.json()['created'], 1)
+
+        with override_settings(RESPONSE_BATCH_MAX_DECOMPRESSED_BYTES=4096):
+            response = self.post(rows + (b' ' * 1000 + b'\n') * 100)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'Batch exceeds 4096 bytes uncompressed')
+
+    @override_settings(RESPONSE_BATCH_MAX_BYTES=32)
+    def test_oversized_body_is_rejected(self):
+        rows = [{'session_id': self.session, 'payload': {'text': 'x' * 200}}]
+        self.assertEqual(self.post(ndjson(rows), gzipped=False).status_code, 413)
+
+    def test_corrupt_gzip(self):
+        response = self.client.post(
+            self.url, b'not gzip', content_type='application/x-ndjson', HTTP_CONTENT_ENCODING='gzip',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Response.objects.exists())
+
+    def test_damaged_gzip_data(self):
+        rows = [{'session_id': self.session, 'payload': {'trial': i}} for i in range(200)]
+        body = gzip.compress(ndjson(rows))
+        # Valid gzip header, corrupted deflate stream (zlib.error rather than OSError)
+        damaged = body[:10] + bytes(b ^ 0xFF for b in body[10:40]) + body[40:]
+        response = self.client.post(
+            self.url, damaged, content_type='application/x-ndjson', HTTP_CONTENT_ENCODING='gzip',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Unreadable body', response.json()['error'])
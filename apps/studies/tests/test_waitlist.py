@@ -0,0 +1,92 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.accounts.models import User
+from apps.studies.models import Signup, Study, Timeslot, WaitlistEntry
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class WaitlistTests(TestCase):
+    def setUp(self):
+        self.study = Study.objects.create(
+            title='Lab Study', description='Waitlist test.', mode='lab', consent_text='Consent.',
+            is_active=True, is_approved=True, irb_status='approved',
+        )
+        start = timezone.now() + timedelta(days=3)
+        self.timeslot = Timeslot.objects.create(
+            study=self.study, starts_at=start, ends_at=start + timedelta(hours=1), capacity=2,
+        )
+        self.participants = [
+            User.objects.create_user(
+                email=f'w{i}@example.com', password='password123', first_name='W', last_name=str(i),
+                role='participant',
+            )
+            for i in range(5)
+        ]
+        self.booked = [self.timeslot.book(p, consent_text_version='c') for p in self.participants[:2]]
+
+    def join(self, participant):
+        self.client.force_login(participant)
+        return self.client.post(reverse('studies:join_waitlist', args=[self.timeslot.pk]))
+
+    def waiting(self):
+        return list(
+            WaitlistEntry.objects.filter(timeslot=self.timeslot, status='waiting')
+            .order_by('id').values_list('participant__email', flat=True)
+        )
+
+    @mock.patch('apps.studies.tasks.notify_waitlist_promotion.delay')
+    def test_cancellations_promote_in_fifo_order(self, notify):
+        for participant in self.participants[2:]:
+            self.join(participant)
+        self.assertEqual(self.waiting(), ['w2@example.com', 'w3@example.com', 'w4@example.com'])
+        self.join(self.participants[3])
+        self.assertEqual(len(self.waiting()), 3)
+
+        # Two cancellations through stale copies of the same timeslot
+        with self.captureOnCommitCallbacks(execute=True):
+            Signup.objects.get(pk=self.booked[0].pk).cancel()
+            Signup.objects.get(pk=self.booked[1].pk).cancel()
+        self.assertEqual(self.waiting(), ['w4@example.com'])
+        promoted = Signup.objects.filter(timeslot=self.timeslot, status='booked')
+        self.assertEqual(set(promoted.values_list('participant__email', flat=True)), {'w2@example.com', 'w3@example.com'})
+        self.assertEqual(notify.call_count, 2)
+        self.timeslot.refresh_from_db()
+        self.assertEqual(self.timeslot.active_signup_count, 2)
+
+        entry = WaitlistEntry.objects.get(participant=self.participants[4])
+        self.assertEqual(entry.position, 1)
+        self.client.force_login(self.participants[4])
+        self.client.post(reverse('studies:leave_waitlist', args=[entry.pk]))
+        self.assertEqual(self.waiting(), [])
+
+    def test_capacity_increase_and_stale_entries(self):
+        cancelled_before = self.participants[2]
+        signup = Signup.objects.create(
+            timeslot=self.timeslot, participant=cancelled_before, consent_text_version='c', status='cancelled',
+        )
+        WaitlistEntry.objects.create(timeslot=self.timeslot, participant=cancelled_before, consent_text_version='c')
+        WaitlistEntry.objects.create(timeslot=self.timeslot, participant=self.participants[3], consent_text_version='c')
+
+        self.timeslot.capacity = 3
+        self.timeslot.save()
+        promoted = self.timeslot.promote_waitlist()
+        self.assertEqual([s.participant for s in promoted], [self.participants[3]])
+        self.assertEqual(WaitlistEntry.objects.get(participant=cancelled_before).status, 'expired')
+        self.assertEqual(Signup.objects.get(pk=signup.pk).status, 'cancelled')
+
+    def test_joining_when_a_seat_is_free_books_directly(self):
+        self.booked[0].cancel()
+        response = self.join(self.participants[2])
+        self.assertRedirects(response, reverse('studies:my_bookings'), fetch_redirect_response=False)
+        self.assertTrue(Signup.objects.filter(timeslot=self.timeslot, participant=self.participants[2]).exists())
+
+    def test_deleting_a_timeslot_does_not_promote(self):
+        WaitlistEntry.objects.create(timeslot=self.timeslot, participant=self.participants[2], consent_text_version='c')
+        self.timeslot.delete()
+        self.assertFalse(Signup.objects.exists())
+        self.assertFalse(WaitlistEntry.objects.exists())
@@ -18,16 +18,21 @@ urlpatterns = [
     
     # Timeslot booking
     path('timeslot/<uuid:pk>/book/', views.book_timeslot, name='book_timeslot'),
+    path('timeslot/<uuid:pk>/waitlist/', views.join_waitlist, name='join_waitlist'),
+    path('waitlist/<int:pk>/leave/', views.leave_waitlist, name='leave_waitlist'),
     path('signup/<uuid:pk>/cancel/', views.cancel_signup, name='cancel_signup'),
     
     # My bookings (participant)
     path('my-bookings/', views.my_bookings, name='my_bookings'),
+    path('calendar/<str:token>.ics', views.calendar_feed, name='calendar_feed'),
+    path('calendar/reset/', views.reset_calendar_feed, name='reset_calendar_feed'),
     
     # Researcher views
     path('researcher/', views.researcher_dashboard, name='researcher_dashboard'),
     path('researcher/create/', views.create_study, name='create'),
     path('researcher/<uuid:pk>/edit/', views.edit_study, name='edit'),
     path('researcher/<uuid:pk>/timeslots/', views.manage_timeslots, name='manage_timeslots'),
+    path('researcher/<uuid:pk>/timeslots/generate/', views.generate_timeslots, name='generate_timeslots'),
     path('researcher/<uuid:pk>/roster/', views.study_roster, name='roster'),
     path('researcher/signup/<uuid:pk>/attendance/', views.mark_attendance, name='mark_attendance'),
     
@@ -52,6 +57,8 @@ urlpatterns = [
     path('hr-sjt/infographic/preview/', views.hr_sjt_infographic_preview, name='hr_sjt_infographic_preview'),
     path('hr-sjt/infographic/image/', views.hr_sjt_infographic_image, name='hr_sjt_infographic_image'),
     path('<slug:slug>/status/', views.study_status, name='status'),
+    path('<slug:slug>/status/planner/', views.study_design_planner, name='design_planner'),
+    path('<slug:slug>/responses/export/', views.export_responses, name='export_responses'),
     
     # IRB AI Review
     path('<uuid:study_id>/irb-review/create/', views.irb_review_create, name='irb_review_create'),
@@ -2,7 +2,7 @@
 Views for studies app.
 """
 from django.db.models import Prefetch, Q
-from django.db import models, transaction
+from django.db import IntegrityError, models, transaction
 from django.shortcuts import render, get_object_or_404, redirect
 from django.http import JsonResponse, Http404, HttpResponse
 from django.contrib.auth.decorators import login_required
@@ -21,12 +21,15 @@ import uuid
 from pathlib import Path
 
 import markdown
+from asgiref.sync import sync_to_async
 
 logger = logging.getLogger(__name__)
 from .models import (
     Study,
     Timeslot,
+    TimeslotFull,
     Signup,
+    WaitlistEntry,
     Response,
     StudyEmailContact,
     StudentDataConsent,
@@ -38,13 +41,14 @@ from .models import (
     CollegeRepresentative,
     ProtocolAmendment,
 )
+from . import ingest
 from .irb_utils import assign_college_rep, route_submission, get_irb_chair
 from .tasks import (
     run_sequential_bayes_monitoring,
     run_irb_ai_review,
     notify_irb_members_about_update,
 )
-from apps.credits.models import AuditLog
+from apps.credits import audit
 
 
 def user_can_access_study(user, study):
@@ -165,14 +169,19 @@ def social_science_irb_diagram_2(request):
 
 def study_list(request):
     """Browse available studies. Uses active_approved (IRB-compliant: excludes expired)."""
-    studies = Study.active_approved.all()
+    from .eligibility import ensure_participant_indexed
+
+    studies = Study.active_approved.select_related('researcher').with_browse_stats()
     
     # Filter by mode if specified
     mode = request.GET.get('mode')
     if mode in ['lab', 'online']:
         studies = studies.filter(mode=mode)
     
-    # TODO: Apply eligibility filtering based on user's prescreen
+    # Participants only see studies whose eligibility rules they meet (EligibleStudy index)
+    if getattr(request.user, 'is_participant', False):
+        ensure_participant_indexed(request.user)
+        studies = studies.filter(eligible_participants__participant=request.user)
     
     return render(request, 'studies/list.html', {'studies': studies})
 
@@ -215,17 +224,15 @@ def book_timeslot(request, pk):
             messages.warning(request, 'You have already signed up for this timeslot.')
             return redirect('studies:detail', pk=timeslot.study.id)
         
-        # Check capacity
-        if timeslot.is_full:
-            messages.error(request, 'This timeslot is full.')
+        # Claim a seat and create the signup (guarded against concurrent overbooking)
+        try:
+            timeslot.book(request.user, consent_text_version=timeslot.study.consent_text)
+        except TimeslotFull:
+            messages.error(request, 'This timeslot is full. You can join its waitlist instead.')
+            return redirect('studies:detail', pk=timeslot.study.id)
+        except IntegrityError:
+            messages.warning(request, 'You have already signed up for this timeslot.')
             return redirect('studies:detail', pk=timeslot.study.id)
-        
-        # Create signup
-        Signup.objects.create(
-            timeslot=timeslot,
-            participant=request.user,
-            consent_text_version=timeslot.study.consent_text
-        )
         
         messages.success(request, 'Successfully booked timeslot!')
         return redirect('studies:my_bookings')
@@ -233,6 +240,49 @@ def book_timeslot(request, pk):
     return render(request, 'studies/book_confirm.html', {'timeslot': timeslot})
 
 
+@login_required
+@require_http_methods(["POST"])
+def join_waitlist(request, pk):
+    """Join the FIFO waitlist of a full timeslot; promoted automatically when a seat frees up."""
+    timeslot = get_object_or_404(Timeslot, pk=pk, is_cancelled=False)
+    if not Study.active_approved.filter(pk=timeslot.study_id).exists():
+        raise Http404("Study is not available for signup.")
+    if not request.user.is_participant:
+        messages.error(request, 'Only participants can join waitlists.')
+        return redirect('studies:list')
+    
+    if Signup.objects.filter(timeslot=timeslot, participant=request.user).exists():
+        messages.warning(request, 'You have already signed up for this timeslot.')
+    elif not timeslot.can_cancel:
+        messages.error(request, 'This timeslot starts too soon to join its waitlist.')
+    else:
+        try:
+            with transaction.atomic():
+                entry = WaitlistEntry.objects.create(
+                    timeslot=timeslot,
+                    participant=request.user,
+                    consent_text_version=timeslot.study.consent_text,
+                )
+        except IntegrityError:
+            messages.warning(request, 'You are already on the waitlist for this timeslot.')
+        else:
+            # A seat may have opened between the page load and now
+            if any(signup.participant_id == request.user.pk for signup in timeslot.promote_waitlist()):
+                messages.success(request, 'A spot was free, so you are booked!')
+                return redirect('studies:my_bookings')
+            messages.success(request, f'You are #{entry.position} on the waitlist. We will email you if a spot opens.')
+    return redirect('studies:detail', pk=timeslot.study_id)
+
+
+@login_required
+@require_http_methods(["POST"])
+def leave_waitlist(request, pk):
+    entry = get_object_or_404(WaitlistEntry, pk=pk, participant=request.user)
+    entry.withdraw()
+    messages.success(request, 'You have left the waitlist.')
+    return redirect('studies:my_bookings')
+
+
 @login_required
 def cancel_signup(request, pk):
     """Cancel a signup."""
@@ -261,9 +311,56 @@ def my_bookings(request):
         messages.error(request, 'Access denied.')
         return redirect('home')
     
-    signups = Signup.objects.filter(participant=request.user).order_by('-booked_at')
+    from .calendar_feeds import feed_token
+
+    signups = Signup.objects.filter(participant=request.user).select_related('timeslot__study').order_by('-booked_at')
+    feed_url = request.build_absolute_uri(reverse('studies:calendar_feed', args=[feed_token(request.user)]))
     
-    return render(request, 'studies/my_bookings.html', {'signups': signups})
+    waitlist = (
+        WaitlistEntry.objects.filter(participant=request.user, status='waiting')
+        .select_related('timeslot__study').order_by('timeslot__starts_at')
+    )
+    
+    return render(request, 'studies/my_bookings.html', {
+        'signups': signups,
+        'waitlist': waitlist,
+        'calendar_feed_url': feed_url,
+    })
+
+
+@require_http_methods(["GET", "HEAD"])
+def calendar_feed(request, token):
+    """
+    Tokenized iCalendar feed (no login: calendar clients poll it). Answers 304
+    when the client's ETag / Last-Modified still match the cached feed.
+    """
+    from django.utils.cache import get_conditional_response
+    from django.utils.http import http_date
+    from .calendar_feeds import get_feed, parse_token
+
+    parsed = parse_token(token)
+    feed = get_feed(*parsed) if parsed else None
+    if feed is None:
+        raise Http404()
+    body, etag, last_modified = feed
+    response = HttpResponse(body, content_type='text/calendar; charset=utf-8')
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified.timestamp())
+    response['Cache-Control'] = 'private, max-age=300'
+    return get_conditional_response(
+        request, etag=etag, last_modified=int(last_modified.timestamp()), response=response,
+    ) or response
+
+
+@login_required
+@require_http_methods(["POST"])
+def reset_calendar_feed(request):
+    """Issue a new calendar feed URL; the old one stops working."""
+    from .calendar_feeds import rotate_feed_key
+
+    rotate_feed_key(request.user)
+    messages.success(request, 'Your calendar feed URL has been reset. Update your calendar subscription with the new URL.')
+    return redirect('studies:my_bookings' if request.user.is_participant else 'studies:researcher_dashboard')
 
 
 @login_required
@@ -280,11 +377,11 @@ def researcher_dashboard(request):
     from apps.studies.models import ProtocolSubmission
     
     # Use Q objects to combine queries safely (PI, or co-I via text or PRAMS user link)
-    studies = Study.objects.filter(
+    studies = list(Study.objects.filter(
         Q(researcher=request.user) |
         Q(protocol_submissions__co_investigators__icontains=request.user.email) |
         Q(protocol_submissions__co_investigator_users=request.user)
-    ).distinct().order_by('-created_at')
+    ).distinct().order_by('-created_at').with_browse_stats().with_eligible_counts().prefetch_related('irb_reviews'))
     
     # Annotate each study with draft and submitted protocol info
     # Defer detailed protocol fields that may not exist in the database yet
@@ -298,34 +395,32 @@ def researcher_dashboard(request):
         'citi_training_certificate'
     ]
     
-    studies_with_protocols = []
-    for study in studies:
-        try:
-            draft = ProtocolSubmission.objects.filter(
-                study=study, 
-                status='draft'
-            ).defer(*detailed_fields).first()
-        except Exception:
-            draft = None
-        
-        try:
-            submitted = ProtocolSubmission.objects.filter(
-                study=study,
-                status='submitted',
-                is_archived=False
-            ).defer(*detailed_fields).order_by('-submitted_at').first()
-        except Exception:
-            submitted = None
-        # Show "Addendum pending" if this study has any protocol submission with a pending amendment
-        pending_amendment = ProtocolAmendment.objects.filter(
-            protocol_submission__study=study, decision='pending'
-        ).exists()
-        studies_with_protocols.append({
+    # One query each for drafts/latest submissions and pending amendments across all studies
+    drafts, submissions = {}, {}
+    try:
+        protocols = ProtocolSubmission.objects.filter(
+            Q(status='draft') | Q(status='submitted', is_archived=False),
+            study__in=studies,
+        ).defer(*detailed_fields).order_by('-submitted_at')
+        for protocol in protocols:
+            target = drafts if protocol.status == 'draft' else submissions
+            target.setdefault(protocol.study_id, protocol)
+    except Exception:
+        drafts, submissions = {}, {}
+    # Show "Addendum pending" if this study has any protocol submission with a pending amendment
+    pending_amendments = set(ProtocolAmendment.objects.filter(
+        protocol_submission__study__in=studies, decision='pending'
+    ).values_list('protocol_submission__study_id', flat=True))
+    
+    studies_with_protocols = [
+        {
             'study': study,
-            'draft_protocol': draft,
-            'submitted_protocol': submitted,
-            'pending_amendment': pending_amendment,
-        })
+            'draft_protocol': drafts.get(study.id),
+            'submitted_protocol': submissions.get(study.id),
+            'pending_amendment': study.id in pending_amendments,
+        }
+        for study in studies
+    ]
     
     # CITI status for researcher (PI) - flag when expired or expiring
     citi_status = None
@@ -333,9 +428,12 @@ def researcher_dashboard(request):
         from apps.accounts.citi_utils import get_researcher_citi_status
         citi_status = get_researcher_citi_status(request.user)
 
+    from .calendar_feeds import feed_token
+
     return render(request, 'studies/researcher_dashboard.html', {
         'studies': studies,
         'studies_with_protocols': studies_with_protocols,
+        'calendar_feed_url': request.build_absolute_uri(reverse('studies:calendar_feed', args=[feed_token(request.user)])),
         'ai_review_enabled': getattr(settings, 'AI_REVIEW_ENABLED', False),
         'citi_status': citi_status,
         'citi_required': getattr(settings, 'CITI_REQUIRED_FOR_SUBMISSION', False),
@@ -416,6 +514,51 @@ def manage_timeslots(request, pk):
     })
 
 
+@login_required
+def generate_timeslots(request, pk):
+    """
+    Recurring timeslot builder: POST with ``preview`` expands the weekly pattern
+    and lists the slots with room / researcher conflicts; POST with ``commit``
+    re-checks and inserts them with one bulk_create.
+    """
+    from .forms import TimeslotRecurrenceForm
+    from .scheduling import create_timeslots, expand, find_conflicts
+
+    study = get_object_or_404(Study, pk=pk, researcher=request.user)
+    form_kwargs = {'max_slots': settings.TIMESLOT_GENERATOR_MAX_SLOTS}
+    if request.method != 'POST':
+        form = TimeslotRecurrenceForm(initial={'duration_minutes': study.duration_minutes}, **form_kwargs)
+        return render(request, 'studies/generate_timeslots.html', {'study': study, 'form': form})
+
+    form = TimeslotRecurrenceForm(request.POST, **form_kwargs)
+    slots, conflicts = [], []
+    if form.is_valid():
+        slots = expand(study, form.recurrence())
+        conflicts = find_conflicts(study, slots)
+        if 'commit' in request.POST:
+            if conflicts and not form.cleaned_data['skip_conflicts']:
+                messages.error(request, f'{len(conflicts)} conflicts found. Adjust the pattern or choose to skip them.')
+            else:
+                conflicting = {id(conflict.slot) for conflict in conflicts}
+                created = create_timeslots([slot for slot in slots if id(slot) not in conflicting])
+                skipped = len(slots) - len(created)
+                messages.success(
+                    request,
+                    f'Created {len(created)} timeslots' + (f' ({skipped} conflicting slots skipped).' if skipped else '.'),
+                )
+                return redirect('studies:manage_timeslots', pk=study.pk)
+
+    conflicts_by_slot = {}
+    for conflict in conflicts:
+        conflicts_by_slot.setdefault(id(conflict.slot), []).append(conflict)
+    return render(request, 'studies/generate_timeslots.html', {
+        'study': study,
+        'form': form,
+        'preview': [(slot, conflicts_by_slot.get(id(slot), [])) for slot in slots],
+        'conflict_count': len(conflicts_by_slot),
+    })
+
+
 @login_required
 def study_roster(request, pk):
     """View study roster."""
@@ -953,6 +1096,8 @@ def submit_response(request, study_id):
     
     Expected POST body: JSON with response data
     Optional query param: session_id (otherwise generated)
+    Optional Idempotency-Key header / submission_key query param: retries with the
+    same key (or the same session_id and payload) return the original response_id.
     Uses active_approved so expired studies are rejected (IRB compliance).
     """
     study = get_object_or_404(Study.active_approved, pk=study_id)
@@ -972,13 +1117,34 @@ def submit_response(request, study_id):
     ip_address = request.META.get('REMOTE_ADDR')
     user_agent = request.META.get('HTTP_USER_AGENT', '')
     
+    key = ingest.submission_key(request, session_id, payload)
+    
+    if ingest.is_buffered():
+        return _submit_response_buffered(study, payload, session_id, ip_address, user_agent, key)
+    
+    existing = ingest.find_submission(study.id, key)
+    if existing:
+        return _duplicate_submission(existing)
+    
     try:
-        response = Response.objects.create(
-            study=study,
-            session_id=session_id,
-            payload=payload,
-            ip_address=ip_address,
-            user_agent=user_agent
+        with transaction.atomic():
+            response = Response.objects.create(
+                study=study,
+                session_id=session_id,
+                submission_key=key,
+                payload=payload,
+                ip_address=ip_address,
+                user_agent=user_agent
+            )
+    except IntegrityError:
+        # A concurrent retry won the race for this submission key
+        existing = ingest.find_submission(study.id, key)
+        if existing:
+            return _duplicate_submission(existing)
+        logger.exception('submit_response: failed to save response for study %s', study_id)
+        return JsonResponse(
+            {'error': 'Unable to save response. Please try again later.'},
+            status=503
         )
     except Exception as e:
         logger.exception('submit_response: failed to save response for study %s', study_id)
@@ -1001,6 +1167,178 @@ def submit_response(request, study_id):
     })
 
 
+@require_http_methods(["POST"])
+async def submit_response_async(request, study_id):
+    """
+    Async variant of submit_response for ASGI workers.
+
+    Same contract as submit_response, plus: the Study.active_approved lookup is
+    cached (see ingest.get_submit_study), the body is capped at
+    RESPONSE_MAX_PAYLOAD_BYTES (413) before it is parsed, JSON is parsed with
+    orjson when installed, and the insert goes through the async ORM.
+    """
+    study = await ingest.aget_submit_study(study_id)
+    if study is None:
+        raise Http404("Study not found.")
+    
+    if ingest.payload_too_large(request):
+        return JsonResponse({'error': 'Payload too large'}, status=413)
+    body = ingest.read_body(request)
+    if len(body) > settings.RESPONSE_MAX_PAYLOAD_BYTES:
+        return JsonResponse({'error': 'Payload too large'}, status=413)
+    try:
+        payload = ingest.loads(body)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+    
+    try:
+        session_id = uuid.UUID(request.GET['session_id']) if request.GET.get('session_id') else uuid.uuid4()
+    except ValueError:
+        return JsonResponse({'error': 'Invalid session_id'}, status=400)
+    ip_address = request.META.get('REMOTE_ADDR')
+    user_agent = request.META.get('HTTP_USER_AGENT', '')
+    key = ingest.submission_key(request, session_id, payload)
+    
+    if ingest.is_buffered():
+        return await sync_to_async(_submit_response_buffered)(study, payload, session_id, ip_address, user_agent, key)
+    
+    existing = await ingest.afind_submission(study.id, key)
+    if existing:
+        return _duplicate_submission(existing)
+    try:
+        response = await Response.objects.acreate(
+            study=study,
+            session_id=session_id,
+            submission_key=key,
+            payload=payload,
+            ip_address=ip_address,
+            user_agent=user_agent
+        )
+    except IntegrityError:
+        existing = await ingest.afind_submission(study.id, key)
+        if existing:
+            return _duplicate_submission(existing)
+        logger.exception('submit_response_async: failed to save response for study %s', study_id)
+        return JsonResponse(
+            {'error': 'Unable to save response. Please try again later.'},
+            status=503
+        )
+    except Exception:
+        logger.exception('submit_response_async: failed to save response for study %s', study_id)
+        return JsonResponse(
+            {'error': 'Unable to save response. Please try again later.'},
+            status=503
+        )
+    
+    if study.monitoring_enabled:
+        try:
+            await sync_to_async(run_sequential_bayes_monitoring.delay)(str(study.id))
+        except Exception:
+            logger.warning('submit_response_async: monitoring task enqueue failed for study %s', study_id)
+    
+    return JsonResponse({
+        'success': True,
+        'response_id': str(response.id),
+        'session_id': str(response.session_id)
+    })
+
+
+@require_http_methods(["POST"])
+def submit_response_batch(request, study_id):
+    """
+    Accept a batch of offline-collected responses as NDJSON (gzipped when sent
+    with Content-Encoding: gzip or Content-Type: application/gzip).
+
+    Each line: {"session_id": "<uuid>", "payload": {...}, "submission_key": "..."}
+    (submission_key optional). Rows already received, in this or an earlier
+    upload, are reported as duplicates; monitoring runs once for the whole batch.
+    The body is capped at RESPONSE_BATCH_MAX_BYTES (as sent),
+    RESPONSE_BATCH_MAX_DECOMPRESSED_BYTES and RESPONSE_BATCH_MAX_ROWS lines.
+    """
+    import gzip
+    import io
+
+    study = get_object_or_404(Study.active_approved, pk=study_id)
+
+    limit = settings.RESPONSE_BATCH_MAX_BYTES
+    try:
+        declared = int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        declared = 0
+    if declared > limit:
+        return JsonResponse({'error': 'Payload too large'}, status=413)
+    body = request.read(limit + 1)
+    if len(body) > limit:
+        return JsonResponse({'error': 'Payload too large'}, status=413)
+
+    stream = io.BytesIO(body)
+    if (request.headers.get('Content-Encoding', '').lower() == 'gzip'
+            or request.content_type in ('application/gzip', 'application/x-gzip')):
+        stream = gzip.GzipFile(fileobj=stream)
+
+    results, created, error = ingest.ingest_batch(
+        study,
+        stream,
+        ip_address=request.META.get('REMOTE_ADDR'),
+        user_agent=request.META.get('HTTP_USER_AGENT', ''),
+    )
+
+    if created and study.monitoring_enabled:
+        try:
+            run_sequential_bayes_monitoring.delay(str(study.id))
+        except Exception:
+            logger.warning('submit_response_batch: monitoring task enqueue failed for study %s', study_id)
+
+    statuses = [result['status'] for result in results]
+    data = {
+        'success': error is None,
+        'received': len(results),
+        'created': created,
+        'duplicates': statuses.count('duplicate'),
+        'errors': statuses.count('error'),
+        'results': results,
+    }
+    if error:
+        data['error'] = error
+    return JsonResponse(data, status=400 if error else 200)
+
+
+def _duplicate_submission(existing):
+    """Answer a retried submission with the original response (no new write)."""
+    return JsonResponse({
+        'success': True,
+        'response_id': str(existing['id']),
+        'session_id': str(existing['session_id']),
+        'duplicate': True,
+    })
+
+
+def _submit_response_buffered(study, payload, session_id, ip_address, user_agent, key):
+    """Buffered ingestion: acknowledge now, insert later (see apps.studies.ingest)."""
+    try:
+        record = ingest.build_record(study, payload, session_id, ip_address, user_agent, key=key)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid session_id'}, status=400)
+    existing = ingest.claim_submission(record)
+    if existing:
+        return _duplicate_submission(existing)
+    try:
+        ingest.get_buffer().push(record)
+    except Exception:
+        ingest.release_submission(record)
+        logger.exception('submit_response: failed to buffer response for study %s', study.id)
+        return JsonResponse(
+            {'error': 'Unable to save response. Please try again later.'},
+            status=503
+        )
+    # Monitoring is triggered by flush_response_buffer once the rows are written.
+    return JsonResponse({
+        'success': True,
+        'response_id': record['id'],
+        'session_id': record['session_id'],
+    })
+
+
 @require_http_methods(["POST"])
 def submit_infographic_email(request, study_id):
     """
@@ -1218,10 +1556,12 @@ def study_status(request, slug):
     
     # Get recent responses for display
     recent_responses = study.responses.order_by('-created_at')[:10]
+    last_analysis_run = study.analysis_runs.first()
     
     return render(request, 'studies/status.html', {
         'study': study,
         'recent_responses': recent_responses,
+        'last_analysis_run': last_analysis_run,
         'study_updates': study_updates,
         'can_post_update': can_post_update,
         'update_form_error': update_form_error,
@@ -1232,6 +1572,176 @@ def study_status(request, slug):
     })
 
 
+def study_design_planner(request, slug):
+    """
+    Sequential design planner: simulate the study's BF stopping rule under H0 and H1.
+
+    Plans are cached per configuration; GET shows the cached plan for the submitted
+    (or default) settings, POST runs the simulation and renders its plan directly
+    (the cache may be per-process). The simulation runs inline, without the
+    process pool that plan_sequential_design uses (BF_PLANNER_WORKERS).
+    """
+    from .analysis import ANALYSIS_PLUGINS
+    from .analysis.planner import PlannerError, get_or_simulate_design
+    from .forms import DesignPlannerForm
+
+    study = get_object_or_404(Study, slug=slug)
+    if not user_can_access_study(request.user, study):
+        if request.user.is_authenticated:
+            messages.error(request, 'Access denied.')
+            return redirect('studies:list')
+        messages.error(request, 'Please log in.')
+        return redirect('accounts:login')
+
+    plugin_choices = list(ANALYSIS_PLUGINS.items())
+    if study.analysis_plugin not in ANALYSIS_PLUGINS:
+        plugin_choices.insert(0, (study.analysis_plugin, study.analysis_plugin))
+    form_kwargs = {
+        'plugin_choices': plugin_choices,
+        'max_simulations': getattr(settings, 'BF_PLANNER_MAX_SIMULATIONS', 20000),
+        'initial': {
+            'plugin': study.analysis_plugin,
+            'params': '{}',
+            'bf_threshold': study.bf_threshold,
+            'min_n': study.min_sample_size,
+            'max_n': max(200, study.min_sample_size * 2),
+            'effect_size': 0.5,
+            'n_sims': 2000,
+        },
+    }
+
+    if request.method == 'POST':
+        form = DesignPlannerForm(request.POST, **form_kwargs)
+    elif 'plugin' in request.GET:
+        form = DesignPlannerForm(request.GET, **form_kwargs)
+    else:
+        form = DesignPlannerForm(data=form_kwargs['initial'], **form_kwargs)
+
+    plan = None
+    plan_error = None
+    if form.is_valid():
+        data = form.cleaned_data
+        config = dict(
+            params=data['params'],
+            bf_threshold=data['bf_threshold'],
+            min_n=data['min_n'],
+            max_n=data['max_n'],
+            effect_size=data['effect_size'],
+            n_sims=data['n_sims'],
+        )
+        try:
+            plan = get_or_simulate_design(data['plugin'], cache_only=request.method != 'POST', **config)
+        except PlannerError as exc:
+            plan_error = str(exc)
+
+    return render(request, 'studies/design_planner.html', {
+        'study': study,
+        'form': form,
+        'plan': plan,
+        'plan_error': plan_error,
+    })
+
+
+@login_required
+def export_responses(request, slug):
+    """
+    Stream a study's responses as NDJSON (default) or CSV.
+
+    Rows come out in (created_at, id) order, read in keyset pages, so memory use
+    is flat regardless of study size. Query params:
+
+    - ``format``: ``ndjson`` or ``csv``
+    - ``since``: ISO datetime; only responses created at or after it
+    - ``after``: ``<created_at>|<id>`` of the last row already received (resume)
+    - ``fields``: comma-separated payload keys to flatten into CSV columns
+
+    IP addresses and user agents are never exported.
+    """
+    from django.http import StreamingHttpResponse
+    from django.utils.dateparse import parse_datetime
+    from apps.compliance.guardrails import evaluate_ferpa_export
+    from apps.compliance.explainability import log_compliance_decision, outcome_from_report
+    from . import exports
+
+    study = get_object_or_404(Study, slug=slug)
+    is_owner = getattr(request.user, 'is_researcher', False) and study.researcher_id == request.user.id
+    if not (is_owner or getattr(request.user, 'is_admin', False) or request.user.is_staff):
+        return JsonResponse({'error': 'Access denied.'}, status=403)
+
+    export_format = request.GET.get('format', 'ndjson')
+    if export_format not in ('ndjson', 'csv'):
+        return JsonResponse({'error': 'format must be ndjson or csv'}, status=400)
+    since = after = None
+    if request.GET.get('since'):
+        since = parse_datetime(request.GET['since'])
+        if since is None:
+            return JsonResponse({'error': 'since must be an ISO 8601 datetime'}, status=400)
+    if request.GET.get('after'):
+        try:
+            after = exports.parse_after(request.GET['after'])
+        except ValueError as exc:
+            return JsonResponse({'error': str(exc)}, status=400)
+    fields = [f.strip() for f in request.GET.get('fields', '').split(',') if f.strip()]
+
+    export_type = f'study_responses_{export_format}'
+    compliance_report = evaluate_ferpa_export(
+        export_type=export_type,
+        includes_direct_identifiers=False,
+        destination='download',
+    )
+    log_extra = {
+        'study_slug': study.slug,
+        'export_type': export_type,
+        'since': request.GET.get('since', ''),
+        'after': request.GET.get('after', ''),
+    }
+    if compliance_report.is_blocked:
+        try:
+            log_compliance_decision(
+                actor=request.user,
+                action='ferpa_export_blocked',
+                entity='study',
+                entity_id=study.id,
+                report=compliance_report,
+                outcome='block',
+                request=request,
+                extra=log_extra,
+            )
+        except Exception:
+            pass
+        return JsonResponse({'error': 'Export blocked by compliance policy.'}, status=403)
+
+    try:
+        log_compliance_decision(
+            actor=request.user,
+            action='ferpa_export',
+            entity='study',
+            entity_id=study.id,
+            report=compliance_report,
+            outcome=outcome_from_report(compliance_report, proceeded=True),
+            request=request,
+            actor_note='Researcher/admin streamed de-identified study responses.',
+            extra=log_extra,
+            strict=True,
+        )
+    except Exception:
+        # The export must be on record before any row leaves
+        logger.exception('export_responses: audit write failed for study %s', study.slug)
+        return JsonResponse(
+            {'error': 'Export unavailable. Please try again later.'},
+            status=503
+        )
+
+    rows = exports.iter_responses(study.id, since=since, after=after)
+    if export_format == 'csv':
+        response = StreamingHttpResponse(exports.csv_lines(rows, fields), content_type='text/csv')
+    else:
+        response = StreamingHttpResponse(exports.ndjson_lines(rows), content_type='application/x-ndjson')
+    response['Content-Disposition'] = f'attachment; filename="responses_{study.slug}.{export_format}"'
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
 # ========== IRB AI REVIEW VIEWS ==========
 
 @login_required
@@ -2388,24 +2898,19 @@ def amendment_create(request, submission_id):
                 reviewer=submission.college_rep,  # Auto-assign to same college rep
             )
             # Audit log for addendum tracking (audit trail for IRB compliance)
-            try:
-                ip = request.META.get('REMOTE_ADDR')
-                AuditLog.objects.create(
-                    actor=request.user,
-                    action='amendment_submitted',
-                    entity='amendment',
-                    entity_id=amendment.id,
-                    ip_address=ip if ip and len(str(ip)) < 45 else None,
-                    user_agent=(request.META.get('HTTP_USER_AGENT') or '')[:500],
-                    metadata={
-                        'amendment_number': amendment.amendment_number,
-                        'title': amendment.title,
-                        'protocol_number': submission.protocol_number,
-                        'study_id': str(study.id),
-                    },
-                )
-            except Exception:
-                pass  # Don't fail amendment submission if audit log fails
+            audit.record(
+                actor=request.user,
+                action='amendment_submitted',
+                entity='amendment',
+                entity_id=amendment.id,
+                request=request,
+                metadata={
+                    'amendment_number': amendment.amendment_number,
+                    'title': amendment.title,
+                    'protocol_number': submission.protocol_number,
+                    'study_id': str(study.id),
+                },
+            )
             messages.success(request, f'Amendment {amendment.amendment_number} created and submitted for review.')
 
             # Send email notification to reviewer
@@ -2511,25 +3016,20 @@ def amendment_review(request, amendment_id):
     amendment.save()
 
     # Audit log for addendum review (audit trail for IRB compliance)
-    try:
-        ip = request.META.get('REMOTE_ADDR')
-        AuditLog.objects.create(
-            actor=request.user,
-            action='amendment_reviewed',
-            entity='amendment',
-            entity_id=amendment.id,
-            ip_address=ip if ip and len(str(ip)) < 45 else None,
-            user_agent=(request.META.get('HTTP_USER_AGENT') or '')[:500],
-            metadata={
-                'amendment_number': amendment.amendment_number,
-                'title': amendment.title,
-                'decision': decision,
-                'protocol_number': amendment.protocol_submission.protocol_number,
-                'study_id': str(amendment.protocol_submission.study_id),
-            },
-        )
-    except Exception:
-        pass  # Don't fail amendment review if audit log fails
+    audit.record(
+        actor=request.user,
+        action='amendment_reviewed',
+        entity='amendment',
+        entity_id=amendment.id,
+        request=request,
+        metadata={
+            'amendment_number': amendment.amendment_number,
+            'title': amendment.title,
+            'decision': decision,
+            'protocol_number': amendment.protocol_submission.protocol_number,
+            'study_id': str(amendment.protocol_submission.study_id),
+        },
+    )
 
     if decision == 'approved':
         messages.success(request, f'Amendment {amendment.amendment_number} approved.')
@@ -17,6 +17,10 @@ urlpatterns = [
     
     # Protocol response submission
     path('studies/<uuid:study_id>/submit/', study_views.submit_response, name='submit_response'),
+    # Async variant for ASGI deployments (cached study lookup, payload size cap, async ORM)
+    path('studies/<uuid:study_id>/submit/async/', study_views.submit_response_async, name='submit_response_async'),
+    # Offline batch upload (gzipped NDJSON, one row per response)
+    path('studies/<uuid:study_id>/submit/batch/', study_views.submit_response_batch, name='submit_response_batch'),
     # Optional email signup for study infographics (separate dataset)
     path('studies/<uuid:study_id>/infographic-email/', study_views.submit_infographic_email, name='submit_infographic_email'),
 ]
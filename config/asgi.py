@@ -0,0 +1,39 @@
+"""
+ASGI config for recruitment system.
+
+Serve with an ASGI worker (e.g. ``uvicorn config.asgi:application`` or
+``gunicorn config.asgi:application -k uvicorn.workers.UvicornWorker``) to get
+the async response submission endpoint (/api/studies/<uuid>/submit/async/).
+"""
+import os
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+django_application = get_asgi_application()
+
+from django.conf import settings  # noqa: E402  (settings are configured above)
+
+
+async def application(scope, receive, send):
+    """
+    Reject oversized response submissions from the Content-Length header,
+    before Django reads (and spools) the request body.
+    """
+    if scope['type'] == 'http' and scope['path'].startswith('/api/studies/'):
+        if scope['path'].endswith('/submit/batch/'):
+            limit = settings.RESPONSE_BATCH_MAX_BYTES
+        else:
+            limit = settings.RESPONSE_MAX_PAYLOAD_BYTES
+        for name, value in scope.get('headers', []):
+            if name == b'content-length':
+                if value.isdigit() and int(value) > limit:
+                    await send({
+                        'type': 'http.response.start',
+                        'status': 413,
+                        'headers': [(b'content-type', b'application/json')],
+                    })
+                    await send({'type': 'http.response.body', 'body': b'{"error": "Payload too large"}'})
+                    return
+                break
+    await django_application(scope, receive, send)
@@ -16,21 +16,41 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 # Auto-discover tasks from all installed apps
 app.autodiscover_tasks()
 
-# Periodic tasks
-app.conf.beat_schedule = {
-    'send-24h-reminders': {
-        'task': 'apps.studies.tasks.send_24h_reminders',
-        'schedule': crontab(hour=9, minute=0),  # Daily at 9 AM
-    },
-    'send-2h-reminders': {
-        'task': 'apps.studies.tasks.send_2h_reminders',
-        'schedule': crontab(minute='*/30'),  # Every 30 minutes
+# Periodic tasks (settings-dependent entries, e.g. flush-response-buffer, come from CELERY_BEAT_SCHEDULE)
+app.conf.beat_schedule.update({
+    'send-due-reminders': {
+        'task': 'apps.studies.tasks.send_due_reminders',
+        'schedule': crontab(minute='*/5'),  # Every 5 minutes; offsets from REMINDER_HOURS_BEFORE
     },
     'mark-missed-sessions': {
         'task': 'apps.studies.tasks.mark_missed_sessions',
         'schedule': crontab(hour='*/1'),  # Hourly
     },
-}
+    'create-future-partitions': {
+        'task': 'apps.credits.tasks.create_future_partitions',
+        'schedule': crontab(hour=2, minute=30),  # Daily; no-op unless tables are partitioned
+    },
+    'replay-audit-spool': {
+        'task': 'apps.credits.tasks.replay_audit_spool',
+        'schedule': crontab(minute='*/10'),  # No-op unless an audit flush failed
+    },
+    'checkpoint-audit-chain': {
+        'task': 'apps.credits.tasks.checkpoint_audit_chain',
+        'schedule': crontab(minute=45),  # Hourly; verifies only rows since the last checkpoint
+    },
+    'refresh-eligibility-index': {
+        'task': 'apps.studies.tasks.refresh_eligibility_index',
+        'schedule': crontab(hour=3, minute=0),  # Daily: IRB expirations and birthdays
+    },
+    'refresh-reporting-rollups': {
+        'task': 'apps.reporting.tasks.refresh_daily_rollups',
+        'schedule': crontab(minute=20),  # Hourly; recent window only
+    },
+    'sweep-bayes-monitoring': {
+        'task': 'apps.studies.tasks.sweep_bayes_monitoring',
+        'schedule': crontab(minute='*/15'),  # Every 15 minutes
+    },
+})
 
 
 @app.task(bind=True, ignore_result=True)
@@ -0,0 +1,271 @@
+"""
+PostgreSQL declarative partitioning for the append-only tables.
+
+- ``audit_logs``: RANGE on ``created_at``, one partition per month
+  (``audit_logs_p2026_10``) plus a DEFAULT partition. Future months are created
+  ahead of time by the ``create_future_partitions`` beat task; old months can be
+  detached (and then archived or dropped) without touching the live table.
+- ``responses``: HASH on ``study_id``. Every query filters on study, and the
+  ``(study_id, submission_key)`` unique constraint stays enforceable because it
+  contains the partition key.
+
+Converting a table (``manage.py partition_tables``) renames the existing table
+to ``<table>_unpartitioned``, creates the partitioned table with the same
+columns, indexes and foreign keys, and copies the rows, all in one transaction.
+The primary key becomes ``(id, <partition column>)`` because PostgreSQL requires
+unique constraints on a partitioned table to include the partition key; ids are
+UUIDs, so Django's ``pk`` lookups are unaffected. A unique constraint without
+the partition column (``audit_logs``' ``UNIQUE (seq)``, the chain position) cannot
+live on the partitioned table, so it moves to an unpartitioned side table,
+``<constraint>_keys``, filled by an AFTER INSERT trigger. A key stays claimed
+after its row is deleted or its partition detached, which suits the append-only
+audit log. Django's schema editor does not know about the side table, so a later
+migration that changes such a field needs a matching RunSQL.
+
+A month whose rows already sit in the DEFAULT partition (the beat task that
+creates partitions ahead of time did not run) is created as a standalone table,
+the rows are moved into it from DEFAULT, and it is then attached.
+
+Every function here is a no-op on databases other than PostgreSQL.
+"""
+from datetime import date
+
+from django.db import connection, transaction
+
+MONTHLY_TABLES = {'audit_logs': 'created_at'}
+HASH_TABLES = {'responses': 'study_id'}
+
+LEGACY_SUFFIX = '_unpartitioned'
+
+
+def supported(conn=None) -> bool:
+    return (conn or connection).vendor == 'postgresql'
+
+
+def month_start(value) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def monthly_partition_name(table: str, month: date) -> str:
+    return f'{table}_p{month.year:04d}_{month.month:02d}'
+
+
+def is_partitioned(cursor, table: str) -> bool:
+    cursor.execute(
+        "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+        "WHERE c.relname = %s AND pg_table_is_visible(c.oid)",
+        [table],
+    )
+    return cursor.fetchone() is not None
+
+
+def list_partitions(cursor, table: str):
+    """Names of the partitions attached to ``table``, sorted."""
+    cursor.execute(
+        "SELECT child.relname FROM pg_inherits i "
+        "JOIN pg_class parent ON parent.oid = i.inhparent "
+        "JOIN pg_class child ON child.oid = i.inhrelid "
+        "WHERE parent.relname = %s AND pg_table_is_visible(parent.oid) ORDER BY child.relname",
+        [table],
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def _quote(name: str) -> str:
+    return connection.ops.quote_name(name)
+
+
+def _index_definitions(cursor, table: str):
+    """(name, CREATE INDEX sql) for every index on ``table`` except the primary key."""
+    cursor.execute(
+        "SELECT i.relname, pg_get_indexdef(i.oid) FROM pg_index x "
+        "JOIN pg_class t ON t.oid = x.indrelid JOIN pg_class i ON i.oid = x.indexrelid "
+        "WHERE t.relname = %s AND pg_table_is_visible(t.oid) AND NOT x.indisprimary",
+        [table],
+    )
+    return cursor.fetchall()
+
+
+def _constraint_definitions(cursor, table: str, kinds: str):
+    """(name, definition) for constraints of the given pg_constraint.contype letters."""
+    cursor.execute(
+        "SELECT c.conname, pg_get_constraintdef(c.oid) FROM pg_constraint c "
+        "JOIN pg_class t ON t.oid = c.conrelid "
+        "WHERE t.relname = %s AND pg_table_is_visible(t.oid) AND c.contype = ANY(%s)",
+        [table, list(kinds)],
+    )
+    return cursor.fetchall()
+
+
+def _constraint_columns(definition: str):
+    """Column names (as SQL identifiers) in a ``UNIQUE (...)`` definition."""
+    return [name.strip() for name in definition[definition.index('(') + 1:definition.index(')')].split(',')]
+
+
+def _unique_key_table(cursor, table: str, legacy: str, name: str, definition: str, columns):
+    """Enforce constraint ``name`` on ``table``'s ``columns`` through a ``<name>_keys`` side table."""
+    keys = _quote(f'{name}_keys'[:63])
+    function = _quote(f'{name}_claim'[:63])
+    column_list = ', '.join(columns)
+    cursor.execute(f'CREATE TABLE {keys} AS SELECT {column_list} FROM {_quote(legacy)} WITH NO DATA')
+    cursor.execute(f'ALTER TABLE {keys} ADD CONSTRAINT {_quote(name)} {definition}')
+    cursor.execute(
+        f'CREATE FUNCTION {function}() RETURNS trigger LANGUAGE plpgsql AS $$ BEGIN '
+        f'INSERT INTO {keys} ({column_list}) VALUES ({", ".join("NEW." + c for c in columns)}); '
+        f'RETURN NULL; END $$'
+    )
+    # Cloned onto every partition, so inserts routed through the parent claim their key
+    cursor.execute(f'CREATE TRIGGER {function} AFTER INSERT ON {_quote(table)} FOR EACH ROW EXECUTE FUNCTION {function}()')
+
+
+def _convert(cursor, table: str, column: str, partition_by: str, create_partitions):
+    """Shared steps for converting ``table`` into a table partitioned by ``partition_by``."""
+    legacy = f'{table}{LEGACY_SUFFIX}'
+    indexes = _index_definitions(cursor, table)
+    unique_constraints = _constraint_definitions(cursor, table, 'u')
+    foreign_keys = _constraint_definitions(cursor, table, 'f')
+    cursor.execute(f'LOCK TABLE {_quote(table)} IN ACCESS EXCLUSIVE MODE')
+    cursor.execute(f'ALTER TABLE {_quote(table)} RENAME TO {_quote(legacy)}')
+
+    # Index (and index-backed constraint) names are schema-wide: move the legacy ones aside.
+    cursor.execute(
+        "SELECT i.relname FROM pg_index x JOIN pg_class t ON t.oid = x.indrelid "
+        "JOIN pg_class i ON i.oid = x.indexrelid WHERE t.relname = %s AND pg_table_is_visible(t.oid)",
+        [legacy],
+    )
+    for (index_name,) in cursor.fetchall():
+        cursor.execute(f'ALTER INDEX {_quote(index_name)} RENAME TO {_quote((index_name + "_old")[-63:])}')
+
+    cursor.execute(
+        f'CREATE TABLE {_quote(table)} (LIKE {_quote(legacy)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+        f'PARTITION BY {partition_by}'
+    )
+    cursor.execute(f'ALTER TABLE {_quote(table)} ADD PRIMARY KEY (id, {_quote(column)})')
+    unique_names = {name for name, _ in unique_constraints}
+    for name, definition in unique_constraints:
+        columns = _constraint_columns(definition)
+        if column in columns or _quote(column) in columns:
+            cursor.execute(f'ALTER TABLE {_quote(table)} ADD CONSTRAINT {_quote(name)} {definition}')
+        else:
+            _unique_key_table(cursor, table, legacy, name, definition, columns)
+    for name, definition in foreign_keys:
+        cursor.execute(f'ALTER TABLE {_quote(table)} ADD CONSTRAINT {_quote(name)} {definition}')
+    for name, definition in indexes:
+        if name in unique_names:
+            continue
+        # pg_get_indexdef was taken before the rename, so it already targets the new table.
+        cursor.execute(definition)
+
+    created = create_partitions()
+    cursor.execute(f'INSERT INTO {_quote(table)} SELECT * FROM {_quote(legacy)}')
+    return created
+
+
+def convert_monthly(cursor, table: str, column: str, months_ahead: int = 3):
+    """Convert ``table`` to monthly RANGE partitions on ``column``; returns partitions created."""
+    def create_partitions():
+        cursor.execute(f'SELECT min({_quote(column)}) FROM {_quote(table + LEGACY_SUFFIX)}')
+        oldest = cursor.fetchone()[0]
+        cursor.execute(f'CREATE TABLE {_quote(table + "_default")} PARTITION OF {_quote(table)} DEFAULT')
+        return [f'{table}_default'] + ensure_monthly_partitions(
+            cursor, table, months_ahead=months_ahead, start=month_start(oldest) if oldest else None, column=column
+        )
+
+    return _convert(cursor, table, column, f'RANGE ({_quote(column)})', create_partitions)
+
+
+def convert_hash(cursor, table: str, column: str, modulus: int = 16):
+    """Convert ``table`` to ``modulus`` HASH partitions on ``column``; returns partitions created."""
+    def create_partitions():
+        names = []
+        for remainder in range(modulus):
+            name = f'{table}_h{remainder:02d}'
+            cursor.execute(
+                f'CREATE TABLE {_quote(name)} PARTITION OF {_quote(table)} '
+                f'FOR VALUES WITH (MODULUS {modulus}, REMAINDER {remainder})'
+            )
+            names.append(name)
+        return names
+
+    return _convert(cursor, table, column, f'HASH ({_quote(column)})', create_partitions)
+
+
+def _create_month(cursor, table: str, column: str, name: str, month: date, has_default: bool):
+    bounds = [month.isoformat(), add_months(month, 1).isoformat()]
+    default = _quote(f'{table}_default')
+    in_month = f'{_quote(column)} >= %s AND {_quote(column)} < %s'
+    if has_default:
+        cursor.execute(f'SELECT EXISTS (SELECT 1 FROM {default} WHERE {in_month})', bounds)
+        has_default = cursor.fetchone()[0]
+    if not has_default:
+        cursor.execute(
+            f'CREATE TABLE {_quote(name)} PARTITION OF {_quote(table)} FOR VALUES FROM (%s) TO (%s)', bounds
+        )
+        return
+    # DEFAULT already holds rows for this month, so PARTITION OF would fail its constraint
+    # check: move them into a standalone table (no INSERT trigger fires) and attach that.
+    cursor.execute(
+        f'CREATE TABLE {_quote(name)} (LIKE {_quote(table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+    )
+    cursor.execute(
+        f'WITH moved AS (DELETE FROM {default} WHERE {in_month} RETURNING *) '
+        f'INSERT INTO {_quote(name)} SELECT * FROM moved',
+        bounds,
+    )
+    cursor.execute(
+        f'ALTER TABLE {_quote(table)} ATTACH PARTITION {_quote(name)} FOR VALUES FROM (%s) TO (%s)', bounds
+    )
+
+
+def ensure_monthly_partitions(cursor, table: str, months_ahead: int = 3, start: date = None, column: str = None):
+    """
+    Create any missing monthly partitions from ``start`` (default: this month)
+    through ``months_ahead``, moving rows for those months out of DEFAULT.
+    """
+    from django.utils import timezone
+
+    column = column or MONTHLY_TABLES[table]
+    existing = set(list_partitions(cursor, table))
+    has_default = f'{table}_default' in existing
+    this_month = month_start(timezone.now())
+    month = min(start, this_month) if start else this_month
+    last = add_months(this_month, months_ahead)
+    created = []
+    while month <= last:
+        name = monthly_partition_name(table, month)
+        if name not in existing:
+            _create_month(cursor, table, column, name, month, has_default)
+            created.append(name)
+        month = add_months(month, 1)
+    return created
+
+
+def detach_monthly_partitions(cursor, table: str, before: date):
+    """Detach monthly partitions that end on or before ``before``; the detached tables are kept."""
+    detached = []
+    prefix = f'{table}_p'
+    for name in list_partitions(cursor, table):
+        if not name.startswith(prefix):
+            continue
+        year, month = name[len(prefix):].split('_')
+        if add_months(date(int(year), int(month), 1), 1) <= before:
+            cursor.execute(f'ALTER TABLE {_quote(table)} DETACH PARTITION {_quote(name)}')
+            detached.append(name)
+    return detached
+
+
+def create_future_partitions(months_ahead: int = 3):
+    """Create upcoming monthly partitions for every partitioned monthly table. Returns names created."""
+    if not supported():
+        return []
+    created = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        for table in MONTHLY_TABLES:
+            if is_partitioned(cursor, table):
+                created += ensure_monthly_partitions(cursor, table, months_ahead=months_ahead)
+    return created
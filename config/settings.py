@@ -91,6 +91,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'apps.credits.middleware.AuditBufferMiddleware',
     'apps.accounts.middleware.RLSUserContextMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
@@ -204,6 +205,65 @@ CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
 
+# Cache (shared across workers when CACHE_URL points at Redis; per-process memory otherwise)
+CACHE_URL = _config('CACHE_URL', default='')
+if CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Sequential design planner (Monte Carlo simulation of BF stopping rules). BF_PLANNER_WORKERS sizes the
+# process pool of manage.py plan_sequential_design; the web planner simulates inline.
+BF_PLANNER_WORKERS = _config('BF_PLANNER_WORKERS', default=os.cpu_count() or 1, cast=int)
+BF_PLANNER_MAX_SIMULATIONS = _config('BF_PLANNER_MAX_SIMULATIONS', default=20000, cast=int)
+BF_PLANNER_CACHE_SECONDS = _config('BF_PLANNER_CACHE_SECONDS', default=7 * 24 * 3600, cast=int)
+
+# Analysis plugin executor (sandboxed subprocess pool used by sequential monitoring)
+ANALYSIS_PLUGIN_WORKERS = _config('ANALYSIS_PLUGIN_WORKERS', default=2, cast=int)
+ANALYSIS_PLUGIN_TIMEOUT_SECONDS = _config('ANALYSIS_PLUGIN_TIMEOUT_SECONDS', default=60, cast=float)
+ANALYSIS_PLUGIN_MAX_RSS_MB = _config('ANALYSIS_PLUGIN_MAX_RSS_MB', default=512, cast=int)
+ANALYSIS_COLUMN_DIR = _config('ANALYSIS_COLUMN_DIR', default='') or None
+
+# Response ingestion: 'direct' inserts one row per request; 'redis' or 'db' acknowledge
+# immediately and buffer the response for the flush_response_buffer task (apps.studies.ingest)
+RESPONSE_INGEST_MODE = _config('RESPONSE_INGEST_MODE', default='direct')
+# Buffered modes claim submission keys in the cache; a per-process LocMemCache would let two
+# workers accept the same key and hand out response ids that are never written
+if RESPONSE_INGEST_MODE in ('redis', 'db') and not CACHE_URL and not DEBUG:
+    raise RuntimeError(f'RESPONSE_INGEST_MODE={RESPONSE_INGEST_MODE!r} requires CACHE_URL (a cache shared by all workers).')
+RESPONSE_INGEST_REDIS_URL = _config('RESPONSE_INGEST_REDIS_URL', default=CACHE_URL or 'redis://localhost:6379/0')
+RESPONSE_INGEST_BATCH_SIZE = _config('RESPONSE_INGEST_BATCH_SIZE', default=1000, cast=int)
+RESPONSE_INGEST_FLUSH_SECONDS = _config('RESPONSE_INGEST_FLUSH_SECONDS', default=2.0, cast=float)
+# Settings-dependent beat entries; config/celery.py adds the fixed schedule to these
+CELERY_BEAT_SCHEDULE = {}
+if RESPONSE_INGEST_MODE in ('redis', 'db'):
+    CELERY_BEAT_SCHEDULE['flush-response-buffer'] = {
+        'task': 'apps.studies.tasks.flush_response_buffer',
+        'schedule': RESPONSE_INGEST_FLUSH_SECONDS,
+    }
+RESPONSE_MAX_PAYLOAD_BYTES = _config('RESPONSE_MAX_PAYLOAD_BYTES', default=256 * 1024, cast=int)
+# Batch (offline tablet) uploads: gzipped NDJSON, capped compressed size, decompressed size and
+# line count (blank lines included)
+RESPONSE_BATCH_MAX_BYTES = _config('RESPONSE_BATCH_MAX_BYTES', default=20 * 1024 * 1024, cast=int)
+RESPONSE_BATCH_MAX_DECOMPRESSED_BYTES = _config(
+    'RESPONSE_BATCH_MAX_DECOMPRESSED_BYTES', default=100 * 1024 * 1024, cast=int
+)
+RESPONSE_BATCH_MAX_ROWS = _config('RESPONSE_BATCH_MAX_ROWS', default=50000, cast=int)
+STUDY_LOOKUP_CACHE_SECONDS = _config('STUDY_LOOKUP_CACHE_SECONDS', default=30, cast=int)
+
+# Table partitioning (PostgreSQL only; see config/partitioning.py and manage.py partition_tables)
+PARTITION_MONTHS_AHEAD = _config('PARTITION_MONTHS_AHEAD', default=3, cast=int)
+RESPONSES_HASH_PARTITIONS = _config('RESPONSES_HASH_PARTITIONS', default=16, cast=int)
+
 # Django REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
@@ -249,7 +309,25 @@ PARTICIPANT_EXPORT_SALT = _config('PARTICIPANT_EXPORT_SALT', default=None)
 CANCELLATION_WINDOW_HOURS = _config('CANCELLATION_WINDOW_HOURS', default=2, cast=int)
 MAX_WEEKLY_SIGNUPS = _config('MAX_WEEKLY_SIGNUPS', default=3, cast=int)
 NO_SHOW_LIMIT = _config('NO_SHOW_LIMIT', default=2, cast=int)
+# Per-user .ics feeds are cached until a signup/timeslot change bumps the user's feed version
+CALENDAR_FEED_CACHE_SECONDS = _config('CALENDAR_FEED_CACHE_SECONDS', default=24 * 3600, cast=int)
+TIMESLOT_GENERATOR_MAX_SLOTS = _config('TIMESLOT_GENERATOR_MAX_SLOTS', default=1000, cast=int)
+# Audit log writer (apps.credits.audit): events are batched per request and inserted after commit;
+# failed flushes are spooled to AUDIT_LOG_SPOOL_PATH and replayed by a beat task
+AUDIT_LOG_BUFFERED = _config('AUDIT_LOG_BUFFERED', default=True, cast=bool)
+AUDIT_LOG_SPOOL_PATH = _config('AUDIT_LOG_SPOOL_PATH', default=str(BASE_DIR / 'logs' / 'audit_spool.jsonl'))
+# Audit hash chain (apps.credits.chain): checkpoints are signed with this key (SECRET_KEY if unset)
+AUDIT_CHAIN_SIGNING_KEY = _config('AUDIT_CHAIN_SIGNING_KEY', default=None)
+# Reporting rollups (apps.reporting.rollups): the beat task recomputes this window around today
+REPORTING_ROLLUP_LOOKBACK_DAYS = _config('REPORTING_ROLLUP_LOOKBACK_DAYS', default=14, cast=int)
+REPORTING_ROLLUP_LOOKAHEAD_DAYS = _config('REPORTING_ROLLUP_LOOKAHEAD_DAYS', default=120, cast=int)
 REMINDER_HOURS_BEFORE = _config('REMINDER_HOURS_BEFORE', default='24,2', cast=Csv(cast=int))
+# Reminder emails (apps.studies.reminders): a reminder is due up to REMINDER_GRACE_MINUTES after
+# its offset, and is sent over one connection in batches
+REMINDER_GRACE_MINUTES = _config('REMINDER_GRACE_MINUTES', default=60, cast=int)
+REMINDER_EMAIL_BATCH_SIZE = _config('REMINDER_EMAIL_BATCH_SIZE', default=100, cast=int)
+REMINDER_EMAIL_RETRIES = _config('REMINDER_EMAIL_RETRIES', default=2, cast=int)
+REMINDER_EMAIL_RETRY_DELAY = _config('REMINDER_EMAIL_RETRY_DELAY', default=2.0, cast=float)
 
 # CSRF Settings
 CSRF_TRUSTED_ORIGINS = _config('CSRF_TRUSTED_ORIGINS', default='http://localhost:8000', cast=Csv())